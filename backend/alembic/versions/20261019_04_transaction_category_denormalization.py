@@ -0,0 +1,74 @@
+"""denormalize effective type and root category on transactions
+
+Revision ID: 20261019_04
+Revises: 20240302_03
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_04"
+down_revision: Union[str, None] = "20240302_03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+BACKFILL_SQL = sa.text(
+    """
+    UPDATE transactions
+    SET effective_type = COALESCE(
+            (SELECT CAST(c.type AS VARCHAR(20)) FROM categories c WHERE c.id = transactions.subcategory_id),
+            (SELECT CAST(c.type AS VARCHAR(20)) FROM categories c WHERE c.id = transactions.category_id),
+            'expense'
+        ),
+        root_category_id = COALESCE(
+            (SELECT c.parent_id FROM categories c WHERE c.id = transactions.subcategory_id),
+            transactions.category_id
+        )
+    WHERE transactions.id >= :lower AND transactions.id < :upper
+    """
+)
+
+
+def upgrade() -> None:
+    op.add_column("transactions", sa.Column("effective_type", sa.String(length=20), nullable=True))
+    op.add_column(
+        "transactions",
+        sa.Column("root_category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=True),
+    )
+
+    bind = op.get_bind()
+    bounds = bind.execute(sa.text("SELECT MIN(id), MAX(id) FROM transactions")).one()
+    if bounds[0] is not None:
+        lower = bounds[0]
+        while lower <= bounds[1]:
+            bind.execute(BACKFILL_SQL, {"lower": lower, "upper": lower + BATCH_SIZE})
+            lower += BATCH_SIZE
+
+    op.alter_column(
+        "transactions",
+        "effective_type",
+        existing_type=sa.String(length=20),
+        nullable=False,
+        server_default="expense",
+    )
+
+    op.create_index("ix_transactions_root_category_id", "transactions", ["root_category_id"])
+    op.create_index(
+        "ix_transactions_user_type_date",
+        "transactions",
+        ["user_id", "effective_type", "transaction_date"],
+        postgresql_include=["amount_ars", "amount_usd", "amount_btc"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_user_type_date", table_name="transactions")
+    op.drop_index("ix_transactions_root_category_id", table_name="transactions")
+    op.drop_column("transactions", "root_category_id")
+    op.drop_column("transactions", "effective_type")
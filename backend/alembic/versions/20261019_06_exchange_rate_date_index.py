@@ -0,0 +1,28 @@
+"""index exchange rates by effective date for as-of lookups
+
+Revision ID: 20261019_06
+Revises: 20261019_05
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_06"
+down_revision: Union[str, None] = "20261019_05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_exchange_rates_effective_date_id",
+        "exchange_rates",
+        ["effective_date", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_exchange_rates_effective_date_id", table_name="exchange_rates")
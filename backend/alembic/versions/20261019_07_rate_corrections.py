@@ -0,0 +1,54 @@
+"""rate corrections and superseded exchange rates
+
+Revision ID: 20261019_07
+Revises: 20261019_06
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_07"
+down_revision: Union[str, None] = "20261019_06"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "exchange_rates",
+        sa.Column("superseded_by_id", sa.Integer(), sa.ForeignKey("exchange_rates.id"), nullable=True),
+    )
+    op.create_index("ix_transactions_exchange_rate_id", "transactions", ["exchange_rate_id"])
+    op.create_table(
+        "rate_corrections",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("exchange_rate_id", sa.Integer(), sa.ForeignKey("exchange_rates.id"), nullable=False),
+        sa.Column("replacement_rate_id", sa.Integer(), sa.ForeignKey("exchange_rates.id"), nullable=True),
+        sa.Column(
+            "requested_by_id",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("mode", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("report", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_rate_corrections_exchange_rate_id", "rate_corrections", ["exchange_rate_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rate_corrections_exchange_rate_id", table_name="rate_corrections")
+    op.drop_table("rate_corrections")
+    op.drop_index("ix_transactions_exchange_rate_id", table_name="transactions")
+    op.drop_column("exchange_rates", "superseded_by_id")
@@ -0,0 +1,71 @@
+"""move provider payloads to a compressed side table
+
+Revision ID: 20261019_08
+Revises: 20261019_07
+Create Date: 2026-10-19
+"""
+
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_08"
+down_revision: Union[str, None] = "20261019_07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    payloads = op.create_table(
+        "exchange_rate_payloads",
+        sa.Column(
+            "exchange_rate_id",
+            sa.Integer(),
+            sa.ForeignKey("exchange_rates.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("encoding", sa.String(length=10), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+    )
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, metadata_payload FROM exchange_rates "
+                "WHERE id > :last_id AND metadata_payload IS NOT NULL ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        op.bulk_insert(
+            payloads,
+            [
+                {"exchange_rate_id": row.id, "encoding": "zlib", "data": zlib.compress(row.metadata_payload.encode("utf-8"))}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.drop_column("exchange_rates", "metadata_payload")
+
+
+def downgrade() -> None:
+    op.add_column("exchange_rates", sa.Column("metadata_payload", sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT exchange_rate_id, data FROM exchange_rate_payloads")).all()
+    for row in rows:
+        bind.execute(
+            sa.text("UPDATE exchange_rates SET metadata_payload = :payload WHERE id = :id"),
+            {"payload": zlib.decompress(row.data).decode("utf-8"), "id": row.exchange_rate_id},
+        )
+
+    op.drop_table("exchange_rate_payloads")
@@ -0,0 +1,72 @@
+"""transaction fingerprints for duplicate detection
+
+Revision ID: 20261019_09
+Revises: 20261019_08
+Create Date: 2026-10-19
+"""
+
+import hashlib
+from datetime import timezone
+from decimal import Decimal
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_09"
+down_revision: Union[str, None] = "20261019_08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 2000
+
+
+# Frozen copy of app.services.fingerprint.transaction_fingerprint (version "1")
+def _fingerprint(row) -> str:
+    transaction_date = row.transaction_date
+    if transaction_date.tzinfo is not None:
+        transaction_date = transaction_date.astimezone(timezone.utc)
+    parts = (
+        "1",
+        str(row.account_id or ""),
+        transaction_date.date().isoformat(),
+        format(Decimal(row.amount_original).quantize(Decimal("0.00000001")), "f"),
+        row.currency_code.upper(),
+        " ".join((row.notes or "").casefold().split()),
+    )
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column("transactions", sa.Column("fingerprint", sa.String(length=64), nullable=True))
+    op.add_column(
+        "transactions",
+        sa.Column("is_possible_duplicate", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, account_id, transaction_date, amount_original, currency_code, notes "
+                "FROM transactions WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("UPDATE transactions SET fingerprint = :fingerprint WHERE id = :id"),
+            [{"id": row.id, "fingerprint": _fingerprint(row)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+    op.create_index("ix_transactions_user_fingerprint", "transactions", ["user_id", "fingerprint"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_user_fingerprint", table_name="transactions")
+    op.drop_column("transactions", "is_possible_duplicate")
+    op.drop_column("transactions", "fingerprint")
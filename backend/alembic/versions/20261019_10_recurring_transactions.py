@@ -0,0 +1,72 @@
+"""recurring transaction templates
+
+Revision ID: 20261019_10
+Revises: 20261019_09
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_10"
+down_revision: Union[str, None] = "20261019_09"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recurring_transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("account_id", sa.Integer(), sa.ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id", ondelete="SET NULL"), nullable=True),
+        sa.Column(
+            "subcategory_id", sa.Integer(), sa.ForeignKey("categories.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("currency_code", sa.String(length=3), nullable=False),
+        sa.Column("rate_type", sa.String(length=20), nullable=False),
+        sa.Column("amount_original", sa.Numeric(20, 8), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("rrule", sa.String(length=255), nullable=False),
+        sa.Column("start_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("next_run_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_run_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_recurring_transactions_user_id", "recurring_transactions", ["user_id"])
+    op.create_index(
+        "ix_recurring_transactions_due",
+        "recurring_transactions",
+        ["next_run_at"],
+        postgresql_where=sa.text("is_active"),
+    )
+
+    op.add_column(
+        "transactions",
+        sa.Column(
+            "recurring_id",
+            sa.Integer(),
+            sa.ForeignKey("recurring_transactions.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "uq_transactions_recurring_date",
+        "transactions",
+        ["recurring_id", "transaction_date"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_transactions_recurring_date", table_name="transactions")
+    op.drop_column("transactions", "recurring_id")
+    op.drop_index("ix_recurring_transactions_due", table_name="recurring_transactions")
+    op.drop_index("ix_recurring_transactions_user_id", table_name="recurring_transactions")
+    op.drop_table("recurring_transactions")
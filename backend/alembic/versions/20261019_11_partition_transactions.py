@@ -0,0 +1,105 @@
+"""partition transactions by month of transaction_date
+
+Revision ID: 20261019_11
+Revises: 20261019_10
+Create Date: 2026-10-19
+"""
+
+import re
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_11"
+down_revision: Union[str, None] = "20261019_10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same horizon the scheduler keeps ahead (PARTITION_MONTHS_AHEAD)
+MONTHS_AHEAD = 3
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(bind) -> None:
+    lowest, highest, today = bind.execute(
+        sa.text(
+            "SELECT MIN(transaction_date AT TIME ZONE 'UTC'), MAX(transaction_date AT TIME ZONE 'UTC'), "
+            "CURRENT_DATE FROM transactions_old"
+        )
+    ).one()
+    current = date(today.year, today.month, 1)
+    month = date(lowest.year, lowest.month, 1) if lowest else current
+    last = _add_months(max(date(highest.year, highest.month, 1) if highest else current, current), MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE transactions_p{month:%Y_%m} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+    # Catches dates outside the managed range (typos, very old imports)
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+
+
+def _rebuild(partitioned: bool) -> None:
+    # Swaps the table for a copy with the same columns, indexes, foreign keys and id sequence.
+    # Postgres cannot convert a table in place, and the primary key of a partitioned table
+    # must include the partition column, hence (id, transaction_date).
+    bind = op.get_bind()
+    op.execute("ALTER TABLE transactions RENAME TO transactions_old")
+    op.execute("ALTER TABLE transactions_old RENAME CONSTRAINT transactions_pkey TO transactions_old_pkey")
+    indexes = bind.execute(
+        sa.text(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE tablename = 'transactions_old' AND indexname <> 'transactions_old_pkey'"
+        )
+    ).all()
+    foreign_keys = bind.execute(
+        sa.text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'transactions_old'::regclass AND contype = 'f'"
+        )
+    ).all()
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('transactions_old', 'id')")).scalar_one()
+    for name, _ in indexes:
+        op.execute(f'DROP INDEX "{name}"')
+
+    if partitioned:
+        op.execute(
+            "CREATE TABLE transactions (LIKE transactions_old INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (transaction_date)"
+        )
+        op.execute("ALTER TABLE transactions ADD CONSTRAINT transactions_pkey PRIMARY KEY (id, transaction_date)")
+        _create_partitions(bind)
+    else:
+        op.execute("CREATE TABLE transactions (LIKE transactions_old INCLUDING DEFAULTS)")
+        op.execute("ALTER TABLE transactions ADD CONSTRAINT transactions_pkey PRIMARY KEY (id)")
+
+    op.execute("INSERT INTO transactions SELECT * FROM transactions_old")
+    # Indexes created on the parent cascade to every partition, present and future
+    for _, definition in indexes:
+        op.execute(re.sub(r" ON (\S+\.)?transactions_old ", " ON transactions ", definition))
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE transactions ADD CONSTRAINT "{name}" {definition}')
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY transactions.id")
+    op.execute("DROP TABLE transactions_old")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    _rebuild(partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # Partitions detached for archiving are left untouched
+    _rebuild(partitioned=False)
@@ -0,0 +1,24 @@
+"""index transactions on (user_id, transaction_date)
+
+Revision ID: 20261019_12
+Revises: 20261019_11
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_12"
+down_revision: Union[str, None] = "20261019_11"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_transactions_user_date", "transactions", ["user_id", "transaction_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_user_date", table_name="transactions")
@@ -0,0 +1,38 @@
+"""per-user change log for delta sync
+
+Revision ID: 20261019_14
+Revises: 20261019_13
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_14"
+down_revision: Union[str, None] = "20261019_13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("change_version", sa.Integer(), nullable=False, server_default="0"))
+    op.create_table(
+        "change_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=True),
+        sa.Column("operation", sa.String(length=10), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_change_log_user_version", "change_log", ["user_id", "version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_change_log_user_version", table_name="change_log")
+    op.drop_table("change_log")
+    op.drop_column("users", "change_version")
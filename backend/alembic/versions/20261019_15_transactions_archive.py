@@ -0,0 +1,53 @@
+"""cold archive table for old transactions
+
+Revision ID: 20261019_15
+Revises: 20261019_14
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_15"
+down_revision: Union[str, None] = "20261019_14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    amount = sa.Numeric(20, 8)
+    op.create_table(
+        "transactions_archive",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=True),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("subcategory_id", sa.Integer(), nullable=True),
+        sa.Column("exchange_rate_id", sa.Integer(), nullable=True),
+        sa.Column("recurring_id", sa.Integer(), nullable=True),
+        sa.Column("root_category_id", sa.Integer(), nullable=True),
+        sa.Column("effective_type", sa.String(length=20), nullable=False),
+        sa.Column("transaction_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("currency_code", sa.String(length=3), nullable=False),
+        sa.Column("rate_type", sa.String(length=20), nullable=False),
+        sa.Column("amount_original", amount, nullable=False),
+        sa.Column("amount_ars", amount, nullable=False),
+        sa.Column("amount_usd", amount, nullable=False),
+        sa.Column("amount_btc", amount, nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("fingerprint", sa.String(length=64), nullable=True),
+        sa.Column("is_possible_duplicate", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_transactions_archive_user_date", "transactions_archive", ["user_id", "transaction_date"])
+    op.create_index("ix_transactions_archive_user_fingerprint", "transactions_archive", ["user_id", "fingerprint"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_archive_user_fingerprint", table_name="transactions_archive")
+    op.drop_index("ix_transactions_archive_user_date", table_name="transactions_archive")
+    op.drop_table("transactions_archive")
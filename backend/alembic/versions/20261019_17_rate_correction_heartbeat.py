@@ -0,0 +1,25 @@
+"""heartbeat for rate correction jobs
+
+Revision ID: 20261019_17
+Revises: 20261019_16
+Create Date: 2026-10-19
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20261019_17"
+down_revision: Union[str, None] = "20261019_16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("rate_corrections", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("rate_corrections", "heartbeat_at")
@@ -5,11 +5,12 @@ from fastapi import Cookie, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.security import verify_password
+from app.core.security import password_hasher
 from app.crud import crud_user
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserLogin
+from app.utils.profiling import current_profiler
 
 
 def _decode_token(token: str) -> str:
@@ -43,13 +44,28 @@ def get_current_user(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Usuario inactivo")
+    profiler = current_profiler()
+    if profiler is not None:
+        profiler.note_user(user.id, user.is_superuser)
     return user
 
 
+def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Se requieren permisos de administrador")
+    return current_user
+
+
 def authenticate_user(db: Session, login: UserLogin) -> User:
     user = crud_user.get_by_email(db, login.email.lower())
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
-    if not verify_password(login.password, user.hashed_password):
+    verified, new_hash = password_hasher.verify_and_update(login.password, user.hashed_password)
+    if not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
+    if new_hash:
+        # Stored hash predates the current cost settings; upgrade it transparently
+        user.hashed_password = new_hash
+        db.add(user)
+        db.commit()
     return user
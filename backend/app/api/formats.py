@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Sequence
+
+from fastapi import Request, Response
+
+try:  # pragma: no cover - optional dependency
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - optional dependency (requirements-analytics.txt)
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None  # type: ignore[assignment]
+
+# Compact alternatives to JSON for bulk endpoints, picked through the Accept header. Both
+# are column-oriented: field names are sent once and values come straight from result rows.
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+BINARY_CONTENT = {MSGPACK: {}, ARROW_STREAM: {}}
+
+_QUANTUM = Decimal("1e-8")
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    # "int", "decimal", "datetime", "string" or "bool"
+    kind: str
+
+
+def _available() -> dict[str, bool]:
+    return {MSGPACK: msgpack is not None, ARROW_STREAM: pa is not None}
+
+
+def negotiate(request: Request) -> str | None:
+    # Highest-q binary type the client accepts and we can encode; None means JSON
+    ranked: list[tuple[float, int, str]] = []
+    for position, part in enumerate(request.headers.get("accept", "").split(",")):
+        media_type, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranked.append((-quality, position, media_type.strip().lower()))
+
+    available = _available()
+    for negative_quality, _, media_type in sorted(ranked):
+        if negative_quality == 0:
+            break
+        if available.get(media_type):
+            return media_type
+        if media_type in {"application/json", "*/*", "application/*"}:
+            return None
+    return None
+
+
+def _utc(value: datetime | None) -> datetime | None:
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def _msgpack_values(column: Column, values: Sequence[Any]) -> list:
+    if column.kind == "decimal":
+        # Same string form as the JSON responses, so amounts stay exact
+        return [None if value is None else str(value) for value in values]
+    if column.kind == "datetime":
+        return [_utc(value) for value in values]
+    return list(values)
+
+
+def _arrow_array(column: Column, values: Sequence[Any]):
+    if column.kind == "decimal":
+        return pa.array(
+            [None if value is None else Decimal(value).quantize(_QUANTUM) for value in values],
+            type=pa.decimal128(38, 8),
+        )
+    if column.kind == "datetime":
+        return pa.array([_utc(value) for value in values], type=pa.timestamp("us", tz="UTC"))
+    types = {"int": pa.int64(), "string": pa.string(), "bool": pa.bool_()}
+    return pa.array(list(values), type=types[column.kind])
+
+
+def columnar_response(
+    media_type: str,
+    columns: Sequence[Column],
+    rows: Sequence[Sequence[Any]],
+    metadata: dict[str, str | None] | None = None,
+) -> Response:
+    metadata = {key: value for key, value in (metadata or {}).items() if value is not None}
+    values = list(zip(*rows)) if rows else [() for _ in columns]
+
+    if media_type == MSGPACK:
+        payload = {
+            **metadata,
+            "columns": {column.name: _msgpack_values(column, data) for column, data in zip(columns, values)},
+        }
+        body = msgpack.packb(payload, datetime=True)
+    else:
+        table = pa.Table.from_arrays(
+            [_arrow_array(column, data) for column, data in zip(columns, values)],
+            names=[column.name for column in columns],
+        ).replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        body = sink.getvalue().to_pybytes()
+
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
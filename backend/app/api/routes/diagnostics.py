@@ -0,0 +1,115 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.crud import crud_request_profile
+from app.db.session import get_db, get_read_db
+from app.models.request_profile import RequestProfile
+from app.models.user import User
+from app.schemas.query_plan import QueryPlanOut
+from app.schemas.request_profile import (
+    ProfilingTargetCreate,
+    ProfilingTargetOut,
+    RequestProfileOut,
+    RequestProfileSummary,
+)
+from app.services import profiling, query_plans
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/query-plans", response_model=List[QueryPlanOut])
+def get_query_plans(
+    name: str | None = Query(default=None),
+    user_id: int | None = Query(default=None),
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_read_db),
+) -> List[QueryPlanOut]:
+    # Plans for the hot queries as run for ``user_id`` (the admin by default), on the same
+    # database the reports read from
+    target = user_id or current_user.id
+    try:
+        if name is None:
+            reports = query_plans.explain_hot_queries(db, target)
+        else:
+            reports = [query_plans.explain_hot_query(db, name, target)]
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    return [QueryPlanOut.model_validate(report) for report in reports]
+
+
+@router.get("/profiling/targets", response_model=List[ProfilingTargetOut])
+def list_profiling_targets(
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_db),
+) -> List[ProfilingTargetOut]:
+    return [ProfilingTargetOut.model_validate(target) for target in crud_request_profile.list_targets(db)]
+
+
+@router.post("/profiling/targets", response_model=ProfilingTargetOut, status_code=status.HTTP_201_CREATED)
+def arm_profiling_target(
+    target_in: ProfilingTargetCreate,
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_db),
+) -> ProfilingTargetOut:
+    # Profiles the user's next ``requests`` requests, as they happen, for up to ``minutes``
+    try:
+        target = crud_request_profile.arm_target(
+            db, target_in.user_id, target_in.requests, target_in.minutes, created_by_id=current_user.id
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    profiling.armed_targets.invalidate()
+    return ProfilingTargetOut.model_validate(target)
+
+
+@router.delete("/profiling/targets/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def disarm_profiling_target(
+    user_id: int,
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_db),
+) -> None:
+    if not crud_request_profile.disarm_target(db, user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El usuario no tiene perfilado activo")
+    profiling.armed_targets.invalidate()
+
+
+@router.get("/profiles", response_model=List[RequestProfileSummary])
+def list_profiles(
+    user_id: int | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_db),
+) -> List[RequestProfileSummary]:
+    profiles = crud_request_profile.list_profiles(db, user_id=user_id, limit=limit)
+    return [RequestProfileSummary.model_validate(profile) for profile in profiles]
+
+
+def _get_profile(db: Session, profile_id: int) -> RequestProfile:
+    profile = crud_request_profile.get_profile(db, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil no encontrado")
+    return profile
+
+
+@router.get("/profiles/{profile_id}", response_model=RequestProfileOut)
+def get_profile(
+    profile_id: int,
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_db),
+) -> RequestProfileOut:
+    profile = _get_profile(db, profile_id)
+    summary = RequestProfileSummary.model_validate(profile).model_dump()
+    return RequestProfileOut(**summary, **profiling.decode_profile(profile))
+
+
+@router.get("/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+def get_profile_collapsed(
+    profile_id: int,
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_db),
+) -> str:
+    return profiling.collapsed_stacks(_get_profile(db, profile_id))
@@ -0,0 +1,49 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.user import User
+from app.services import events
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# EventSource reconnect delay suggested to browsers
+RETRY_MS = 5000
+
+
+async def event_stream(request: Request, subscription: events.Subscription) -> AsyncIterator[str]:
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while not await request.is_disconnected():
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), timeout=settings.events_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                # Comment line; keeps proxies from closing an idle stream
+                yield ": ping\n\n"
+                continue
+            yield events.format_sse(item)
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+@router.get("/", response_class=StreamingResponse)
+async def stream_events(
+    request: Request,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    user_id = current_user.id
+    # The stream stays open for as long as the tab does; don't hold the auth lookup's connection
+    db.close()
+    subscription = events.broker.subscribe(user_id)
+    return StreamingResponse(
+        event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,30 +1,73 @@
+import json
 from datetime import date
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.crud import crud_exchange_rate
+from app.crud import crud_exchange_rate, crud_rate_correction
 from app.db.session import get_db
 from app.models.user import User
+from app.models.exchange_rate import ExchangeRate
 from app.schemas.exchange_rate import (
+    ExchangeRateBackfillResult,
+    ExchangeRateCorrectionRequest,
     ExchangeRateCreate,
+    ExchangeRateGapsResponse,
+    ExchangeRateLatestOut,
     ExchangeRateOut,
     ExchangeRateReprocessRequest,
     ExchangeRateReprocessResult,
+    RateCorrectionOut,
 )
-from app.services.exchange_rates import ensure_daily_exchange_rate, reprocess_user_transactions
+from app.services import exchange_rates, rate_corrections
+from app.services.exchange_rates import reprocess_user_transactions
+from app.services.rate_history import CsvRateProvider, backfill_rates, find_missing_dates
 
 router = APIRouter(prefix="/exchange-rates", tags=["exchange_rates"])
 
 
-@router.get("/latest", response_model=ExchangeRateOut)
+def _rate_source(rate: ExchangeRate) -> str:
+    if rate.is_manual:
+        return "manual"
+    if rate.source is not None:
+        return rate.source.name
+    return "remote"
+
+
+@router.get("/latest", response_model=ExchangeRateLatestOut)
 def latest_rate(
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db),
-) -> ExchangeRateOut:
-    rate = ensure_daily_exchange_rate(db)
-    return ExchangeRateOut.model_validate(rate)
+) -> ExchangeRateLatestOut:
+    rate, refreshing = exchange_rates.get_freshest_rate(db)
+    if rate is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Todavía no hay cotizaciones disponibles",
+            headers={"Retry-After": "5"},
+        )
+    base = ExchangeRateOut.model_validate(rate)
+    return ExchangeRateLatestOut(
+        **base.model_dump(),
+        source=_rate_source(rate),
+        age_seconds=exchange_rates.rate_age_seconds(rate),
+        is_stale=exchange_rates.is_stale(rate),
+        refreshing=refreshing or exchange_rates.is_refreshing(),
+    )
+
+
+@router.get("/{rate_id}/metadata", response_model=dict[str, Any])
+def rate_metadata(
+    rate_id: int,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> dict[str, Any]:
+    payload = crud_exchange_rate.get_metadata_payload(db, rate_id)
+    if payload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="La cotización no tiene datos del proveedor")
+    return json.loads(payload)
 
 
 @router.post("/override", response_model=ExchangeRateOut, status_code=status.HTTP_201_CREATED)
@@ -58,3 +101,75 @@ def reprocess_transactions(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
     return ExchangeRateReprocessResult(processed=processed, updated=updated, skipped=skipped)
+
+
+@router.get("/gaps", response_model=ExchangeRateGapsResponse)
+def rate_gaps(
+    start: date = Query(...),
+    end: date = Query(...),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> ExchangeRateGapsResponse:
+    try:
+        missing = find_missing_dates(db, start, end)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return ExchangeRateGapsResponse(start=start, end=end, missing=missing)
+
+
+@router.post("/backfill", response_model=ExchangeRateBackfillResult)
+def backfill_history(
+    file: UploadFile = File(...),
+    start: date = Form(...),
+    end: date = Form(...),
+    fill_forward: bool = Form(default=False),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> ExchangeRateBackfillResult:
+    try:
+        content = file.file.read().decode("utf-8-sig")
+        provider = CsvRateProvider(content, name=f"CSV import ({file.filename or 'upload'})"[:100])
+        inserted, skipped = backfill_rates(db, provider, start, end, fill_forward=fill_forward)
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return ExchangeRateBackfillResult(
+        inserted=inserted,
+        skipped=skipped,
+        missing=find_missing_dates(db, start, end),
+    )
+
+
+@router.post(
+    "/{rate_id}/corrections",
+    response_model=RateCorrectionOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def correct_rate(
+    rate_id: int,
+    correction: ExchangeRateCorrectionRequest,
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_db),
+) -> RateCorrectionOut:
+    rate = crud_exchange_rate.get_exchange_rate(db, rate_id)
+    if rate is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cotización no encontrada")
+    try:
+        job = rate_corrections.create_correction(db, rate, correction, requested_by_id=current_user.id)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    # Transactions of every user are recomputed in the background; poll the job for progress
+    rate_corrections.submit_correction(job.id)
+    return RateCorrectionOut.model_validate(job)
+
+
+@router.get("/corrections/{correction_id}", response_model=RateCorrectionOut)
+def get_rate_correction(
+    correction_id: int,
+    current_user: User = Depends(deps.get_current_superuser),
+    db: Session = Depends(get_db),
+) -> RateCorrectionOut:
+    job = crud_rate_correction.get_correction(db, correction_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Corrección no encontrada")
+    return RateCorrectionOut.model_validate(job)
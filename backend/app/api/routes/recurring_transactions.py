@@ -0,0 +1,67 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.crud import crud_recurring_transaction
+from app.db.session import get_db
+from app.models.user import User
+from app.schemas.recurring_transaction import (
+    RecurringTransactionCreate,
+    RecurringTransactionOut,
+    RecurringTransactionUpdate,
+)
+
+router = APIRouter(prefix="/recurring-transactions", tags=["recurring_transactions"])
+
+
+@router.get("/", response_model=List[RecurringTransactionOut])
+def list_recurring_transactions(
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> List[RecurringTransactionOut]:
+    items = crud_recurring_transaction.list_recurring(db, current_user.id)
+    return [RecurringTransactionOut.model_validate(item) for item in items]
+
+
+@router.post("/", response_model=RecurringTransactionOut, status_code=status.HTTP_201_CREATED)
+def create_recurring_transaction(
+    recurring_in: RecurringTransactionCreate,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> RecurringTransactionOut:
+    try:
+        recurring = crud_recurring_transaction.create_recurring(db, current_user.id, recurring_in)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return RecurringTransactionOut.model_validate(recurring)
+
+
+@router.patch("/{recurring_id}", response_model=RecurringTransactionOut)
+def update_recurring_transaction(
+    recurring_id: int,
+    recurring_in: RecurringTransactionUpdate,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> RecurringTransactionOut:
+    recurring = crud_recurring_transaction.get_recurring(db, current_user.id, recurring_id)
+    if not recurring:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movimiento recurrente no encontrado")
+    try:
+        updated = crud_recurring_transaction.update_recurring(db, recurring, recurring_in)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return RecurringTransactionOut.model_validate(updated)
+
+
+@router.delete("/{recurring_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_recurring_transaction(
+    recurring_id: int,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> None:
+    recurring = crud_recurring_transaction.get_recurring(db, current_user.id, recurring_id)
+    if not recurring:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movimiento recurrente no encontrado")
+    crud_recurring_transaction.delete_recurring(db, recurring)
@@ -1,11 +1,12 @@
 from datetime import datetime
-from typing import List
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.db.session import get_db
+from app.api.formats import BINARY_CONTENT, Column, columnar_response, negotiate
+from app.db.session import get_read_db
 from app.models.category import CategoryType
 from app.models.user import User
 from app.schemas.report import (
@@ -13,10 +14,18 @@ from app.schemas.report import (
     ReportSummaryResponse,
     ReportTimeseriesResponse,
 )
-from app.services.reporting import ReportFilters, build_category_report, build_summary, build_timeseries
+from app.services.reporting import (
+    ReportFilters,
+    build_category_report,
+    build_summary,
+    build_timeseries,
+    timeseries_rows,
+)
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+TIMESERIES_COLUMNS = (Column("period", "string"), Column("income", "decimal"), Column("expense", "decimal"))
+
 
 def _parse_currency(value: str) -> str:
     currency = value.upper()
@@ -33,8 +42,9 @@ def get_summary_report(
     account_ids: List[int] | None = Query(default=None),
     category_ids: List[int] | None = Query(default=None),
     compare_previous: bool = Query(default=True),
+    rate_type: Literal["official", "blue"] | None = Query(default=None),
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> ReportSummaryResponse:
     currency = _parse_currency(currency)
     filters = ReportFilters(
@@ -57,19 +67,28 @@ def get_summary_report(
             category_ids=category_ids,
         )
 
-    return build_summary(db, currency=currency, filters=filters, previous_filters=previous_filters)
+    return build_summary(
+        db,
+        currency=currency,
+        filters=filters,
+        previous_filters=previous_filters,
+        rate_type=rate_type,
+    )
 
 
-@router.get("/timeseries", response_model=ReportTimeseriesResponse)
+@router.get("/timeseries", response_model=ReportTimeseriesResponse, responses={200: {"content": BINARY_CONTENT}})
 def get_timeseries_report(
+    request: Request,
+    response: Response,
     start: datetime | None = Query(default=None),
     end: datetime | None = Query(default=None),
     currency: str = Query(default="ARS"),
     interval: str = Query(default="month"),
+    rate_type: Literal["official", "blue"] | None = Query(default=None),
     account_ids: List[int] | None = Query(default=None),
     category_ids: List[int] | None = Query(default=None),
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> ReportTimeseriesResponse:
     currency = _parse_currency(currency)
     filters = ReportFilters(
@@ -79,7 +98,17 @@ def get_timeseries_report(
         account_ids=account_ids,
         category_ids=category_ids,
     )
-    return build_timeseries(db, currency=currency, filters=filters, interval=interval)
+    media_type = negotiate(request)
+    if media_type is None:
+        response.headers["Vary"] = "Accept"
+        return build_timeseries(db, currency=currency, filters=filters, interval=interval, rate_type=rate_type)
+    rows = timeseries_rows(db, currency=currency, filters=filters, interval=interval, rate_type=rate_type)
+    return columnar_response(
+        media_type,
+        TIMESERIES_COLUMNS,
+        rows,
+        {"currency": currency, "interval": interval, "rate_type": rate_type},
+    )
 
 
 @router.get("/categories", response_model=ReportCategoryResponse)
@@ -88,10 +117,11 @@ def get_category_report(
     end: datetime | None = Query(default=None),
     currency: str = Query(default="ARS"),
     type: CategoryType | None = Query(default=None),
+    rate_type: Literal["official", "blue"] | None = Query(default=None),
     account_ids: List[int] | None = Query(default=None),
     category_ids: List[int] | None = Query(default=None),
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ) -> ReportCategoryResponse:
     currency = _parse_currency(currency)
     filters = ReportFilters(
@@ -101,4 +131,10 @@ def get_category_report(
         account_ids=account_ids,
         category_ids=category_ids,
     )
-    return build_category_report(db, currency=currency, filters=filters, category_type=type)
+    return build_category_report(
+        db,
+        currency=currency,
+        filters=filters,
+        category_type=type,
+        rate_type=rate_type,
+    )
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.db.session import get_read_db
+from app.models.user import User
+from app.schemas.sync import SyncResponse
+from app.services import changelog
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("/", response_model=SyncResponse)
+def sync_changes(
+    # Omitted on the first sync; afterwards the ``version`` of the previous response
+    since: int | None = Query(default=None, ge=0),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_read_db),
+) -> SyncResponse:
+    result = changelog.changes_since(db, current_user.id, since)
+    changes = result.changes
+    return SyncResponse.model_validate(
+        {
+            "version": result.version,
+            "has_more": result.has_more,
+            "accounts": changes[changelog.ACCOUNT],
+            "categories": changes[changelog.CATEGORY],
+            "transactions": changes[changelog.TRANSACTION],
+            "budgets": changes[changelog.BUDGET],
+        }
+    )
@@ -1,21 +1,52 @@
 from datetime import datetime
-from typing import List
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.formats import BINARY_CONTENT, Column, columnar_response, negotiate
 from app.crud import crud_account, crud_category, crud_transaction
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.category import Category, CategoryType
+from app.models.exchange_rate import ExchangeRate
 from app.models.transaction import Transaction
 from app.models.user import User
-from app.schemas.exchange_rate import ExchangeRateOverride
-from app.schemas.transaction import TransactionCreate, TransactionOut, TransactionUpdate
+from app.schemas.exchange_rate import ExchangeRateOverride, ExchangeRateValues
+from app.schemas.transaction import (
+    TransactionBulkResult,
+    TransactionBulkUpdate,
+    TransactionCreate,
+    TransactionImport,
+    TransactionImportResult,
+    TransactionOut,
+    TransactionSelection,
+    TransactionUpdate,
+)
 from app.services import exchange_rates
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
+# Same order as crud_transaction.LIST_ROW_COLUMNS
+LIST_COLUMNS = (
+    Column("id", "int"),
+    Column("transaction_date", "datetime"),
+    Column("account_id", "int"),
+    Column("category_id", "int"),
+    Column("subcategory_id", "int"),
+    Column("currency_code", "string"),
+    Column("rate_type", "string"),
+    Column("amount_original", "decimal"),
+    Column("amount_ars", "decimal"),
+    Column("amount_usd", "decimal"),
+    Column("amount_btc", "decimal"),
+    Column("exchange_rate_id", "int"),
+    Column("notes", "string"),
+    Column("is_possible_duplicate", "bool"),
+    Column("created_at", "datetime"),
+    Column("updated_at", "datetime"),
+)
+
 
 def _validate_category(
     db: Session,
@@ -49,10 +80,31 @@ def _validate_category(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La subcategoría no tiene categoría padre válida")
 
 
-@router.get("/", response_model=List[TransactionOut])
+def _pick_rates(
+    db: Session,
+    exchange_rate_id: int | None,
+    manual_rates: ExchangeRateOverride | None,
+) -> tuple[ExchangeRate | None, ExchangeRateValues]:
+    try:
+        return exchange_rates.pick_rates(
+            db_session=db,
+            exchange_rate_id=exchange_rate_id,
+            manual_rates=manual_rates,
+        )
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Todavía no hay cotizaciones disponibles",
+            headers={"Retry-After": "5"},
+        ) from exc
+
+
+@router.get("/", response_model=List[TransactionOut], responses={200: {"content": BINARY_CONTENT}})
 def list_transactions(
+    request: Request,
+    response: Response,
     current_user: User = Depends(deps.get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start: datetime | None = Query(default=None),
     end: datetime | None = Query(default=None),
     category_ids: List[int] | None = Query(default=None),
@@ -63,27 +115,32 @@ def list_transactions(
     limit: int = Query(default=100, le=500),
     offset: int = Query(default=0, ge=0),
 ) -> List[TransactionOut]:
-    normalized_currency = currency_code.upper() if currency_code else None
-    normalized_search = search.strip() if search else None
-    items = crud_transaction.list_transactions(
-        db,
+    filters = dict(
         user_id=current_user.id,
         start=start,
         end=end,
         category_ids=category_ids,
         account_ids=account_ids,
-        currency_code=normalized_currency,
+        currency_code=currency_code.upper() if currency_code else None,
         category_type=category_type.value if category_type else None,
-        search=normalized_search,
+        search=search.strip() if search else None,
         limit=limit,
         offset=offset,
     )
+    media_type = negotiate(request)
+    if media_type is not None:
+        # Flat rows straight from the query: no ORM objects, no nested exchange rate
+        return columnar_response(media_type, LIST_COLUMNS, crud_transaction.list_transaction_rows(db, **filters))
+
+    response.headers["Vary"] = "Accept"
+    items = crud_transaction.list_transactions(db, **filters)
     return [TransactionOut.model_validate(item) for item in items]
 
 
 @router.post("/", response_model=TransactionOut, status_code=status.HTTP_201_CREATED)
 def create_transaction(
     tx_in: TransactionCreate,
+    on_duplicate: Literal["allow", "flag", "reject"] = Query(default="flag"),
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db),
 ) -> TransactionOut:
@@ -93,8 +150,16 @@ def create_transaction(
 
     _validate_category(db, current_user.id, tx_in.category_id, tx_in.subcategory_id)
 
-    exchange_rate_obj, rate_values = exchange_rates.pick_rates(
-        db_session=db,
+    is_duplicate = on_duplicate != "allow" and bool(
+        crud_transaction.find_existing_fingerprints(
+            db, current_user.id, [crud_transaction.fingerprint_for(tx_in)], earliest=tx_in.transaction_date
+        )
+    )
+    if is_duplicate and on_duplicate == "reject":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya existe un movimiento igual")
+
+    exchange_rate_obj, rate_values = _pick_rates(
+        db,
         exchange_rate_id=tx_in.exchange_rate_id,
         manual_rates=tx_in.manual_rates,
     )
@@ -106,12 +171,122 @@ def create_transaction(
         tx_in=tx_in,
         rates=rate_values,
         exchange_rate_id=exchange_rate_id,
+        is_possible_duplicate=is_duplicate,
     )
     if tx_in.manual_rates:
         transaction.exchange_rate = exchange_rate_obj
     return TransactionOut.model_validate(transaction)
 
 
+@router.post("/import", response_model=TransactionImportResult, status_code=status.HTTP_201_CREATED)
+def import_transactions(
+    import_in: TransactionImport,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> TransactionImportResult:
+    account_ids = {account.id for account in crud_account.list_accounts(db, current_user.id)}
+    validated_categories: set[tuple[int | None, int | None]] = set()
+    stored_rates: dict[int | None, tuple[ExchangeRate | None, ExchangeRateValues]] = {}
+
+    fingerprints = [crud_transaction.fingerprint_for(item) for item in import_in.items]
+    earliest = min((item.transaction_date for item in import_in.items), default=None)
+    seen = crud_transaction.find_existing_fingerprints(db, current_user.id, fingerprints, earliest=earliest)
+
+    rows: list[tuple[TransactionCreate, ExchangeRateValues, int | None, bool]] = []
+    skipped = 0
+    flagged = 0
+    for index, (item, fingerprint) in enumerate(zip(import_in.items, fingerprints), start=1):
+        try:
+            if item.account_id not in account_ids:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cuenta no encontrada")
+            category_key = (item.category_id, item.subcategory_id)
+            if category_key not in validated_categories:
+                _validate_category(db, current_user.id, *category_key)
+                validated_categories.add(category_key)
+        except HTTPException as exc:
+            raise HTTPException(status_code=exc.status_code, detail=f"Movimiento {index}: {exc.detail}") from exc
+
+        is_duplicate = fingerprint in seen
+        if is_duplicate and import_in.on_duplicate == "skip":
+            skipped += 1
+            continue
+        flagged += int(is_duplicate)
+        # Later rows in the same file are checked against earlier ones too
+        seen.add(fingerprint)
+
+        if item.manual_rates is not None:
+            exchange_rate_obj, rate_values = None, item.manual_rates
+        else:
+            if item.exchange_rate_id not in stored_rates:
+                stored_rates[item.exchange_rate_id] = _pick_rates(db, item.exchange_rate_id, None)
+            exchange_rate_obj, rate_values = stored_rates[item.exchange_rate_id]
+        rows.append((item, rate_values, exchange_rate_obj.id if exchange_rate_obj else None, is_duplicate))
+
+    ids = crud_transaction.create_transactions(db, current_user.id, rows) if rows else []
+    return TransactionImportResult(created=len(ids), skipped=skipped, flagged=flagged, ids=ids)
+
+
+@router.post("/bulk/update", response_model=TransactionBulkResult)
+def bulk_update_transactions(
+    bulk_in: TransactionBulkUpdate,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> TransactionBulkResult:
+    changes = bulk_in.changes
+    fields = changes.model_fields_set
+    values: dict = {}
+
+    if "account_id" in fields:
+        if changes.account_id is None or not crud_account.get_account(db, current_user.id, changes.account_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cuenta no encontrada")
+        values["account_id"] = changes.account_id
+
+    if "notes" in fields:
+        values["notes"] = changes.notes
+
+    if "category_id" in fields or "subcategory_id" in fields:
+        # Changing the category without a subcategory clears the old subcategory
+        category_id = changes.category_id
+        subcategory_id = changes.subcategory_id
+        _validate_category(db, current_user.id, category_id, subcategory_id)
+        if category_id is None and subcategory_id is not None:
+            category_id = crud_category.get_category(db, current_user.id, subcategory_id).parent_id
+        values.update(crud_transaction.category_values(db, category_id, subcategory_id))
+
+    affected = crud_transaction.bulk_update_transactions(
+        db,
+        user_id=current_user.id,
+        values=values,
+        ids=bulk_in.ids,
+        filters=bulk_in.filters,
+    )
+    return TransactionBulkResult(affected=affected)
+
+
+@router.post("/bulk/delete", response_model=TransactionBulkResult)
+def bulk_delete_transactions(
+    selection: TransactionSelection,
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(get_db),
+) -> TransactionBulkResult:
+    affected = crud_transaction.bulk_delete_transactions(
+        db,
+        user_id=current_user.id,
+        ids=selection.ids,
+        filters=selection.filters,
+    )
+    return TransactionBulkResult(affected=affected)
+
+
+def _live_transaction(db: Session, user_id: int, transaction_id: int):
+    transaction = crud_transaction.get_transaction(db, user_id, transaction_id)
+    if transaction:
+        return transaction
+    if crud_transaction.get_archived_transaction(db, user_id, transaction_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="El movimiento está archivado")
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movimiento no encontrado")
+
+
 @router.get("/{transaction_id}", response_model=TransactionOut)
 def get_transaction(
     transaction_id: int,
@@ -119,6 +294,8 @@ def get_transaction(
     db: Session = Depends(get_db),
 ) -> TransactionOut:
     transaction = crud_transaction.get_transaction(db, current_user.id, transaction_id)
+    if not transaction:
+        transaction = crud_transaction.get_archived_transaction(db, current_user.id, transaction_id)
     if not transaction:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movimiento no encontrado")
     return TransactionOut.model_validate(transaction)
@@ -131,9 +308,7 @@ def update_transaction(
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db),
 ) -> TransactionOut:
-    transaction = crud_transaction.get_transaction(db, current_user.id, transaction_id)
-    if not transaction:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movimiento no encontrado")
+    transaction = _live_transaction(db, current_user.id, transaction_id)
 
     if tx_in.account_id is not None:
         account = crud_account.get_account(db, current_user.id, tx_in.account_id)
@@ -158,8 +333,8 @@ def update_transaction(
             tx_in.rate_type is not None,
         ]
     ):
-        exchange_rate_obj, rate_values = exchange_rates.pick_rates(
-            db_session=db,
+        exchange_rate_obj, rate_values = _pick_rates(
+            db,
             exchange_rate_id=tx_in.exchange_rate_id or transaction.exchange_rate_id,
             manual_rates=tx_in.manual_rates,
         )
@@ -182,7 +357,5 @@ def delete_transaction(
     current_user: User = Depends(deps.get_current_user),
     db: Session = Depends(get_db),
 ) -> None:
-    transaction = crud_transaction.get_transaction(db, current_user.id, transaction_id)
-    if not transaction:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movimiento no encontrado")
+    transaction = _live_transaction(db, current_user.id, transaction_id)
     crud_transaction.delete_transaction(db, transaction)
@@ -8,6 +8,12 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     app_env: str = Field(default="development", alias="APP_ENV")
     database_url: str = Field(..., alias="DATABASE_URL")
+    # Optional read replicas for reports and listings; empty sends everything to the primary
+    database_replica_urls: List[str] = Field(default_factory=list, alias="DATABASE_REPLICA_URLS")
+    replica_check_seconds: float = Field(default=10.0, alias="REPLICA_CHECK_SECONDS")
+    replica_max_lag_seconds: float = Field(default=5.0, alias="REPLICA_MAX_LAG_SECONDS")
+    # After a write, the same client reads from the primary for this long
+    read_your_writes_seconds: int = Field(default=5, alias="READ_YOUR_WRITES_SECONDS")
     jwt_secret: str = Field(..., alias="JWT_SECRET")
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
     access_token_expire_minutes: int = Field(default=60 * 24, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
@@ -17,15 +23,65 @@ class Settings(BaseSettings):
     scheduler_timezone: str = Field(default="UTC", alias="SCHEDULER_TIMEZONE")
     rate_refresh_hour: int = Field(default=3, alias="RATE_REFRESH_HOUR")
     rate_refresh_minute: int = Field(default=0, alias="RATE_REFRESH_MINUTE")
+    recurring_run_hour: int = Field(default=4, alias="RECURRING_RUN_HOUR")
+    recurring_run_minute: int = Field(default=0, alias="RECURRING_RUN_MINUTE")
+    # "embedded" runs the scheduler inside each API worker (one leader elected via lease),
+    # "standalone" leaves it to `python -m app.worker`, "disabled" turns it off
+    scheduler_mode: str = Field(default="embedded", alias="SCHEDULER_MODE")
+    scheduler_lease_seconds: int = Field(default=60, alias="SCHEDULER_LEASE_SECONDS")
+    # Monthly transaction partitions kept created ahead of the current month (Postgres only)
+    partition_months_ahead: int = Field(default=3, alias="PARTITION_MONTHS_AHEAD")
+    # Whole months kept in the live transactions table; older ones move to the archive
+    # table (services.archive). 0 disables archiving
+    archive_after_months: int = Field(default=0, alias="ARCHIVE_AFTER_MONTHS")
 
     dolar_api_url: HttpUrl = Field(default="https://dolarapi.com/v1/dolares", alias="DOLAR_API_URL")
     coingecko_api_url: HttpUrl = Field(
         default="https://api.coingecko.com/api/v3/simple/price", alias="COINGECKO_API_URL"
     )
+    dolar_api_timeout: float = Field(default=4.0, alias="DOLAR_API_TIMEOUT")
+    coingecko_api_timeout: float = Field(default=6.0, alias="COINGECKO_API_TIMEOUT")
+    rate_fetch_retries: int = Field(default=2, alias="RATE_FETCH_RETRIES")
+    rate_fetch_backoff: float = Field(default=0.5, alias="RATE_FETCH_BACKOFF")
+    rate_breaker_threshold: int = Field(default=3, alias="RATE_BREAKER_THRESHOLD")
+    rate_breaker_reset_seconds: float = Field(default=300.0, alias="RATE_BREAKER_RESET_SECONDS")
+    # "remote" hits the real APIs, "fixture" serves recorded responses for offline work
+    rate_provider_transport: str = Field(default="remote", alias="RATE_PROVIDER_TRANSPORT")
+    rate_correction_workers: int = Field(default=4, alias="RATE_CORRECTION_WORKERS")
+    rate_correction_batch_size: int = Field(default=2000, alias="RATE_CORRECTION_BATCH_SIZE")
+    # A pending or running correction without progress for this long is resumed by the scheduler
+    rate_correction_stale_minutes: int = Field(default=10, alias="RATE_CORRECTION_STALE_MINUTES")
+
+    # bcrypt cost; stored hashes with a different cost are re-hashed on the next login
+    password_hash_rounds: int = Field(default=12, alias="PASSWORD_HASH_ROUNDS")
+    # 0 hashes inline on the request thread (tests, single-core dev boxes)
+    password_hash_workers: int = Field(default=2, alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(default=16, alias="PASSWORD_HASH_MAX_PENDING")
+
+    # "sql" aggregates on the database, "columnar" serves large histories from per-user
+    # Parquet snapshots queried with DuckDB (needs requirements-analytics.txt)
+    report_engine: str = Field(default="sql", alias="REPORT_ENGINE")
+    analytics_dir: str = Field(default="./analytics", alias="ANALYTICS_DIR")
+    analytics_min_rows: int = Field(default=50000, alias="ANALYTICS_MIN_ROWS")
+
+    # On-demand request profiling (X-Profile header for admins, armed targets for users)
+    profile_interval_ms: float = Field(default=5.0, alias="PROFILE_INTERVAL_MS")
+    profile_max_concurrent: int = Field(default=2, alias="PROFILE_MAX_CONCURRENT")
+    profile_keep: int = Field(default=200, alias="PROFILE_KEEP")
+
+    # "local" fans dashboard events out within the process; "postgres" goes through
+    # LISTEN/NOTIFY so every worker (and the standalone scheduler) reaches every stream
+    events_backend: str = Field(default="local", alias="EVENTS_BACKEND")
+    events_heartbeat_seconds: float = Field(default=15.0, alias="EVENTS_HEARTBEAT_SECONDS")
+
+    # Stored responses for Idempotency-Key retries, and how long an unfinished first request
+    # keeps its key before a retry may run it again
+    idempotency_ttl_hours: int = Field(default=24, alias="IDEMPOTENCY_TTL_HOURS")
+    idempotency_lock_seconds: int = Field(default=60, alias="IDEMPOTENCY_LOCK_SECONDS")
 
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
 
-    @field_validator("cors_origins", mode="before")
+    @field_validator("cors_origins", "database_replica_urls", mode="before")
     @classmethod
     def parse_origins(cls, value: str | List[str]) -> List[str]:
         if isinstance(value, list):
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 
 from app.models.account import Account
 from app.schemas.account import AccountCreate, AccountUpdate
+from app.services import changelog
 
 
 def list_accounts(db: Session, user_id: int) -> list[Account]:
@@ -30,6 +31,8 @@ def create_account(db: Session, user_id: int, account_in: AccountCreate, is_defa
         is_default=is_default,
     )
     db.add(account)
+    db.flush()
+    changelog.record(db, user_id, changelog.ACCOUNT, changelog.UPSERT, [account.id])
     db.commit()
     db.refresh(account)
     return account
@@ -40,6 +43,7 @@ def update_account(db: Session, account: Account, account_in: AccountUpdate) ->
     for field, value in data.items():
         setattr(account, field, value)
     db.add(account)
+    changelog.record(db, account.user_id, changelog.ACCOUNT, changelog.UPSERT, [account.id])
     db.commit()
     db.refresh(account)
     return account
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.models.budget import Budget, BudgetItem
 from app.models.category import Category
 from app.schemas.budget import BudgetCreate, BudgetUpdate
+from app.services import changelog, events
 
 
 def _normalize_month(month_value: date) -> date:
@@ -95,6 +96,9 @@ def create_budget(db: Session, user_id: int, budget_in: BudgetCreate) -> Budget:
         )
 
     db.add(budget)
+    db.flush()
+    changelog.record(db, user_id, changelog.BUDGET, changelog.UPSERT, [budget.id])
+    events.emit(db, user_id, events.BUDGETS_CHANGED, ids=[budget.id])
     db.commit()
     db.refresh(budget)
     return budget
@@ -118,11 +122,15 @@ def update_budget(db: Session, budget: Budget, budget_in: BudgetUpdate, user_id:
             )
 
     db.add(budget)
+    changelog.record(db, user_id, changelog.BUDGET, changelog.UPSERT, [budget.id])
+    events.emit(db, user_id, events.BUDGETS_CHANGED, ids=[budget.id])
     db.commit()
     db.refresh(budget)
     return budget
 
 
 def delete_budget(db: Session, budget: Budget) -> None:
+    changelog.record(db, budget.user_id, changelog.BUDGET, changelog.DELETE, [budget.id])
+    events.emit(db, budget.user_id, events.BUDGETS_CHANGED, ids=[budget.id])
     db.delete(budget)
     db.commit()
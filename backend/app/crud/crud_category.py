@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
 
+from app.crud import crud_transaction
 from app.models.category import Category, CategoryType
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.services import changelog
 
 
 def list_categories(db: Session, user_id: int) -> list[Category]:
@@ -43,6 +45,8 @@ def create_category(
         is_default=is_default,
     )
     db.add(category)
+    db.flush()
+    changelog.record(db, user_id, changelog.CATEGORY, changelog.UPSERT, [category.id])
     db.commit()
     db.refresh(category)
     return category
@@ -63,6 +67,10 @@ def update_category(db: Session, category: Category, category_in: CategoryUpdate
                 value = str(value)
         setattr(category, field, value)
     db.add(category)
+    changelog.record(db, category.user_id, changelog.CATEGORY, changelog.UPSERT, [category.id])
+    if "type" in data or "parent_id" in data:
+        db.flush()
+        crud_transaction.refresh_category_fields(db, category.user_id, [category.id])
     db.commit()
     db.refresh(category)
     return category
@@ -3,8 +3,10 @@ from datetime import date
 from sqlalchemy import desc
 from sqlalchemy.orm import Session
 
-from app.models.exchange_rate import ExchangeRate
+from app.models.exchange_rate import ExchangeRate, ExchangeRatePayload
 from app.schemas.exchange_rate import ExchangeRateCreate
+from app.services import events
+from app.utils.compression import compress_text, decompress_text
 
 
 def get_exchange_rate(db: Session, rate_id: int) -> ExchangeRate | None:
@@ -12,18 +14,32 @@ def get_exchange_rate(db: Session, rate_id: int) -> ExchangeRate | None:
 
 
 def get_latest_rate(db: Session) -> ExchangeRate | None:
-    return db.query(ExchangeRate).order_by(desc(ExchangeRate.effective_date)).first()
+    return (
+        db.query(ExchangeRate)
+        .filter(ExchangeRate.superseded_by_id.is_(None))
+        .order_by(desc(ExchangeRate.effective_date))
+        .first()
+    )
 
 
 def get_rate_by_date(db: Session, effective_date: date) -> ExchangeRate | None:
     return (
         db.query(ExchangeRate)
-        .filter(ExchangeRate.effective_date == effective_date)
+        .filter(ExchangeRate.effective_date == effective_date, ExchangeRate.superseded_by_id.is_(None))
         .order_by(desc(ExchangeRate.created_at))
         .first()
     )
 
 
+def get_rate_as_of(db: Session, effective_date: date) -> ExchangeRate | None:
+    return (
+        db.query(ExchangeRate)
+        .filter(ExchangeRate.effective_date <= effective_date, ExchangeRate.superseded_by_id.is_(None))
+        .order_by(desc(ExchangeRate.effective_date), desc(ExchangeRate.id))
+        .first()
+    )
+
+
 def create_exchange_rate(db: Session, rate_in: ExchangeRateCreate) -> ExchangeRate:
     exchange_rate = ExchangeRate(
         effective_date=rate_in.effective_date,
@@ -33,9 +49,19 @@ def create_exchange_rate(db: Session, rate_in: ExchangeRateCreate) -> ExchangeRa
         btc_usd=rate_in.btc_usd,
         btc_ars=rate_in.btc_ars,
         is_manual=rate_in.is_manual,
-        metadata_payload=rate_in.metadata_payload,
     )
+    if rate_in.metadata_payload:
+        encoding, data = compress_text(rate_in.metadata_payload)
+        exchange_rate.payload = ExchangeRatePayload(encoding=encoding, data=data)
     db.add(exchange_rate)
+    events.emit(db, None, events.RATES_UPDATED, effective_date=rate_in.effective_date.isoformat())
     db.commit()
     db.refresh(exchange_rate)
     return exchange_rate
+
+
+def get_metadata_payload(db: Session, rate_id: int) -> str | None:
+    payload = db.get(ExchangeRatePayload, rate_id)
+    if payload is None:
+        return None
+    return decompress_text(payload.encoding, payload.data)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+
+
+def get_key(db: Session, subject: str, key: str) -> IdempotencyKey | None:
+    return db.execute(
+        select(IdempotencyKey).where(IdempotencyKey.subject == subject, IdempotencyKey.key == key)
+    ).scalar_one_or_none()
+
+
+def claim_key(
+    db: Session,
+    *,
+    subject: str,
+    key: str,
+    method: str,
+    path: str,
+    request_hash: str,
+    ttl: timedelta,
+    lock: timedelta,
+) -> tuple[IdempotencyKey | None, bool]:
+    # (record, True) when this request owns the key, otherwise the record that holds it;
+    # (None, False) if that record was released in between and the claim can be retried
+    now = datetime.now(tz=timezone.utc)
+    # An expired record, or a claim whose owner never finished, no longer blocks the key
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.subject == subject,
+            IdempotencyKey.key == key,
+            or_(
+                IdempotencyKey.expires_at <= now,
+                and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.locked_until <= now),
+            ),
+        )
+    )
+    record = IdempotencyKey(
+        subject=subject,
+        key=key,
+        method=method,
+        path=path,
+        request_hash=request_hash,
+        locked_until=now + lock,
+        expires_at=now + ttl,
+    )
+    db.add(record)
+    try:
+        # The unique constraint is the lock: on Postgres a concurrent duplicate blocks here
+        # until the first claim commits, then fails
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return get_key(db, subject, key), False
+    db.refresh(record)
+    return record, True
+
+
+def extend_key(db: Session, record_id: int, locked_until: datetime) -> bool:
+    # False once the claim is gone (completed, released or taken over by a retry)
+    result = db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == record_id, IdempotencyKey.status_code.is_(None))
+        .values(locked_until=locked_until)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+def complete_key(db: Session, record_id: int, status_code: int, content_type: str | None, body: bytes) -> bool:
+    # False when the claim was deleted before the response could be stored
+    result = db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.id == record_id)
+        .values(status_code=status_code, content_type=content_type, body=body)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+def release_key(db: Session, record_id: int) -> None:
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == record_id))
+    db.commit()
+
+
+def purge_expired(db: Session) -> int:
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(tz=timezone.utc)))
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.rate_correction import RateCorrection
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def get_correction(db: Session, correction_id: int) -> RateCorrection | None:
+    return db.get(RateCorrection, correction_id)
+
+
+def get_active_for_rate(db: Session, exchange_rate_id: int) -> RateCorrection | None:
+    return (
+        db.query(RateCorrection)
+        .filter(
+            RateCorrection.exchange_rate_id == exchange_rate_id,
+            RateCorrection.status.in_(ACTIVE_STATUSES),
+        )
+        .first()
+    )
+
+
+def _last_seen():
+    return func.coalesce(RateCorrection.heartbeat_at, RateCorrection.created_at)
+
+
+def claim_correction(db: Session, correction_id: int, stale_before: datetime | None = None) -> bool:
+    # Marks the job running for this worker. A pending job is claimed once; with
+    # ``stale_before`` an active job whose worker stopped beating before then is taken over
+    claimable = RateCorrection.status == "pending"
+    if stale_before is not None:
+        claimable = and_(RateCorrection.status.in_(ACTIVE_STATUSES), _last_seen() < stale_before)
+    result = db.execute(
+        update(RateCorrection)
+        .where(RateCorrection.id == correction_id, claimable)
+        .values(status="running", heartbeat_at=datetime.now(tz=timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+def stale_corrections(db: Session, stale_before: datetime) -> list[int]:
+    return list(
+        db.execute(
+            select(RateCorrection.id)
+            .where(RateCorrection.status.in_(ACTIVE_STATUSES), _last_seen() < stale_before)
+            .order_by(RateCorrection.id)
+        ).scalars()
+    )
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.models.account import Account
+from app.models.category import Category
+from app.models.recurring_transaction import RecurringTransaction
+from app.schemas.recurring_transaction import RecurringTransactionCreate, RecurringTransactionUpdate
+from app.services.recurring import first_occurrence
+
+
+def _validate_references(
+    db: Session,
+    user_id: int,
+    account_id: int | None,
+    category_id: int | None,
+    subcategory_id: int | None,
+) -> None:
+    if account_id is not None:
+        account = db.get(Account, account_id)
+        if account is None or account.user_id != user_id:
+            raise ValueError("Cuenta no encontrada")
+    category = db.get(Category, category_id) if category_id is not None else None
+    if category_id is not None and (category is None or category.user_id != user_id):
+        raise ValueError("Categoría no encontrada")
+    if subcategory_id is not None:
+        subcategory = db.get(Category, subcategory_id)
+        if subcategory is None or subcategory.user_id != user_id or subcategory.parent_id is None:
+            raise ValueError("Subcategoría no encontrada")
+        if category_id is not None and subcategory.parent_id != category_id:
+            raise ValueError("La subcategoría no pertenece a la categoría indicada")
+
+
+def list_recurring(db: Session, user_id: int) -> list[RecurringTransaction]:
+    return (
+        db.query(RecurringTransaction)
+        .filter(RecurringTransaction.user_id == user_id)
+        .order_by(RecurringTransaction.next_run_at.asc(), RecurringTransaction.id.asc())
+        .all()
+    )
+
+
+def get_recurring(db: Session, user_id: int, recurring_id: int) -> RecurringTransaction | None:
+    return (
+        db.query(RecurringTransaction)
+        .filter(RecurringTransaction.user_id == user_id, RecurringTransaction.id == recurring_id)
+        .first()
+    )
+
+
+def create_recurring(db: Session, user_id: int, recurring_in: RecurringTransactionCreate) -> RecurringTransaction:
+    _validate_references(
+        db, user_id, recurring_in.account_id, recurring_in.category_id, recurring_in.subcategory_id
+    )
+    recurring = RecurringTransaction(
+        user_id=user_id,
+        **recurring_in.model_dump(),
+        next_run_at=first_occurrence(recurring_in.rrule, recurring_in.start_at),
+    )
+    db.add(recurring)
+    db.commit()
+    db.refresh(recurring)
+    return recurring
+
+
+def update_recurring(
+    db: Session,
+    recurring: RecurringTransaction,
+    recurring_in: RecurringTransactionUpdate,
+) -> RecurringTransaction:
+    data = recurring_in.model_dump(exclude_unset=True)
+    _validate_references(
+        db,
+        recurring.user_id,
+        data.get("account_id", recurring.account_id),
+        data.get("category_id", recurring.category_id),
+        data.get("subcategory_id", recurring.subcategory_id),
+    )
+    for field, value in data.items():
+        setattr(recurring, field, value)
+
+    if {"rrule", "start_at", "is_active"} & data.keys():
+        # Never re-emit occurrences that were already materialized
+        not_before = datetime.now(tz=timezone.utc)
+        if recurring.last_run_at is not None:
+            last_run_at = recurring.last_run_at
+            if last_run_at.tzinfo is None:
+                last_run_at = last_run_at.replace(tzinfo=timezone.utc)
+            not_before = max(not_before, last_run_at)
+        recurring.next_run_at = first_occurrence(recurring.rrule, recurring.start_at, not_before)
+
+    db.add(recurring)
+    db.commit()
+    db.refresh(recurring)
+    return recurring
+
+
+def delete_recurring(db: Session, recurring: RecurringTransaction) -> None:
+    db.delete(recurring)
+    db.commit()
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.models.request_profile import ProfilingTarget, RequestProfile
+from app.models.user import User
+
+
+def create_profile(db: Session, profile: RequestProfile, keep: int) -> RequestProfile:
+    db.add(profile)
+    db.flush()
+    # Only the newest ``keep`` profiles are retained
+    cutoff = db.execute(
+        select(RequestProfile.id).order_by(RequestProfile.id.desc()).offset(keep).limit(1)
+    ).scalar()
+    if cutoff is not None:
+        db.execute(delete(RequestProfile).where(RequestProfile.id <= cutoff))
+    db.commit()
+    return profile
+
+
+def get_profile(db: Session, profile_id: int) -> RequestProfile | None:
+    return db.get(RequestProfile, profile_id)
+
+
+def list_profiles(db: Session, user_id: int | None = None, limit: int = 50) -> list[RequestProfile]:
+    query = db.query(RequestProfile)
+    if user_id is not None:
+        query = query.filter(RequestProfile.user_id == user_id)
+    return query.order_by(RequestProfile.id.desc()).limit(limit).all()
+
+
+def arm_target(db: Session, user_id: int, requests: int, minutes: int, created_by_id: int) -> ProfilingTarget:
+    if db.get(User, user_id) is None:
+        raise ValueError("Usuario no encontrado")
+    target = db.get(ProfilingTarget, user_id) or ProfilingTarget(user_id=user_id)
+    target.remaining = requests
+    target.expires_at = datetime.now(tz=timezone.utc) + timedelta(minutes=minutes)
+    target.created_by_id = created_by_id
+    db.add(target)
+    db.commit()
+    db.refresh(target)
+    return target
+
+
+def disarm_target(db: Session, user_id: int) -> bool:
+    result = db.execute(delete(ProfilingTarget).where(ProfilingTarget.user_id == user_id))
+    db.commit()
+    return bool(result.rowcount)
+
+
+def list_targets(db: Session) -> list[ProfilingTarget]:
+    return db.query(ProfilingTarget).order_by(ProfilingTarget.created_at.desc()).all()
+
+
+def active_targets(db: Session) -> dict[str, int]:
+    # Email -> user id, matching the ``sub`` of access tokens
+    rows = db.execute(
+        select(User.email, ProfilingTarget.user_id)
+        .join(User, User.id == ProfilingTarget.user_id)
+        .where(ProfilingTarget.remaining > 0, ProfilingTarget.expires_at > datetime.now(tz=timezone.utc))
+    ).all()
+    return {email: user_id for email, user_id in rows}
+
+
+def active_admins(db: Session) -> set[str]:
+    # Emails of active superusers, matching the ``sub`` of access tokens
+    return set(db.execute(select(User.email).where(User.is_superuser.is_(True), User.is_active.is_(True))).scalars())
+
+
+def consume_target(db: Session, user_id: int) -> bool:
+    # Conditional decrement, so concurrent requests across workers never overshoot
+    result = db.execute(
+        update(ProfilingTarget)
+        .where(ProfilingTarget.user_id == user_id, ProfilingTarget.remaining > 0)
+        .values(remaining=ProfilingTarget.remaining - 1)
+        .execution_options(synchronize_session=False)
+    )
+    return bool(result.rowcount)
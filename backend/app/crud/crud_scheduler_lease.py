@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.scheduler_lease import SchedulerLease
+
+
+def get_lease(db: Session, name: str) -> SchedulerLease | None:
+    return db.get(SchedulerLease, name)
+
+
+def try_acquire(db: Session, name: str, holder: str, ttl_seconds: int) -> bool:
+    now = datetime.now(tz=timezone.utc)
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    # Renew our own lease or take over an expired one in a single conditional UPDATE
+    result = db.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+        )
+        .values(holder=holder, expires_at=expires_at, renewed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        db.commit()
+        return True
+
+    if db.query(SchedulerLease.name).filter(SchedulerLease.name == name).first() is not None:
+        db.rollback()
+        return False
+
+    db.add(SchedulerLease(name=name, holder=holder, expires_at=expires_at, renewed_at=now))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def release(db: Session, name: str, holder: str) -> None:
+    db.query(SchedulerLease).filter(
+        SchedulerLease.name == name, SchedulerLease.holder == holder
+    ).delete(synchronize_session=False)
+    db.commit()
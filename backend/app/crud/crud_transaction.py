@@ -1,19 +1,105 @@
 from datetime import datetime
 from typing import Iterable
 
-from sqlalchemy import desc, or_
+from sqlalchemy import String, cast, delete, desc, func, literal, or_, select, update
 from sqlalchemy.orm import Session, aliased
 
 from app.models.account import Account
-from app.models.category import Category
+from app.models.category import Category, CategoryType
 from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.models.transaction_archive import transactions_archive
+from app.schemas.transaction import TransactionCreate, TransactionFilter, TransactionUpdate
+from app.services import archive, changelog, events
 from app.services.conversion import convert_amounts
+from app.services.fingerprint import transaction_fingerprint
 from app.schemas.exchange_rate import ExchangeRateValues
 
 
-def list_transactions(
+def _category_fields(
     db: Session,
+    category_id: int | None,
+    subcategory_id: int | None,
+) -> tuple[str, int | None]:
+    category = db.get(Category, category_id) if category_id is not None else None
+    subcategory = db.get(Category, subcategory_id) if subcategory_id is not None else None
+
+    if subcategory is not None:
+        effective_type = CategoryType(subcategory.type).value
+    elif category is not None:
+        effective_type = CategoryType(category.type).value
+    else:
+        effective_type = CategoryType.EXPENSE.value
+
+    if subcategory is not None and subcategory.parent_id is not None:
+        root_category_id = subcategory.parent_id
+    else:
+        root_category_id = category.id if category is not None else None
+    return effective_type, root_category_id
+
+
+def category_values(db: Session, category_id: int | None, subcategory_id: int | None) -> dict:
+    effective_type, root_category_id = _category_fields(db, category_id, subcategory_id)
+    return {
+        "category_id": category_id,
+        "subcategory_id": subcategory_id,
+        "effective_type": effective_type,
+        "root_category_id": root_category_id,
+    }
+
+
+def _refresh_category_statement(table, user_id: int, ids: list[int]):
+    subcategory = aliased(Category)
+    category = aliased(Category)
+    subcategory_type = (
+        select(cast(subcategory.type, String))
+        .where(subcategory.id == table.c.subcategory_id)
+        .scalar_subquery()
+    )
+    category_type = (
+        select(cast(category.type, String))
+        .where(category.id == table.c.category_id)
+        .scalar_subquery()
+    )
+    subcategory_parent = (
+        select(subcategory.parent_id)
+        .where(subcategory.id == table.c.subcategory_id)
+        .scalar_subquery()
+    )
+    return (
+        update(table)
+        .where(
+            table.c.user_id == user_id,
+            or_(table.c.category_id.in_(ids), table.c.subcategory_id.in_(ids)),
+        )
+        .values(
+            effective_type=func.coalesce(subcategory_type, category_type, literal(CategoryType.EXPENSE.value)),
+            root_category_id=func.coalesce(subcategory_parent, table.c.category_id),
+            # Explicit: the archive table carries no onupdate, and analytics snapshots key off it
+            updated_at=func.now(),
+        )
+        .returning(table.c.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Set-based cascade for category re-typing/re-parenting; the caller commits.
+def refresh_category_fields(db: Session, user_id: int, category_ids: Iterable[int]) -> int:
+    ids = list(category_ids)
+    if not ids:
+        return 0
+
+    updated = db.execute(_refresh_category_statement(Transaction.__table__, user_id, ids)).scalars().all()
+    # Archived rows are otherwise read-only, but their denormalized category fields must
+    # follow the categories or old report totals would move to the wrong type
+    updated += db.execute(_refresh_category_statement(transactions_archive, user_id, ids)).scalars().all()
+    if updated:
+        changelog.record(db, user_id, changelog.TRANSACTION, changelog.UPSERT, updated)
+        events.emit(db, user_id, events.TRANSACTIONS_CHANGED, count=len(updated))
+    return len(updated)
+
+
+def _apply_list_filters(
+    query,
     user_id: int,
     start: datetime | None = None,
     end: datetime | None = None,
@@ -22,47 +108,252 @@ def list_transactions(
     currency_code: str | None = None,
     category_type: str | None = None,
     search: str | None = None,
-    limit: int = 100,
-    offset: int = 0,
-) -> list[Transaction]:
-    query = db.query(Transaction).filter(Transaction.user_id == user_id)
+    tx=Transaction,
+):
+    # Shared by the list endpoint (ORM Query) and the bulk mutations (id Select); ``tx`` is
+    # Transaction or the live+archive union from services.archive
+    query = query.filter(tx.user_id == user_id)
 
     account_alias = aliased(Account)
     category_alias = aliased(Category)
 
-    query = query.outerjoin(account_alias, Transaction.account_id == account_alias.id)
-    query = query.outerjoin(category_alias, Transaction.category_id == category_alias.id)
+    query = query.outerjoin(account_alias, tx.account_id == account_alias.id)
+    query = query.outerjoin(category_alias, tx.category_id == category_alias.id)
 
     if start is not None:
-        query = query.filter(Transaction.transaction_date >= start)
+        query = query.filter(tx.transaction_date >= start)
     if end is not None:
-        query = query.filter(Transaction.transaction_date <= end)
+        query = query.filter(tx.transaction_date <= end)
     if category_ids:
-        query = query.filter(Transaction.category_id.in_(category_ids))
+        query = query.filter(tx.category_id.in_(category_ids))
     if account_ids:
-        query = query.filter(Transaction.account_id.in_(account_ids))
+        query = query.filter(tx.account_id.in_(account_ids))
     if currency_code:
-        query = query.filter(Transaction.currency_code == currency_code)
+        query = query.filter(tx.currency_code == currency_code)
     if category_type:
         query = query.filter(category_alias.type == category_type)
     if search:
         pattern = f"%{search}%"
         query = query.filter(
             or_(
-                Transaction.notes.ilike(pattern),
+                tx.notes.ilike(pattern),
                 category_alias.name.ilike(pattern),
                 account_alias.name.ilike(pattern),
             )
         )
+    return query
+
+
+# Flat columns served by the binary list formats (no nested exchange rate)
+LIST_ROW_COLUMNS = (
+    Transaction.id,
+    Transaction.transaction_date,
+    Transaction.account_id,
+    Transaction.category_id,
+    Transaction.subcategory_id,
+    Transaction.currency_code,
+    Transaction.rate_type,
+    Transaction.amount_original,
+    Transaction.amount_ars,
+    Transaction.amount_usd,
+    Transaction.amount_btc,
+    Transaction.exchange_rate_id,
+    Transaction.notes,
+    Transaction.is_possible_duplicate,
+    Transaction.created_at,
+    Transaction.updated_at,
+)
 
+
+def _list_query(query, user_id: int, limit: int, offset: int, tx=Transaction, **filters):
     return (
-        query.order_by(desc(Transaction.transaction_date))
+        _apply_list_filters(query, user_id, tx=tx, **filters)
+        .order_by(desc(tx.transaction_date))
         .offset(offset)
         .limit(limit)
-        .all()
     )
 
 
+def list_transactions(
+    db: Session,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    category_ids: Iterable[int] | None = None,
+    account_ids: Iterable[int] | None = None,
+    currency_code: str | None = None,
+    category_type: str | None = None,
+    search: str | None = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> list[Transaction]:
+    tx = archive.transactions_source(start)
+    return _list_query(
+        db.query(tx),
+        user_id,
+        limit,
+        offset,
+        tx=tx,
+        start=start,
+        end=end,
+        category_ids=category_ids,
+        account_ids=account_ids,
+        currency_code=currency_code,
+        category_type=category_type,
+        search=search,
+    ).all()
+
+
+def list_transaction_rows(
+    db: Session,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    category_ids: Iterable[int] | None = None,
+    account_ids: Iterable[int] | None = None,
+    currency_code: str | None = None,
+    category_type: str | None = None,
+    search: str | None = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> list[tuple]:
+    # Same page as list_transactions as plain tuples, in LIST_ROW_COLUMNS order
+    tx = archive.transactions_source(start)
+    statement = _list_query(
+        select(*(getattr(tx, column.key) for column in LIST_ROW_COLUMNS)),
+        user_id,
+        limit,
+        offset,
+        tx=tx,
+        start=start,
+        end=end,
+        category_ids=category_ids,
+        account_ids=account_ids,
+        currency_code=currency_code,
+        category_type=category_type,
+        search=search,
+    )
+    return db.execute(statement).all()
+
+
+def _bulk_target(user_id: int, ids: Iterable[int] | None, filters: TransactionFilter | None):
+    if ids is not None:
+        return Transaction.user_id == user_id, Transaction.id.in_(list(ids))
+    if filters is None:
+        raise ValueError("A bulk selection needs ids or filters")
+    matching = _apply_list_filters(
+        select(Transaction.id),
+        user_id,
+        start=filters.start,
+        end=filters.end,
+        category_ids=filters.category_ids,
+        account_ids=filters.account_ids,
+        currency_code=filters.currency_code,
+        category_type=filters.category_type.value if filters.category_type else None,
+        search=filters.search,
+    )
+    return Transaction.user_id == user_id, Transaction.id.in_(matching)
+
+
+def bulk_update_transactions(
+    db: Session,
+    user_id: int,
+    values: dict,
+    ids: Iterable[int] | None = None,
+    filters: TransactionFilter | None = None,
+) -> int:
+    # One UPDATE for the whole selection; amounts are untouched so nothing is re-converted
+    target = _bulk_target(user_id, ids, filters)
+    refingerprint = "account_id" in values or "notes" in values
+    if refingerprint and filters is not None:
+        # Pin the selection first: the new notes/account may no longer match the filters
+        matched = db.execute(select(Transaction.id).where(*target)).scalars().all()
+        target = _bulk_target(user_id, matched, None)
+    statement = (
+        update(Transaction)
+        .where(*target)
+        .values(**values, updated_at=func.now())
+        .returning(Transaction.id)
+        .execution_options(synchronize_session=False)
+    )
+    updated = db.execute(statement).scalars().all()
+    if refingerprint:
+        _refresh_fingerprints(db, target)
+    if updated:
+        changelog.record(db, user_id, changelog.TRANSACTION, changelog.UPSERT, updated)
+        events.emit(db, user_id, events.TRANSACTIONS_CHANGED, count=len(updated))
+    db.commit()
+    return len(updated)
+
+
+def _refresh_fingerprints(db: Session, target) -> None:
+    # sha256 isn't portable SQL, so re-hash the touched rows and write back by primary key
+    rows = db.execute(
+        select(
+            Transaction.id,
+            Transaction.account_id,
+            Transaction.transaction_date,
+            Transaction.amount_original,
+            Transaction.currency_code,
+            Transaction.notes,
+        ).where(*target)
+    ).all()
+    if rows:
+        db.execute(
+            update(Transaction),
+            [{"id": row.id, "fingerprint": fingerprint_for(row)} for row in rows],
+        )
+
+
+def bulk_delete_transactions(
+    db: Session,
+    user_id: int,
+    ids: Iterable[int] | None = None,
+    filters: TransactionFilter | None = None,
+) -> int:
+    statement = (
+        delete(Transaction)
+        .where(*_bulk_target(user_id, ids, filters))
+        .returning(Transaction.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = db.execute(statement).scalars().all()
+    if deleted:
+        changelog.record(db, user_id, changelog.TRANSACTION, changelog.DELETE, deleted)
+        events.emit(db, user_id, events.TRANSACTIONS_CHANGED, count=len(deleted))
+    db.commit()
+    return len(deleted)
+
+
+def fingerprint_for(tx: TransactionCreate | Transaction) -> str:
+    return transaction_fingerprint(
+        tx.account_id, tx.transaction_date, tx.amount_original, tx.currency_code, tx.notes
+    )
+
+
+def find_existing_fingerprints(
+    db: Session, user_id: int, fingerprints: Iterable[str], earliest: datetime | None = None
+) -> set[str]:
+    # One lookup on (user_id, fingerprint) per batch, however long the user's history is;
+    # archived history is checked too when the batch's earliest date reaches it
+    candidates = list(set(fingerprints))
+    if not candidates:
+        return set()
+    tables = [Transaction.__table__]
+    if archive.reaches_archive(earliest):
+        tables.append(transactions_archive)
+    found: set[str] = set()
+    for table in tables:
+        found.update(
+            db.execute(
+                select(table.c.fingerprint)
+                .where(table.c.user_id == user_id, table.c.fingerprint.in_(candidates))
+                .distinct()
+            ).scalars()
+        )
+    return found
+
+
 def get_transaction(db: Session, user_id: int, transaction_id: int) -> Transaction | None:
     return (
         db.query(Transaction)
@@ -71,22 +362,71 @@ def get_transaction(db: Session, user_id: int, transaction_id: int) -> Transacti
     )
 
 
+def get_archived_transaction(db: Session, user_id: int, transaction_id: int) -> Transaction | None:
+    # Read-only copy of a row moved by services.archive; not attached to the live table
+    archived = aliased(Transaction, select(transactions_archive).subquery("transactions_archived"), adapt_on_names=True)
+    return db.query(archived).filter(archived.user_id == user_id, archived.id == transaction_id).first()
+
+
 def create_transaction(
     db: Session,
     user_id: int,
     tx_in: TransactionCreate,
     rates: ExchangeRateValues,
     exchange_rate_id: int | None,
+    is_possible_duplicate: bool = False,
+) -> Transaction:
+    transaction = _build_transaction(db, user_id, tx_in, rates, exchange_rate_id, is_possible_duplicate)
+    db.add(transaction)
+    db.flush()
+    changelog.record(db, user_id, changelog.TRANSACTION, changelog.UPSERT, [transaction.id])
+    events.emit(db, user_id, events.TRANSACTIONS_CHANGED, ids=[transaction.id])
+    db.commit()
+    db.refresh(transaction)
+    return transaction
+
+
+def create_transactions(
+    db: Session,
+    user_id: int,
+    items: Iterable[tuple[TransactionCreate, ExchangeRateValues, int | None, bool]],
+) -> list[int]:
+    # Import path: every row in one flush and one commit
+    transactions = [
+        _build_transaction(db, user_id, tx_in, rates, exchange_rate_id, is_possible_duplicate)
+        for tx_in, rates, exchange_rate_id, is_possible_duplicate in items
+    ]
+    db.add_all(transactions)
+    db.flush()
+    ids = [transaction.id for transaction in transactions]
+    if ids:
+        changelog.record(db, user_id, changelog.TRANSACTION, changelog.UPSERT, ids)
+        events.emit(db, user_id, events.TRANSACTIONS_CHANGED, count=len(ids))
+    db.commit()
+    return ids
+
+
+def _build_transaction(
+    db: Session,
+    user_id: int,
+    tx_in: TransactionCreate,
+    rates: ExchangeRateValues,
+    exchange_rate_id: int | None,
+    is_possible_duplicate: bool,
 ) -> Transaction:
     amount_ars, amount_usd, amount_btc = convert_amounts(
         tx_in.amount_original, tx_in.currency_code, rates, tx_in.rate_type
     )
 
-    transaction = Transaction(
+    effective_type, root_category_id = _category_fields(db, tx_in.category_id, tx_in.subcategory_id)
+
+    return Transaction(
         user_id=user_id,
         account_id=tx_in.account_id,
         category_id=tx_in.category_id,
         subcategory_id=tx_in.subcategory_id,
+        root_category_id=root_category_id,
+        effective_type=effective_type,
         transaction_date=tx_in.transaction_date,
         currency_code=tx_in.currency_code,
         rate_type=tx_in.rate_type,
@@ -96,13 +436,10 @@ def create_transaction(
         amount_btc=amount_btc,
         notes=tx_in.notes,
         exchange_rate_id=exchange_rate_id,
+        fingerprint=fingerprint_for(tx_in),
+        is_possible_duplicate=is_possible_duplicate,
     )
 
-    db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
-    return transaction
-
 
 def update_transaction(
     db: Session,
@@ -138,15 +475,25 @@ def update_transaction(
     for field, value in data.items():
         setattr(transaction, field, value)
 
+    if "category_id" in data or "subcategory_id" in data:
+        transaction.effective_type, transaction.root_category_id = _category_fields(
+            db, transaction.category_id, transaction.subcategory_id
+        )
+
     if exchange_rate_id is not None:
         transaction.exchange_rate_id = exchange_rate_id
 
+    transaction.fingerprint = fingerprint_for(transaction)
     db.add(transaction)
+    changelog.record(db, transaction.user_id, changelog.TRANSACTION, changelog.UPSERT, [transaction.id])
+    events.emit(db, transaction.user_id, events.TRANSACTIONS_CHANGED, ids=[transaction.id])
     db.commit()
     db.refresh(transaction)
     return transaction
 
 
 def delete_transaction(db: Session, transaction: Transaction) -> None:
+    changelog.record(db, transaction.user_id, changelog.TRANSACTION, changelog.DELETE, [transaction.id])
+    events.emit(db, transaction.user_id, events.TRANSACTIONS_CHANGED, ids=[transaction.id])
     db.delete(transaction)
     db.commit()
@@ -8,3 +8,10 @@ from app.models.category import Category  # noqa: F401
 from app.models.account import Account  # noqa: F401
 from app.models.transaction import Transaction  # noqa: F401
 from app.models.budget import Budget, BudgetItem  # noqa: F401
+from app.models.scheduler_lease import SchedulerLease  # noqa: F401
+from app.models.rate_correction import RateCorrection  # noqa: F401
+from app.models.recurring_transaction import RecurringTransaction  # noqa: F401
+from app.models.request_profile import ProfilingTarget, RequestProfile  # noqa: F401
+from app.models.change_log import ChangeLogEntry  # noqa: F401
+from app.models.transaction_archive import transactions_archive  # noqa: F401
+from app.models.idempotency_key import IdempotencyKey  # noqa: F401
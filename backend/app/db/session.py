@@ -1,12 +1,84 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
 from collections.abc import Generator
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 engine = create_engine(settings.database_url, pool_pre_ping=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+ReadSessionLocal = sessionmaker(autoflush=False, autocommit=False)
+
+PRIMARY_PIN_COOKIE = "db_primary_until"
+
+REPLICA_LAG_SQL = text("SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)")
+
+
+class ReplicaRouter:
+    # Round-robins reads over replicas that passed their last health check. Checks are lazy
+    # (at most one per replica every ``check_seconds``) and a replica that is down or lagging
+    # more than ``max_lag_seconds`` is skipped until it recovers; with none left, reads fall
+    # back to the primary.
+    def __init__(self, urls: list[str], check_seconds: float, max_lag_seconds: float):
+        self.engines: list[Engine] = [create_engine(url, pool_pre_ping=True) for url in urls]
+        self.check_seconds = check_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self._healthy = [True] * len(self.engines)
+        self._checked_at = [float("-inf")] * len(self.engines)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def _probe(self, replica: Engine) -> bool:
+        try:
+            with replica.connect() as connection:
+                if replica.dialect.name == "postgresql":
+                    lag = connection.execute(REPLICA_LAG_SQL).scalar_one()
+                    return float(lag) <= self.max_lag_seconds
+                connection.execute(text("SELECT 1"))
+                return True
+        except SQLAlchemyError:
+            return False
+
+    def is_healthy(self, index: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at[index] < self.check_seconds:
+                return self._healthy[index]
+            self._checked_at[index] = now
+        healthy = self._probe(self.engines[index])
+        if healthy != self._healthy[index]:
+            logger.warning("Read replica %s is now %s", index, "healthy" if healthy else "unavailable")
+        self._healthy[index] = healthy
+        return healthy
+
+    def pick(self) -> Engine | None:
+        for _ in range(len(self.engines)):
+            index = next(self._counter) % len(self.engines)
+            if self.is_healthy(index):
+                return self.engines[index]
+        return None
+
+
+replica_router = ReplicaRouter(
+    settings.database_replica_urls,
+    check_seconds=settings.replica_check_seconds,
+    max_lag_seconds=settings.replica_max_lag_seconds,
+)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -15,3 +87,23 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, "0")) > time.time()
+    except ValueError:
+        return False
+
+
+# For read-only endpoints (reports, listings). Clients that just wrote are kept on the primary
+# so they see their own changes despite replication lag.
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    replica = None
+    if replica_router.enabled and not pinned_to_primary(request):
+        replica = replica_router.pick()
+    db = ReadSessionLocal(bind=replica) if replica is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,10 +1,34 @@
-from fastapi import FastAPI
+import time
+from typing import Any
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.api.routes import accounts, auth, budgets, categories, exchange_rates, reports, transactions, users
+from app.api.routes import (
+    accounts,
+    auth,
+    budgets,
+    categories,
+    diagnostics,
+    events,
+    exchange_rates,
+    recurring_transactions,
+    reports,
+    sync,
+    transactions,
+    users,
+)
 from app.db import base  # noqa: F401 - ensure models are registered
 from app.core.config import settings
-from app.worker.scheduler import shutdown_scheduler, start_scheduler
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.db.session import PRIMARY_PIN_COOKIE, replica_router
+from app.services import events as events_service
+from app.services import idempotency, profiling
+from app.services.rate_fetcher import rate_fetcher
+from app.utils.profiling import activate, deactivate
+from app.worker import scheduler
 
 app = FastAPI(title="Finance Tracker API", version="0.1.0")
 
@@ -16,14 +40,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# Registered first so it runs innermost: replays still get the primary pin cookie below
+@app.middleware("http")
+async def idempotent_writes(request: Request, call_next):
+    if not idempotency.applies(request):
+        return await call_next(request)
+    return await idempotency.handle(request, call_next)
+
+
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        replica_router.enabled
+        and request.method not in {"GET", "HEAD", "OPTIONS"}
+        and response.status_code < 400
+    ):
+        window = settings.read_your_writes_seconds
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            str(int(time.time()) + window),
+            max_age=window,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    subject = profiling.token_subject(request)
+    if subject is None:
+        return await call_next(request)
+    targets = profiling.armed_targets.current()
+    if targets is None:
+        targets = await run_in_threadpool(profiling.armed_targets.refresh)
+    armed_user_id = None
+    # X-Profile only counts for admins; anyone else never takes a profiler slot
+    if not (profiling.requested(request) and subject in profiling.armed_targets.admins):
+        armed_user_id = targets.get(subject)
+        if armed_user_id is None:
+            return await call_next(request)
+
+    profiler = profiling.begin()
+    if profiler is None:
+        return await call_next(request)
+    token = activate(profiler)
+    try:
+        response = await call_next(request)
+    finally:
+        deactivate(token)
+        profiling.end(profiler)
+    profile_id = await run_in_threadpool(profiling.save, profiler, request, response.status_code, armed_user_id)
+    if profile_id is not None:
+        response.headers[profiling.PROFILE_ID_HEADER] = str(profile_id)
+    return response
+
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(accounts.router)
 app.include_router(categories.router)
 app.include_router(transactions.router)
+app.include_router(recurring_transactions.router)
 app.include_router(exchange_rates.router)
 app.include_router(reports.router)
 app.include_router(budgets.router)
+app.include_router(diagnostics.router)
+app.include_router(events.router)
+app.include_router(sync.router)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/health", tags=["health"])
@@ -31,11 +126,20 @@ def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/password-hasher", tags=["health"])
+def password_hasher_health() -> dict[str, Any]:
+    return password_hasher.stats()
+
+
 @app.on_event("startup")
 async def on_startup() -> None:
-    start_scheduler()
+    scheduler.start_scheduler()
+    events_service.broker.start()
 
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
-    shutdown_scheduler()
+    scheduler.shutdown_scheduler()
+    events_service.broker.stop()
+    rate_fetcher.close()
+    password_hasher.close()
@@ -1,7 +1,20 @@
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, Numeric, String, Text, UniqueConstraint, func
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -23,7 +36,10 @@ class ExchangeRateSource(Base):
 
 class ExchangeRate(Base):
     __tablename__ = "exchange_rates"
-    __table_args__ = (UniqueConstraint("effective_date", "source_id", name="uq_rate_date_source"),)
+    __table_args__ = (
+        UniqueConstraint("effective_date", "source_id", name="uq_rate_date_source"),
+        Index("ix_exchange_rates_effective_date_id", "effective_date", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     effective_date: Mapped[date] = mapped_column(Date, nullable=False)
@@ -33,9 +49,24 @@ class ExchangeRate(Base):
     btc_usd: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
     btc_ars: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
     is_manual: Mapped[bool] = mapped_column(Boolean, default=False)
-    metadata_payload: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # A corrected rate kept for history; lookups skip it in favour of its replacement
+    superseded_by_id: Mapped[int | None] = mapped_column(ForeignKey("exchange_rates.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
     source = relationship("ExchangeRateSource", back_populates="exchange_rates")
+    # Raw provider responses live in a side table so rate lookups stay narrow
+    payload = relationship(
+        "ExchangeRatePayload", uselist=False, cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+class ExchangeRatePayload(Base):
+    __tablename__ = "exchange_rate_payloads"
+
+    exchange_rate_id: Mapped[int] = mapped_column(
+        ForeignKey("exchange_rates.id", ondelete="CASCADE"), primary_key=True
+    )
+    encoding: Mapped[str] = mapped_column(String(10), nullable=False, default="zlib")
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
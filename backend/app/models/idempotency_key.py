@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, LargeBinary, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class IdempotencyKey(Base):
+    # One row per Idempotency-Key a client sent to a write endpoint (services.idempotency).
+    # ``status_code`` stays NULL while the first request is still running.
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("subject", "key", name="uq_idempotency_keys_subject_key"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # ``sub`` of the access token, so two users can't collide on the same key
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    method: Mapped[str] = mapped_column(String(10), nullable=False)
+    path: Mapped[str] = mapped_column(String(500), nullable=False)
+    # sha256 of method, path, query string and body
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    content_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    # An unfinished claim past this point is treated as abandoned (worker died mid-request)
+    locked_until: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
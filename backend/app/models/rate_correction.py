@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class RateCorrection(Base):
+    __tablename__ = "rate_corrections"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    exchange_rate_id: Mapped[int] = mapped_column(ForeignKey("exchange_rates.id"), nullable=False, index=True)
+    # Set when the correction superseded the original row instead of updating it in place
+    replacement_rate_id: Mapped[int | None] = mapped_column(ForeignKey("exchange_rates.id"), nullable=True)
+    requested_by_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # JSON object of user id -> transactions recomputed for that user
+    report: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Bumped by the worker running the job after every batch; an active job whose heartbeat
+    # goes stale lost its worker and is resumed (services.rate_corrections)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def affected_by_user(self) -> dict[int, int]:
+        return {int(user_id): count for user_id, count in json.loads(self.report or "{}").items()}
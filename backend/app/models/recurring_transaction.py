@@ -0,0 +1,44 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, Numeric, String, Text, func, text, true
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class RecurringTransaction(Base):
+    __tablename__ = "recurring_transactions"
+    __table_args__ = (
+        # The nightly job only ever reads active templates that are due
+        Index(
+            "ix_recurring_transactions_due",
+            "next_run_at",
+            postgresql_where=text("is_active"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    account_id: Mapped[int | None] = mapped_column(ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True)
+    category_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
+    subcategory_id: Mapped[int | None] = mapped_column(
+        ForeignKey("categories.id", ondelete="SET NULL"), nullable=True
+    )
+    currency_code: Mapped[str] = mapped_column(String(3), nullable=False)
+    rate_type: Mapped[str] = mapped_column(String(20), nullable=False, default="official")
+    amount_original: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
+    notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # RFC 5545 RRULE body, e.g. "FREQ=MONTHLY;BYMONTHDAY=1"
+    rrule: Mapped[str] = mapped_column(String(255), nullable=False)
+    start_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Null once the rule is exhausted
+    next_run_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_run_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default=true())
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
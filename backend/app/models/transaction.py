@@ -1,7 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric, String, Text, func
+from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Index, Integer, Numeric, String, Text, false, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -9,13 +9,38 @@ from app.db.base_class import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index(
+            "ix_transactions_user_type_date",
+            "user_id",
+            "effective_type",
+            "transaction_date",
+            postgresql_include=["amount_ars", "amount_usd", "amount_btc"],
+        ),
+        Index("ix_transactions_user_fingerprint", "user_id", "fingerprint"),
+        # User-scoped date ranges (listing, reports) without an effective_type equality
+        Index("ix_transactions_user_date", "user_id", "transaction_date"),
+        # One materialized occurrence per template and date, even if the job is re-run
+        Index("uq_transactions_recurring_date", "recurring_id", "transaction_date", unique=True),
+        # SQLite otherwise hands out max(id) + 1, reusing ids of rows moved to the archive;
+        # live and archived ids must never collide (services.archive unions both)
+        {"sqlite_autoincrement": True},
+    )
 
+    # On Postgres the table is range-partitioned by month of transaction_date and its primary
+    # key is (id, transaction_date); ids still come from a single sequence and stay unique
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     account_id: Mapped[int] = mapped_column(ForeignKey("accounts.id", ondelete="SET NULL"), nullable=True, index=True)
     category_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id"), nullable=True, index=True)
     subcategory_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id"), nullable=True, index=True)
-    exchange_rate_id: Mapped[int | None] = mapped_column(ForeignKey("exchange_rates.id"), nullable=True)
+    exchange_rate_id: Mapped[int | None] = mapped_column(ForeignKey("exchange_rates.id"), nullable=True, index=True)
+    recurring_id: Mapped[int | None] = mapped_column(
+        ForeignKey("recurring_transactions.id", ondelete="SET NULL"), nullable=True
+    )
+    # Denormalized from categories so reports can aggregate without joins
+    root_category_id: Mapped[int | None] = mapped_column(ForeignKey("categories.id"), nullable=True, index=True)
+    effective_type: Mapped[str] = mapped_column(String(20), nullable=False, default="expense", server_default="expense")
 
     transaction_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     currency_code: Mapped[str] = mapped_column(String(3), nullable=False)
@@ -25,6 +50,9 @@ class Transaction(Base):
     amount_usd: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
     amount_btc: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # sha256 of account, day, amount, currency and normalized notes (services.fingerprint)
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    is_possible_duplicate: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Index, Table
+
+from app.db.base_class import Base
+from app.models.transaction import Transaction
+
+# Cold copy of transactions older than ARCHIVE_AFTER_MONTHS (app.services.archive). Same
+# columns as ``transactions`` but no foreign keys and only two indexes: archived rows are
+# never edited, only read as whole user/date ranges or looked up by fingerprint.
+transactions_archive = Table(
+    "transactions_archive",
+    Base.metadata,
+    *(
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+        for column in Transaction.__table__.columns
+    ),
+    Index("ix_transactions_archive_user_date", "user_id", "transaction_date"),
+    # Duplicate detection on create/import (crud_transaction.find_existing_fingerprints)
+    Index("ix_transactions_archive_user_fingerprint", "user_id", "fingerprint"),
+)
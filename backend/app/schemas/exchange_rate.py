@@ -1,6 +1,8 @@
 from datetime import date, datetime
 from decimal import Decimal
 
+from typing import Literal
+
 from pydantic import BaseModel, Field, model_validator
 
 
@@ -27,16 +29,26 @@ class ExchangeRateOut(ExchangeRateValues):
     effective_date: date
     source_id: int | None
     is_manual: bool
+    superseded_by_id: int | None = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class ExchangeRateLatestOut(ExchangeRateOut):
+    source: str
+    age_seconds: int
+    is_stale: bool
+    refreshing: bool
+
+
 class ExchangeRateReprocessRequest(BaseModel):
     exchange_rate_id: int | None = None
     start: datetime | None = None
     end: datetime | None = None
+    # Re-link each transaction to the rate stored for its own date (e.g. after a backfill)
+    match_by_date: bool = False
 
     @model_validator(mode="after")
     def validate_filters(self) -> "ExchangeRateReprocessRequest":
@@ -44,6 +56,8 @@ class ExchangeRateReprocessRequest(BaseModel):
             raise ValueError("Indicá al menos un filtro")
         if self.start and self.end and self.end < self.start:
             raise ValueError("El rango es inválido")
+        if self.match_by_date and self.exchange_rate_id:
+            raise ValueError("match_by_date no admite exchange_rate_id")
         return self
 
 
@@ -51,3 +65,38 @@ class ExchangeRateReprocessResult(BaseModel):
     processed: int
     updated: int
     skipped: int
+
+
+class ExchangeRateGapsResponse(BaseModel):
+    start: date
+    end: date
+    missing: list[date]
+
+
+class ExchangeRateBackfillResult(BaseModel):
+    inserted: int
+    skipped: int
+    missing: list[date]
+
+
+class ExchangeRateCorrectionRequest(ExchangeRateValues):
+    # "update" rewrites the row in place, "supersede" keeps it and links a new manual row
+    mode: Literal["update", "supersede"] = "update"
+
+
+class RateCorrectionOut(BaseModel):
+    id: int
+    exchange_rate_id: int
+    replacement_rate_id: int | None
+    mode: str
+    status: str
+    total: int
+    processed: int
+    updated: int
+    affected_by_user: dict[int, int]
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,33 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class QueryPlanNodeOut(BaseModel):
+    operation: str
+    relation: str | None = None
+    index: str | None = None
+    condition: str | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class QueryPlanStatementOut(BaseModel):
+    sql: str
+    nodes: list[QueryPlanNodeOut]
+    # EXPLAIN (FORMAT JSON) on Postgres, EXPLAIN QUERY PLAN detail lines on SQLite
+    raw: Any
+
+    class Config:
+        from_attributes = True
+
+
+class QueryPlanOut(BaseModel):
+    name: str
+    dialect: str
+    statements: list[QueryPlanStatementOut]
+    violations: list[str]
+
+    class Config:
+        from_attributes = True
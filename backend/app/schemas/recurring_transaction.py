@@ -0,0 +1,54 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, Field, model_validator
+
+
+class RecurringTransactionBase(BaseModel):
+    account_id: int
+    category_id: int | None = None
+    subcategory_id: int | None = None
+    currency_code: str = Field(pattern=r"^[A-Z]{3}$")
+    amount_original: Decimal
+    rate_type: Literal["official", "blue"] = "official"
+    notes: str | None = Field(default=None, max_length=500)
+    rrule: str = Field(min_length=1, max_length=255)
+    start_at: datetime
+
+
+class RecurringTransactionCreate(RecurringTransactionBase):
+    pass
+
+
+class RecurringTransactionUpdate(BaseModel):
+    account_id: int | None = None
+    category_id: int | None = None
+    subcategory_id: int | None = None
+    currency_code: str | None = Field(default=None, pattern=r"^[A-Z]{3}$")
+    amount_original: Decimal | None = None
+    rate_type: Literal["official", "blue"] | None = None
+    notes: str | None = Field(default=None, max_length=500)
+    rrule: str | None = Field(default=None, min_length=1, max_length=255)
+    start_at: datetime | None = None
+    is_active: bool | None = None
+
+    @model_validator(mode="after")
+    def validate_required(self) -> "RecurringTransactionUpdate":
+        # Omitted means unchanged; an explicit null would only fail when the row is written
+        for field in ("account_id", "currency_code", "amount_original", "rate_type", "rrule", "start_at", "is_active"):
+            if field in self.model_fields_set and getattr(self, field) is None:
+                raise ValueError(f"{field} no puede ser nulo")
+        return self
+
+
+class RecurringTransactionOut(RecurringTransactionBase):
+    id: int
+    account_id: int | None
+    next_run_at: datetime | None
+    last_run_at: datetime | None
+    is_active: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
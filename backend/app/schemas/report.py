@@ -25,6 +25,7 @@ class ReportSummaryResponse(BaseModel):
     totals: ReportTotals
     previous_totals: ReportTotals | None = None
     budget_totals: ReportBudgetTotals | None = None
+    rate_type: Literal["official", "blue"] | None = None
 
 
 class ReportTimeseriesPoint(BaseModel):
@@ -37,6 +38,7 @@ class ReportTimeseriesResponse(BaseModel):
     currency: Literal["ARS", "USD", "BTC"]
     interval: Literal["month", "day"]
     points: Sequence[ReportTimeseriesPoint]
+    rate_type: Literal["official", "blue"] | None = None
 
 
 class ReportCategoryEntry(BaseModel):
@@ -49,6 +51,7 @@ class ReportCategoryEntry(BaseModel):
 class ReportCategoryResponse(BaseModel):
     currency: Literal["ARS", "USD", "BTC"]
     entries: Sequence[ReportCategoryEntry]
+    rate_type: Literal["official", "blue"] | None = None
 
 
 class ReportBudgetTotals(BaseModel):
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ProfilingTargetCreate(BaseModel):
+    user_id: int
+    requests: int = Field(default=5, ge=1, le=100)
+    minutes: int = Field(default=60, ge=1, le=1440)
+
+
+class ProfilingTargetOut(BaseModel):
+    user_id: int
+    remaining: int
+    expires_at: datetime
+    created_by_id: int | None = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class RequestProfileSummary(BaseModel):
+    id: int
+    user_id: int | None = None
+    method: str
+    path: str
+    status_code: int
+    duration_ms: float
+    sql_ms: float
+    statement_count: int
+    sample_count: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ProfiledStatementOut(BaseModel):
+    sql: str
+    parameters: str
+    duration_ms: float
+
+
+class RequestProfileOut(RequestProfileSummary):
+    interval_ms: float
+    # Collapsed stacks ("outer;inner;leaf") -> samples
+    stacks: dict[str, int]
+    statements: list[ProfiledStatementOut]
+    dropped_statements: int = 0
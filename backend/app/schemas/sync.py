@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, Field
+
+from app.schemas.account import AccountOut
+from app.schemas.budget import BudgetOut
+from app.schemas.category import CategoryBase
+from app.schemas.transaction import TransactionOut
+
+T = TypeVar("T")
+
+
+class SyncCategoryOut(CategoryBase):
+    # Flat, unlike CategoryOut: children arrive as records of their own
+    id: int
+    is_default: bool
+    is_archived: bool
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class EntityChanges(BaseModel, Generic[T]):
+    # reset: the client drops its copy and reloads the list endpoint
+    reset: bool = False
+    upserted: list[T] = Field(default_factory=list)
+    deleted: list[int] = Field(default_factory=list)
+
+    class Config:
+        from_attributes = True
+
+
+class SyncResponse(BaseModel):
+    # Cursor for the next ``since``; with has_more, call again right away
+    version: int
+    has_more: bool
+    accounts: EntityChanges[AccountOut]
+    categories: EntityChanges[SyncCategoryOut]
+    transactions: EntityChanges[TransactionOut]
+    budgets: EntityChanges[BudgetOut]
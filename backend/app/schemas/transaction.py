@@ -2,8 +2,9 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
+from app.models.category import CategoryType
 from app.schemas.exchange_rate import ExchangeRateOverride, ExchangeRateOut
 
 
@@ -43,8 +44,68 @@ class TransactionOut(TransactionBase):
     amount_btc: Decimal
     exchange_rate_id: int | None
     exchange_rate: ExchangeRateOut | None
+    is_possible_duplicate: bool = False
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class TransactionFilter(BaseModel):
+    # Same filters as GET /transactions
+    start: datetime | None = None
+    end: datetime | None = None
+    category_ids: list[int] | None = None
+    account_ids: list[int] | None = None
+    currency_code: str | None = Field(default=None, min_length=3, max_length=3)
+    category_type: CategoryType | None = None
+    search: str | None = None
+
+
+class TransactionSelection(BaseModel):
+    ids: list[int] | None = Field(default=None, min_length=1, max_length=5000)
+    filters: TransactionFilter | None = None
+
+    @model_validator(mode="after")
+    def validate_selection(self) -> "TransactionSelection":
+        if (self.ids is None) == (self.filters is None):
+            raise ValueError("Indicá ids o filtros, no ambos")
+        # An empty filter set would select the whole history
+        if self.filters is not None and not any(self.filters.model_dump().values()):
+            raise ValueError("Indicá al menos un filtro")
+        return self
+
+
+class TransactionBulkChanges(BaseModel):
+    account_id: int | None = None
+    category_id: int | None = None
+    subcategory_id: int | None = None
+    notes: str | None = Field(default=None, max_length=500)
+
+
+class TransactionBulkUpdate(TransactionSelection):
+    changes: TransactionBulkChanges
+
+    @model_validator(mode="after")
+    def validate_changes(self) -> "TransactionBulkUpdate":
+        if not self.changes.model_fields_set:
+            raise ValueError("Indicá al menos un cambio")
+        return self
+
+
+class TransactionBulkResult(BaseModel):
+    affected: int
+
+
+class TransactionImport(BaseModel):
+    items: list[TransactionCreate] = Field(min_length=1, max_length=1000)
+    # "skip" drops rows matching an existing (or earlier) movement, "flag" keeps them marked
+    on_duplicate: Literal["skip", "flag"] = "skip"
+
+
+class TransactionImportResult(BaseModel):
+    created: int
+    skipped: int
+    flagged: int
+    ids: list[int]
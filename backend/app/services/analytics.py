@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.transaction import Transaction
+from app.services import archive
+from app.utils.locks import cross_process_lock
+
+try:  # pragma: no cover - optional dependencies (requirements-analytics.txt)
+    import duckdb
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    duckdb = None  # type: ignore[assignment]
+    pa = pc = pq = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Per-user columnar copy of the report columns of ``transactions``, kept as one Parquet file
+# and aggregated with DuckDB. Reports route here when REPORT_ENGINE=columnar and the user has
+# at least ANALYTICS_MIN_ROWS rows; anything else (as-of conversions, budgets) stays on SQL.
+AMOUNT_COLUMNS = {"ARS": "amount_ars", "USD": "amount_usd", "BTC": "amount_btc"}
+# Re-read rows touched shortly before the last refresh: a transaction that started earlier
+# can commit an older updated_at after the snapshot was taken
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+_SNAPSHOT_COLUMNS = (
+    Transaction.id,
+    Transaction.transaction_date,
+    Transaction.effective_type,
+    Transaction.account_id,
+    Transaction.category_id,
+    Transaction.root_category_id,
+    Transaction.amount_ars,
+    Transaction.amount_usd,
+    Transaction.amount_btc,
+)
+
+
+def is_available() -> bool:
+    return duckdb is not None
+
+
+def _schema():
+    amount = pa.decimal128(20, 8)
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("transaction_date", pa.timestamp("us")),
+            ("effective_type", pa.string()),
+            ("account_id", pa.int64()),
+            ("category_id", pa.int64()),
+            ("root_category_id", pa.int64()),
+            ("amount_ars", amount),
+            ("amount_usd", amount),
+            ("amount_btc", amount),
+        ]
+    )
+
+
+def _utc_naive(value: datetime | None) -> datetime | None:
+    # Snapshots store naive UTC, the same instant Postgres compares and SQLite stores
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _to_table(rows) -> "pa.Table":
+    columns = list(zip(*rows)) if rows else [[] for _ in _SNAPSHOT_COLUMNS]
+    schema = _schema()
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.name == "transaction_date":
+            values = [_utc_naive(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+@dataclass
+class Snapshot:
+    path: Path
+
+    def _execute(self, sql: str, params: list) -> list[tuple]:
+        connection = duckdb.connect()
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def _where(self, filters, category_type: str | None = None) -> tuple[str, list]:
+        clauses: list[str] = []
+        params: list = []
+        if category_type:
+            clauses.append("effective_type = ?")
+            params.append(category_type)
+        if filters.start:
+            clauses.append("transaction_date >= ?")
+            params.append(_utc_naive(filters.start))
+        if filters.end:
+            clauses.append("transaction_date <= ?")
+            params.append(_utc_naive(filters.end))
+        if filters.account_ids:
+            clauses.append("list_contains(?, account_id)")
+            params.append(list(filters.account_ids))
+        if filters.category_ids:
+            clauses.append("list_contains(?, category_id)")
+            params.append(list(filters.category_ids))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def type_totals(self, filters, currency: str) -> list[tuple]:
+        column = AMOUNT_COLUMNS[currency.upper()]
+        where, params = self._where(filters)
+        return self._execute(
+            f"SELECT effective_type, SUM({column}) FROM read_parquet(?){where} GROUP BY effective_type",
+            [str(self.path), *params],
+        )
+
+    def timeseries(self, filters, currency: str, interval: str) -> list[tuple]:
+        column = AMOUNT_COLUMNS[currency.upper()]
+        bucket = "strftime(transaction_date, '%Y-%m-%d')"
+        if interval == "month":
+            bucket = "strftime(transaction_date, '%Y-%m-01')"
+        where, params = self._where(filters)
+        return self._execute(
+            f"SELECT {bucket} AS bucket, effective_type, SUM({column}) FROM read_parquet(?){where} "
+            "GROUP BY bucket, effective_type ORDER BY bucket",
+            [str(self.path), *params],
+        )
+
+    def categories(self, filters, currency: str, category_type: str | None = None) -> list[tuple]:
+        column = AMOUNT_COLUMNS[currency.upper()]
+        where, params = self._where(filters, category_type)
+        return self._execute(
+            f"SELECT root_category_id, effective_type, SUM({column}) AS total FROM read_parquet(?){where} "
+            "GROUP BY root_category_id, effective_type ORDER BY total DESC, root_category_id",
+            [str(self.path), *params],
+        )
+
+
+def _user_dir(user_id: int) -> Path:
+    return Path(settings.analytics_dir) / f"user_{user_id}"
+
+
+def _read_meta(directory: Path) -> dict | None:
+    try:
+        return json.loads((directory / "meta.json").read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_atomic(path: Path, write) -> None:
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def _source():
+    # Whole history, archived months included; archiving moves rows without changing them,
+    # so it doesn't invalidate the signature
+    return archive.transactions_source(None)
+
+
+def _signature(db: Session, user_id: int) -> tuple[int, str | None]:
+    tx = _source()
+    count, last_update = db.execute(
+        select(func.count(tx.id), func.max(tx.updated_at)).where(tx.user_id == user_id)
+    ).one()
+    last_update = _utc_naive(last_update)
+    return count, last_update.isoformat() if last_update else None
+
+
+def _refresh(db: Session, user_id: int, directory: Path, meta: dict | None) -> None:
+    path = directory / "transactions.parquet"
+    tx = _source()
+    query = select(*(getattr(tx, column.key) for column in _SNAPSHOT_COLUMNS)).where(tx.user_id == user_id)
+    if meta is None or not meta.get("updated_at") or not path.exists():
+        table = _to_table(db.execute(query).all())
+    else:
+        since = datetime.fromisoformat(meta["updated_at"]).replace(tzinfo=timezone.utc) - REFRESH_OVERLAP
+        changed = _to_table(db.execute(query.where(tx.updated_at >= since)).all())
+        current_ids = pa.array(db.execute(select(tx.id).where(tx.user_id == user_id)).scalars().all(), pa.int64())
+        previous = pq.read_table(path)
+        keep = pc.and_(
+            pc.is_in(previous["id"], value_set=current_ids),
+            pc.invert(pc.is_in(previous["id"], value_set=changed["id"].combine_chunks())),
+        )
+        table = pa.concat_tables([previous.filter(keep), changed])
+
+    directory.mkdir(parents=True, exist_ok=True)
+    _write_atomic(path, lambda target: pq.write_table(table, target))
+
+
+def snapshot_for(db: Session, user_id: int) -> Snapshot | None:
+    if settings.report_engine != "columnar" or not is_available():
+        return None
+    count, last_update = _signature(db, user_id)
+    if count < settings.analytics_min_rows:
+        return None
+
+    directory = _user_dir(user_id)
+    signature = {"count": count, "updated_at": last_update}
+    with cross_process_lock(db.get_bind(), f"analytics-{user_id}"):
+        meta = _read_meta(directory)
+        if meta is None or {key: meta.get(key) for key in signature} != signature:
+            _refresh(db, user_id, directory, meta)
+            _write_atomic(directory / "meta.json", lambda target: target.write_text(json.dumps(signature)))
+            logger.debug("Refreshed analytics snapshot for user %s (%s rows)", user_id, count)
+    return Snapshot(path=directory / "transactions.parquet")
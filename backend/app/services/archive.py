@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timezone
+
+from sqlalchemy import delete, func, insert, select, text, union_all
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.models.transaction import Transaction
+from app.models.transaction_archive import transactions_archive
+from app.services import partitions
+from app.utils.locks import cross_process_lock
+
+# Transactions older than ARCHIVE_AFTER_MONTHS whole months move to ``transactions_archive``
+# so the live table (and its indexes and vacuum work) only grows with recent history. Reads
+# whose date range reaches back past the horizon union both tables, so listings and report
+# totals don't change when a month is archived. Archived rows are read-only: edits, bulk
+# changes and reprocessing only touch the live table; rate corrections update both.
+_COLUMNS = tuple(column.name for column in Transaction.__table__.columns)
+
+
+def archive_cutoff(today: date | None = None) -> date | None:
+    # First month that stays live; None when archiving is off
+    if settings.archive_after_months <= 0:
+        return None
+    current = partitions.month_start(today or datetime.now(tz=timezone.utc).date())
+    return partitions.add_months(current, -settings.archive_after_months)
+
+
+def _boundary(month: date) -> datetime:
+    return datetime.combine(month, time.min, tzinfo=timezone.utc)
+
+
+def reaches_archive(start: datetime | None, today: date | None = None) -> bool:
+    cutoff = archive_cutoff(today)
+    if cutoff is None:
+        return False
+    # Derived from settings rather than looked up, so a reader can never miss a month the
+    # archiver moved between two statements; one extra month covers clocks disagreeing
+    # around midnight on the first
+    if start is None:
+        return True
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start < _boundary(partitions.add_months(cutoff, 1))
+
+
+def _archive_rows():
+    return select(*(transactions_archive.c[name] for name in _COLUMNS))
+
+
+def transactions_source(start: datetime | None, today: date | None = None):
+    # Entity to read transactions from: Transaction itself, or the same mapping over
+    # live UNION ALL archive. Filters on its columns are pushed into both branches.
+    if not reaches_archive(start, today):
+        return Transaction
+    live = select(*(Transaction.__table__.c[name] for name in _COLUMNS))
+    return aliased(Transaction, union_all(live, _archive_rows()).subquery("transactions_all"))
+
+
+def _month_range(table, month: date):
+    lower = _boundary(month)
+    upper = _boundary(partitions.add_months(month, 1))
+    column = table.c.transaction_date
+    return column >= lower, column < upper
+
+
+def _month_of(db: Session, column):
+    # 'YYYY-MM-01' of a timestamp, in UTC like the partition boundaries
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime("%Y-%m-01", column)
+    return func.to_char(func.timezone("UTC", column), "YYYY-MM-01")
+
+
+def _live_months(db: Session, cutoff: date) -> list[date]:
+    column = Transaction.__table__.c.transaction_date
+    month = _month_of(db, column)
+    values = db.execute(select(month).where(column < _boundary(cutoff)).distinct()).scalars()
+    months = {date.fromisoformat(value) for value in values}
+    # Empty old partitions go too, so they don't linger in the partition list
+    months.update(month for month in partitions.attached_months(db) if month < cutoff)
+    return sorted(months)
+
+
+def archive_month(db: Session, month: date, today: date | None = None) -> int:
+    month = partitions.month_start(month)
+    cutoff = archive_cutoff(today)
+    if cutoff is None or month >= cutoff:
+        raise ValueError("Solo se pueden archivar meses anteriores al horizonte configurado")
+
+    moved = 0
+    if partitions.is_partitioned(db) and month in partitions.attached_months(db):
+        # The whole partition goes at once, which frees its space immediately instead of
+        # leaving dead tuples for vacuum. Detached first, so no write can reach it between the
+        # copy and the drop; rows for that month written meanwhile land in the default
+        # partition and are picked up below or on the next run.
+        name = partitions.partition_name(month)
+        db.execute(text(f"ALTER TABLE {partitions.PARENT_TABLE} DETACH PARTITION {name}"))
+        columns = ", ".join(_COLUMNS)
+        moved = db.execute(
+            text(f"INSERT INTO {transactions_archive.name} ({columns}) SELECT {columns} FROM {name}")
+        ).rowcount
+        remaining = db.execute(text(f"SELECT count(*) FROM {name}")).scalar_one()
+        if moved != remaining:
+            db.rollback()
+            raise RuntimeError(f"Archiving {name} copied {moved} of {remaining} rows; partition left attached")
+        db.execute(text(f"DROP TABLE {name}"))
+
+    live = Transaction.__table__
+    in_month = _month_range(live, month)
+    moved += db.execute(
+        insert(transactions_archive).from_select(
+            list(_COLUMNS),
+            select(*(live.c[name] for name in _COLUMNS)).where(*in_month),
+        )
+    ).rowcount
+    # Only what was copied: a row inserted concurrently into that month stays live until next run
+    copied = select(transactions_archive.c.id).where(*_month_range(transactions_archive, month))
+    db.execute(delete(live).where(*in_month, live.c.id.in_(copied)))
+    db.commit()
+    return moved
+
+
+def archive_due(db: Session, today: date | None = None) -> dict[date, int]:
+    cutoff = archive_cutoff(today)
+    if cutoff is None:
+        return {}
+    archived: dict[date, int] = {}
+    with cross_process_lock(db.get_bind(), "transaction-archive"):
+        for month in _live_months(db, cutoff):
+            archived[month] = archive_month(db, month, today)
+    return archived
+
+
+def restore_month(db: Session, month: date) -> int:
+    # Back into the live table, e.g. before lengthening ARCHIVE_AFTER_MONTHS or turning it off
+    month = partitions.month_start(month)
+    if partitions.is_partitioned(db) and month not in partitions.attached_months(db):
+        partitions._create_partition(db, month)
+    archive_range = _month_range(transactions_archive, month)
+    restored = db.execute(
+        insert(Transaction.__table__).from_select(list(_COLUMNS), _archive_rows().where(*archive_range))
+    ).rowcount
+    db.execute(delete(transactions_archive).where(*archive_range))
+    db.commit()
+    return restored
+
+
+def archived_months(db: Session) -> list[tuple[date, int]]:
+    month = _month_of(db, transactions_archive.c.transaction_date)
+    rows = db.execute(select(month, func.count()).group_by(month).order_by(month)).all()
+    return [(date.fromisoformat(value), count) for value, count in rows]
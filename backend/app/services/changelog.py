@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.account import Account
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.change_log import ChangeLogEntry
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services import archive
+
+# Per-user change log behind GET /sync. Mutations call record() inside their transaction;
+# a client keeps the last version it saw and asks only for what changed after it.
+ACCOUNT = "account"
+CATEGORY = "category"
+TRANSACTION = "transaction"
+BUDGET = "budget"
+ENTITIES = (ACCOUNT, CATEGORY, TRANSACTION, BUDGET)
+
+UPSERT = "upsert"
+DELETE = "delete"
+# Too many rows changed to list (rate corrections); the client reloads the whole entity
+RESET = "reset"
+
+MAX_VERSIONS = 500
+
+_MODELS = {ACCOUNT: Account, CATEGORY: Category, TRANSACTION: Transaction, BUDGET: Budget}
+
+
+def _next_version(db: Session, user_id: int) -> int:
+    # Bumping the counter row-locks the user until commit, so one user's versions become
+    # visible in order: a client that has seen version N can't later miss one below N.
+    # updated_at is pinned so sync bookkeeping doesn't look like a profile edit.
+    return db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(change_version=User.change_version + 1, updated_at=User.updated_at)
+        .returning(User.change_version)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+
+
+def record(db: Session, user_id: int, entity: str, operation: str, ids: Iterable[int] = ()) -> int | None:
+    if operation == RESET:
+        entity_ids: list[int | None] = [None]
+    else:
+        entity_ids = list(dict.fromkeys(ids))
+        if not entity_ids:
+            return None
+    version = _next_version(db, user_id)
+    db.execute(
+        insert(ChangeLogEntry),
+        [
+            {"user_id": user_id, "version": version, "entity": entity, "entity_id": entity_id, "operation": operation}
+            for entity_id in entity_ids
+        ],
+    )
+    return version
+
+
+def record_for_users(db: Session, entity: str, operation: str, ids_by_user: dict[int, list[int]]) -> None:
+    # Ascending user ids, so concurrent multi-user writers take the user locks in one order
+    for user_id in sorted(ids_by_user):
+        record(db, user_id, entity, operation, ids_by_user[user_id])
+
+
+def current_version(db: Session, user_id: int) -> int:
+    return db.execute(select(User.change_version).where(User.id == user_id)).scalar_one()
+
+
+@dataclass
+class EntityDelta:
+    reset: bool = False
+    upserted: list = field(default_factory=list)
+    deleted: list[int] = field(default_factory=list)
+
+
+@dataclass
+class SyncResult:
+    version: int
+    has_more: bool = False
+    changes: dict[str, EntityDelta] = field(default_factory=dict)
+
+
+def _load(db: Session, user_id: int, entity: str, ids: list[int]) -> list:
+    model = _MODELS[entity]
+    if entity == TRANSACTION:
+        # Archived rows are still there for the client; only their category fields change
+        model = archive.transactions_source(None)
+    query = db.query(model).filter(model.user_id == user_id, model.id.in_(ids))
+    if entity == TRANSACTION:
+        query = query.options(selectinload(model.exchange_rate))
+    elif entity == BUDGET:
+        query = query.options(selectinload(Budget.items))
+    return query.order_by(model.id).all()
+
+
+def changes_since(db: Session, user_id: int, since: int | None, max_versions: int = MAX_VERSIONS) -> SyncResult:
+    current = current_version(db, user_id)
+    if since is None or since > current:
+        # First sync, or a cursor from another database: reload everything
+        return SyncResult(version=current, changes={entity: EntityDelta(reset=True) for entity in ENTITIES})
+
+    scope = (ChangeLogEntry.user_id == user_id, ChangeLogEntry.version > since)
+    upper = db.execute(
+        select(ChangeLogEntry.version)
+        .where(*scope)
+        .distinct()
+        .order_by(ChangeLogEntry.version)
+        .offset(max_versions - 1)
+        .limit(1)
+    ).scalar()
+    if upper is None or upper >= current:
+        upper, has_more = current, False
+    else:
+        has_more = True
+
+    entries = db.execute(
+        select(ChangeLogEntry.entity, ChangeLogEntry.entity_id, ChangeLogEntry.operation)
+        .where(*scope, ChangeLogEntry.version <= upper)
+        .order_by(ChangeLogEntry.version, ChangeLogEntry.id)
+    ).all()
+
+    resets: set[str] = set()
+    # Last operation per record wins: created then deleted is just a delete
+    latest: dict[str, dict[int, str]] = {entity: {} for entity in ENTITIES}
+    for entity, entity_id, operation in entries:
+        if operation == RESET:
+            resets.add(entity)
+        elif entity in latest:
+            latest[entity][entity_id] = operation
+
+    result = SyncResult(version=upper, has_more=has_more)
+    for entity in ENTITIES:
+        if entity in resets:
+            result.changes[entity] = EntityDelta(reset=True)
+            continue
+        delta = EntityDelta()
+        upserted = [entity_id for entity_id, operation in latest[entity].items() if operation == UPSERT]
+        delta.upserted = _load(db, user_id, entity, upserted) if upserted else []
+        found = {record.id for record in delta.upserted}
+        # An upsert whose row is gone was deleted by something outside the log (cascades)
+        delta.deleted = sorted(
+            entity_id for entity_id, operation in latest[entity].items() if operation == DELETE or entity_id not in found
+        )
+        result.changes[entity] = delta
+    return result
@@ -1,14 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable
-
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from app.crud import crud_account, crud_category
-from app.models.category import CategoryType
+from app.models.account import Account
+from app.models.category import Category, CategoryType
 from app.schemas.account import AccountCreate
-from app.schemas.category import CategoryCreate
 
 
 @dataclass(frozen=True)
@@ -133,30 +131,33 @@ DEFAULT_CATEGORIES: tuple[DefaultCategory, ...] = (
 )
 
 
-def _create_category_tree(
-    db: Session,
-    user_id: int,
-    defaults: Iterable[DefaultCategory],
-    parent_id: int | None = None,
-) -> None:
-    for item in defaults:
-        category = crud_category.create_category(
-            db,
-            user_id=user_id,
-            category_in=CategoryCreate(name=item.name, type=item.type, parent_id=parent_id),
-            is_default=True,
-        )
-        if item.children:
-            _create_category_tree(db, user_id, item.children, parent_id=category.id)
+def _category_row(user_id: int, item: DefaultCategory, parent_id: int | None = None) -> dict:
+    return {"user_id": user_id, "name": item.name, "type": item.type, "parent_id": parent_id, "is_default": True}
 
 
 def seed_defaults_for_user(db: Session, user_id: int) -> None:
     # Avoid duplicating defaults if they already exist
-    existing = crud_category.list_categories(db, user_id)
-    if existing:
+    if db.query(Category.id).filter(Category.user_id == user_id).first() is not None:
         return
 
-    _create_category_tree(db, user_id, DEFAULT_CATEGORIES)
+    # Whole tree in one transaction: roots in one multi-row INSERT ... RETURNING, then
+    # children and accounts in one statement each
+    parent_rows = db.execute(
+        insert(Category).returning(Category.id, Category.name),
+        [_category_row(user_id, item) for item in DEFAULT_CATEGORIES],
+    ).all()
+    parent_ids = {row.name: row.id for row in parent_rows}
+
+    child_rows = [
+        _category_row(user_id, child, parent_ids[item.name])
+        for item in DEFAULT_CATEGORIES
+        for child in item.children
+    ]
+    if child_rows:
+        db.execute(insert(Category), child_rows)
 
-    for account in DEFAULT_ACCOUNTS:
-        crud_account.create_account(db, user_id=user_id, account_in=account, is_default=True)
+    db.execute(
+        insert(Account),
+        [{**account.model_dump(), "user_id": user_id, "is_default": True} for account in DEFAULT_ACCOUNTS],
+    )
+    db.commit()
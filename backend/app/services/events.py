@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import engine
+
+try:  # pragma: no cover - only needed by the postgres backend
+    import psycopg
+except ImportError:  # pragma: no cover
+    psycopg = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Lightweight change notifications for the dashboard stream (GET /events). Write paths call
+# emit() inside their transaction; events are only published once it commits, so a rolled
+# back write never reaches a client. Payloads carry ids and counts, never amounts: clients
+# refetch whatever widgets depend on the event type.
+TRANSACTIONS_CHANGED = "transactions.changed"
+BUDGETS_CHANGED = "budgets.changed"
+RATES_UPDATED = "rates.updated"
+# Sent to a subscriber that fell behind and lost events; the client refetches everything
+RESYNC = "resync"
+
+CHANNEL = "finance_events"
+QUEUE_SIZE = 100
+_PENDING = "pending_events"
+
+
+@dataclass(frozen=True)
+class Event:
+    type: str
+    # None broadcasts to every subscriber (new exchange rates)
+    user_id: int | None
+    data: dict[str, Any] = field(default_factory=dict)
+
+    def to_json(self) -> str:
+        return json.dumps({"type": self.type, "user_id": self.user_id, "data": self.data}, default=str)
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Event":
+        raw = json.loads(payload)
+        return cls(type=raw["type"], user_id=raw.get("user_id"), data=raw.get("data") or {})
+
+
+class Subscription:
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def _put(self, item: Event) -> None:
+        if self.queue.full():
+            # Replace the backlog with a single resync rather than blocking the publisher
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            item = Event(RESYNC, self.user_id)
+        self.queue.put_nowait(item)
+
+    def deliver(self, item: Event) -> None:
+        # Publishers run on pool threads (sync endpoints, scheduler jobs)
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            pass  # event loop already closed
+
+
+class LocalBroker:
+    # In-process fan-out; enough with a single worker process
+    def __init__(self) -> None:
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def dispatch(self, item: Event) -> None:
+        with self._lock:
+            if item.user_id is None:
+                targets = [sub for subs in self._subscriptions.values() for sub in subs]
+            else:
+                targets = list(self._subscriptions.get(item.user_id, ()))
+        for subscription in targets:
+            subscription.deliver(item)
+
+    def before_commit(self, session: Session, events: list[Event]) -> bool:
+        # True when the events were handed over transactionally and need no after-commit step
+        return False
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class PostgresBroker(LocalBroker):
+    # NOTIFY inside the writing transaction (Postgres delivers it on commit) and one LISTEN
+    # connection per process that fans notifications out to local subscribers, so events
+    # reach every web worker and also come from the standalone scheduler.
+    def __init__(self) -> None:
+        super().__init__()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def before_commit(self, session: Session, events: list[Event]) -> bool:
+        if session.get_bind().dialect.name != "postgresql":
+            return False
+        connection = session.connection()
+        for item in events:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": item.to_json()})
+        return True
+
+    def start(self) -> None:
+        if psycopg is None or engine.dialect.name != "postgresql" or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self) -> None:
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as connection:
+                    connection.execute(f"LISTEN {CHANNEL}")
+                    while not self._stop.is_set():
+                        for notify in connection.notifies(timeout=1.0):
+                            self.dispatch(Event.from_json(notify.payload))
+            except Exception:  # noqa: BLE001 - reconnect; events in between are lost
+                logger.warning("Event listener disconnected; retrying", exc_info=True)
+                self._stop.wait(5)
+
+
+def _make_broker() -> LocalBroker:
+    if settings.events_backend == "postgres":
+        return PostgresBroker()
+    return LocalBroker()
+
+
+broker = _make_broker()
+
+
+def emit(db: Session, user_id: int | None, event_type: str, **data: Any) -> None:
+    db.info.setdefault(_PENDING, []).append(Event(event_type, user_id, data))
+
+
+@event.listens_for(Session, "before_commit")
+def _hand_over(session: Session) -> None:
+    pending = session.info.get(_PENDING)
+    if pending and broker.before_commit(session, pending):
+        session.info.pop(_PENDING, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session: Session) -> None:
+    for item in session.info.pop(_PENDING, ()):
+        broker.dispatch(item)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def format_sse(item: Event) -> str:
+    return f"event: {item.type}\ndata: {json.dumps(item.data, default=str)}\n\n"
@@ -1,17 +1,18 @@
 from __future__ import annotations
 
 import json
-from datetime import date, datetime
-from decimal import Decimal
-from typing import Any
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Iterable
 
-import httpx
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
 from app.crud import crud_exchange_rate
 from app.db.session import SessionLocal
-from app.models.exchange_rate import ExchangeRate
+from app.models.exchange_rate import ExchangeRate, ExchangeRateSource
 from app.models.transaction import Transaction
 from app.schemas.exchange_rate import (
     ExchangeRateCreate,
@@ -19,56 +20,72 @@ from app.schemas.exchange_rate import (
     ExchangeRateReprocessRequest,
     ExchangeRateValues,
 )
+from app.services import changelog, events
 from app.services.conversion import convert_amounts
+from app.services.rate_fetcher import ProviderResult, RateFetchError, rate_fetcher
+from app.utils.locks import SingleFlight, cross_process_lock
 
+logger = logging.getLogger(__name__)
 
-def _to_decimal(value: Any) -> Decimal:
-    return Decimal(str(value))
+_daily_rate_flight = SingleFlight()
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-refresh")
+_refresh_lock = threading.Lock()
+_refresh_future: Future[None] | None = None
 
 
-def fetch_remote_rates() -> tuple[ExchangeRateValues, dict[str, Any]]:
-    with httpx.Client(timeout=10.0) as client:
-        dolar_response = client.get(str(settings.dolar_api_url))
-        dolar_response.raise_for_status()
-        dolar_payload = dolar_response.json()
+def fetch_remote_rates() -> tuple[ExchangeRateValues, dict[str, Any], list[ProviderResult]]:
+    # The results of this fetch, not rate_fetcher.last_results, which overlapping fetches share
+    return rate_fetcher.fetch()
 
-        oficial_rate = None
-        blue_rate = None
-        for entry in dolar_payload:
-            if entry.get("casa") == "oficial":
-                oficial_rate = _to_decimal(entry.get("venta"))
-            if entry.get("casa") == "blue":
-                blue_rate = _to_decimal(entry.get("venta"))
 
-        if oficial_rate is None:
-            raise ValueError("No se pudo obtener la cotización oficial USD/ARS")
-
-        coingecko_response = client.get(
-            str(settings.coingecko_api_url),
-            params={"ids": "bitcoin", "vs_currencies": "usd,ars"},
-        )
-        coingecko_response.raise_for_status()
-        coingecko_payload = coingecko_response.json()
-        bitcoin_data = coingecko_payload.get("bitcoin")
-        if not bitcoin_data:
-            raise ValueError("No se pudo obtener la cotización de BTC")
-
-        btc_usd = _to_decimal(bitcoin_data.get("usd"))
-        btc_ars = _to_decimal(bitcoin_data.get("ars"))
-
-    values = ExchangeRateValues(
-        usd_ars_oficial=oficial_rate,
-        usd_ars_blue=blue_rate,
-        btc_usd=btc_usd,
-        btc_ars=btc_ars,
+def record_source_status(db_session: Session, results: Iterable[ProviderResult]) -> None:
+    by_name = {result.provider: result for result in results}
+    if not by_name:
+        return
+    sources = (
+        db_session.query(ExchangeRateSource)
+        .filter(ExchangeRateSource.name.in_(list(by_name)))
+        .all()
     )
+    length = ExchangeRateSource.last_status.type.length
+    for source in sources:
+        source.last_status = by_name[source.name].summary()[:length]
+        db_session.add(source)
+    db_session.commit()
 
-    metadata = {
-        "dolarapi": dolar_payload,
-        "coingecko": coingecko_payload,
-    }
 
-    return values, metadata
+def _fetch_and_store_rate(db_session: Session, effective_date: date) -> ExchangeRate:
+    # One lock for every date: the date is checked inside, and the flock fallback keeps one
+    # file per lock name
+    with cross_process_lock(db_session.get_bind(), "daily-rate"):
+        # Another worker may have stored the rate while we were waiting for the lock
+        existing = crud_exchange_rate.get_rate_by_date(db_session, effective_date)
+        if existing:
+            return existing
+
+        try:
+            values, metadata, results = fetch_remote_rates()
+        except RateFetchError as exc:
+            record_source_status(db_session, exc.results)
+            raise
+        record_source_status(db_session, results)
+        rate_in = ExchangeRateCreate(
+            effective_date=effective_date,
+            usd_ars_oficial=values.usd_ars_oficial,
+            usd_ars_blue=values.usd_ars_blue,
+            btc_usd=values.btc_usd,
+            btc_ars=values.btc_ars,
+            is_manual=False,
+            metadata_payload=json.dumps(metadata, default=str),
+        )
+        try:
+            return crud_exchange_rate.create_exchange_rate(db_session, rate_in)
+        except IntegrityError:
+            db_session.rollback()
+            existing = crud_exchange_rate.get_rate_by_date(db_session, effective_date)
+            if existing is None:
+                raise
+            return existing
 
 
 def ensure_daily_exchange_rate(db_session: Session | None = None) -> ExchangeRate:
@@ -83,23 +100,67 @@ def ensure_daily_exchange_rate(db_session: Session | None = None) -> ExchangeRat
         if existing:
             return existing
 
-        values, metadata = fetch_remote_rates()
-        rate_in = ExchangeRateCreate(
-            effective_date=today,
-            usd_ars_oficial=values.usd_ars_oficial,
-            usd_ars_blue=values.usd_ars_blue,
-            btc_usd=values.btc_usd,
-            btc_ars=values.btc_ars,
-            is_manual=False,
-            metadata_payload=json.dumps(metadata, default=str),
-        )
-        created = crud_exchange_rate.create_exchange_rate(db_session, rate_in)
-        return created
+        leader_rate: list[ExchangeRate] = []
+
+        def _run() -> int:
+            rate = _fetch_and_store_rate(db_session, today)
+            leader_rate.append(rate)
+            return rate.id
+
+        rate_id = _daily_rate_flight.do(today.isoformat(), _run)
+        if leader_rate:
+            return leader_rate[0]
+        # Followers re-read the leader's row through their own session
+        rate = crud_exchange_rate.get_exchange_rate(db_session, rate_id)
+        if rate is None:
+            raise ValueError("No exchange rate available")
+        return rate
     finally:
         if close_session:
             db_session.close()
 
 
+def _refresh_job() -> None:
+    try:
+        ensure_daily_exchange_rate()
+    except Exception:  # noqa: BLE001 - a failed refresh must never reach a request
+        logger.exception("Background exchange rate refresh failed")
+
+
+def request_rate_refresh() -> bool:
+    global _refresh_future
+    # Whether a refresh is queued or running; False if it already finished in the meantime
+    with _refresh_lock:
+        if _refresh_future is None or _refresh_future.done():
+            _refresh_future = _refresh_executor.submit(_refresh_job)
+    return is_refreshing()
+
+
+def is_refreshing() -> bool:
+    return _refresh_future is not None and not _refresh_future.done()
+
+
+def is_stale(rate: ExchangeRate, today: date | None = None) -> bool:
+    return rate.effective_date < (today or date.today())
+
+
+def rate_age_seconds(rate: ExchangeRate, now: datetime | None = None) -> int:
+    created_at = rate.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(tz=timezone.utc)
+    return max(int((now - created_at).total_seconds()), 0)
+
+
+def get_freshest_rate(db_session: Session) -> tuple[ExchangeRate | None, bool]:
+    # Serves whatever is stored right away; a stale or missing rate only schedules a refresh
+    rate = crud_exchange_rate.get_latest_rate(db_session)
+    refreshing = False
+    if rate is None or is_stale(rate):
+        refreshing = request_rate_refresh()
+    return rate, refreshing
+
+
 def pick_rates(
     db_session: Session,
     exchange_rate_id: int | None,
@@ -114,9 +175,7 @@ def pick_rates(
         exchange_rate = crud_exchange_rate.get_exchange_rate(db_session, exchange_rate_id)
 
     if exchange_rate is None and fallback_to_latest:
-        exchange_rate = crud_exchange_rate.get_latest_rate(db_session)
-        if exchange_rate is None:
-            exchange_rate = ensure_daily_exchange_rate(db_session)
+        exchange_rate, _ = get_freshest_rate(db_session)
 
     if exchange_rate is None:
         raise ValueError("No exchange rate available")
@@ -151,22 +210,38 @@ def reprocess_user_transactions(
         if target_rate is None:
             raise ValueError("Cotización no encontrada")
 
+    # Resolve every date-based rate with one query instead of one lookup per transaction
+    rates_by_date: dict[date, ExchangeRate] = {}
+    if request.match_by_date:
+        tx_dates = {tx.transaction_date.date() for tx in transactions}
+        candidates = (
+            db_session.query(ExchangeRate)
+            .filter(ExchangeRate.effective_date.in_(tx_dates), ExchangeRate.superseded_by_id.is_(None))
+            .order_by(ExchangeRate.effective_date, ExchangeRate.created_at)
+            .all()
+        )
+        rates_by_date = {rate.effective_date: rate for rate in candidates}
+
     processed = len(transactions)
     updated = 0
+    updated_ids: list[int] = []
     skipped = 0
 
     for tx in transactions:
-        # Skip manual transactions without exchange rate linkage
-        if request.exchange_rate_id is None and tx.exchange_rate_id is None:
-            skipped += 1
-            continue
-
-        rate_obj = target_rate
-        if rate_obj is None:
-            if tx.exchange_rate_id:
-                rate_obj = crud_exchange_rate.get_exchange_rate(db_session, tx.exchange_rate_id)
-            else:
-                rate_obj = crud_exchange_rate.get_rate_by_date(db_session, tx.transaction_date.date())
+        if request.match_by_date:
+            rate_obj = rates_by_date.get(tx.transaction_date.date())
+        else:
+            # Skip manual transactions without exchange rate linkage
+            if request.exchange_rate_id is None and tx.exchange_rate_id is None:
+                skipped += 1
+                continue
+
+            rate_obj = target_rate
+            if rate_obj is None:
+                if tx.exchange_rate_id:
+                    rate_obj = crud_exchange_rate.get_exchange_rate(db_session, tx.exchange_rate_id)
+                else:
+                    rate_obj = crud_exchange_rate.get_rate_by_date(db_session, tx.transaction_date.date())
 
         if rate_obj is None:
             skipped += 1
@@ -191,7 +266,11 @@ def reprocess_user_transactions(
         tx.amount_btc = amount_btc
         tx.exchange_rate_id = rate_obj.id
         db_session.add(tx)
+        updated_ids.append(tx.id)
         updated += 1
 
+    if updated:
+        changelog.record(db_session, user_id, changelog.TRANSACTION, changelog.UPSERT, updated_ids)
+        events.emit(db_session, user_id, events.TRANSACTIONS_CHANGED, count=updated)
     db_session.commit()
     return processed, updated, skipped
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from decimal import Decimal
+
+# Bump when the normalization changes so old fingerprints can be recomputed
+FINGERPRINT_VERSION = "1"
+
+
+def normalize_notes(notes: str | None) -> str:
+    return " ".join((notes or "").casefold().split())
+
+
+def transaction_fingerprint(
+    account_id: int | None,
+    transaction_date: datetime,
+    amount_original: Decimal,
+    currency_code: str,
+    notes: str | None,
+) -> str:
+    # Same movement on the same day, regardless of time of day, casing or spacing in the notes
+    if transaction_date.tzinfo is not None:
+        transaction_date = transaction_date.astimezone(timezone.utc)
+    parts = (
+        FINGERPRINT_VERSION,
+        str(account_id or ""),
+        transaction_date.date().isoformat(),
+        format(Decimal(amount_original).quantize(Decimal("0.00000001")), "f"),
+        currency_code.upper(),
+        normalize_notes(notes),
+    )
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
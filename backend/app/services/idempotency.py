@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud import crud_idempotency_key
+from app.db.session import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.services.profiling import token_subject
+
+# ``Idempotency-Key`` on the create endpoints: the first request with a key runs and its
+# response is stored; a retry with the same key and body gets that response back without
+# touching the endpoint. The key is claimed in its own committed row before the endpoint
+# runs, so a duplicate arriving meanwhile (same worker or another one) waits for the first
+# to finish and replays its response instead of running in parallel.
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+PATHS = frozenset(
+    {"/transactions/", "/transactions/import", "/transactions/bulk/update", "/transactions/bulk/delete", "/budgets/"}
+)
+# How long a duplicate waits for the first request before giving up with 409
+WAIT_SECONDS = 10.0
+_POLL_SECONDS = 0.1
+
+# Duplicates on this worker wake up as soon as the first request finishes instead of polling
+_in_flight: dict[tuple[str, str], asyncio.Event] = {}
+
+logger = logging.getLogger(__name__)
+
+
+def applies(request: Request) -> bool:
+    return request.method == "POST" and request.url.path in PATHS and HEADER in request.headers
+
+
+def request_hash(request: Request, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (request.method, request.url.path, request.url.query):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _claim(subject: str, key: str, request: Request, fingerprint: str) -> tuple[IdempotencyKey | None, bool]:
+    with SessionLocal() as db:
+        return crud_idempotency_key.claim_key(
+            db,
+            subject=subject,
+            key=key,
+            method=request.method,
+            path=request.url.path,
+            request_hash=fingerprint,
+            ttl=timedelta(hours=settings.idempotency_ttl_hours),
+            lock=timedelta(seconds=settings.idempotency_lock_seconds),
+        )
+
+
+def _load(subject: str, key: str) -> IdempotencyKey | None:
+    with SessionLocal() as db:
+        return crud_idempotency_key.get_key(db, subject, key)
+
+
+def _extend(record_id: int) -> bool:
+    locked_until = datetime.now(tz=timezone.utc) + timedelta(seconds=settings.idempotency_lock_seconds)
+    with SessionLocal() as db:
+        return crud_idempotency_key.extend_key(db, record_id, locked_until)
+
+
+def _complete(record_id: int, status_code: int, content_type: str | None, body: bytes) -> None:
+    with SessionLocal() as db:
+        if not crud_idempotency_key.complete_key(db, record_id, status_code, content_type, body):
+            logger.warning("Idempotency key %s was gone before its response could be stored", record_id)
+
+
+async def _keep_claimed(record_id: int) -> None:
+    # Push locked_until forward while the endpoint runs, so a slow request isn't taken for
+    # an abandoned one and run a second time by a retry
+    while True:
+        await asyncio.sleep(settings.idempotency_lock_seconds / 3)
+        if not await run_in_threadpool(_extend, record_id):
+            logger.warning("Idempotency key %s lost its claim while the request was running", record_id)
+            return
+
+
+def _release(record_id: int) -> None:
+    with SessionLocal() as db:
+        crud_idempotency_key.release_key(db, record_id)
+
+
+async def _wait(subject: str, key: str) -> IdempotencyKey | None:
+    # The finished record, the still unfinished one after WAIT_SECONDS, or None if released
+    deadline = time.monotonic() + WAIT_SECONDS
+    while True:
+        local = _in_flight.get((subject, key))
+        if local is not None:
+            try:
+                await asyncio.wait_for(local.wait(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(_POLL_SECONDS)
+        record = await run_in_threadpool(_load, subject, key)
+        if record is None or record.status_code is not None or time.monotonic() >= deadline:
+            return record
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    return Response(
+        content=record.body,
+        status_code=record.status_code,
+        media_type=record.content_type,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+async def handle(request: Request, call_next) -> Response:
+    key = request.headers[HEADER].strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": "Idempotency-Key inválida"})
+    subject = token_subject(request)
+    if subject is None:
+        # Unauthenticated: the endpoint answers 401 without writing anything
+        return await call_next(request)
+
+    fingerprint = request_hash(request, await request.body())
+    while True:
+        record, owner = await run_in_threadpool(_claim, subject, key, request, fingerprint)
+        if owner:
+            break
+        if record is not None and record.request_hash != fingerprint:
+            return JSONResponse(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                content={"detail": "La Idempotency-Key ya se usó con otra solicitud"},
+            )
+        if record is not None and record.status_code is None:
+            record = await _wait(subject, key)
+        if record is None:
+            continue
+        if record.status_code is None:
+            return JSONResponse(
+                status_code=status.HTTP_409_CONFLICT,
+                content={"detail": "Hay otra solicitud en curso con esta Idempotency-Key"},
+                headers={"Retry-After": "1"},
+            )
+        return _replay(record)
+
+    event = _in_flight[(subject, key)] = asyncio.Event()
+    heartbeat = asyncio.create_task(_keep_claimed(record.id))
+    try:
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+        except BaseException:
+            heartbeat.cancel()
+            await run_in_threadpool(_release, record.id)
+            raise
+        heartbeat.cancel()
+        if response.status_code >= 500:
+            # Nothing worth pinning the retry to; let it run again
+            await run_in_threadpool(_release, record.id)
+        else:
+            content_type = response.headers.get("content-type")
+            await run_in_threadpool(_complete, record.id, response.status_code, content_type, body)
+    finally:
+        heartbeat.cancel()
+        _in_flight.pop((subject, key), None)
+        event.set()
+    replayable = Response(content=body, status_code=response.status_code)
+    # raw_headers keeps repeated headers such as several Set-Cookie
+    replayable.raw_headers = list(response.raw_headers)
+    return replayable
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.utils.locks import cross_process_lock
+
+# Monthly range partitions of ``transactions`` on Postgres (migration 20261019_11). On other
+# dialects the table is a plain heap and every function here is a no-op or refuses politely.
+PARENT_TABLE = "transactions"
+DEFAULT_PARTITION = "transactions_default"
+_PARTITION_NAME = re.compile(r"^transactions_p(\d{4})_(\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"transactions_p{month:%Y_%m}"
+
+
+def _bound(month: date) -> str:
+    # Partition boundaries are UTC midnights regardless of the session's TimeZone
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def _current_month(today: date | None) -> date:
+    return month_start(today or datetime.now(tz=timezone.utc).date())
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(
+        db.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))"),
+            {"name": PARENT_TABLE},
+        ).scalar()
+    )
+
+
+def attached_months(db: Session) -> list[date]:
+    if not is_partitioned(db):
+        return []
+    names = db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:name)"
+        ),
+        {"name": PARENT_TABLE},
+    ).scalars()
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def _create_partition(db: Session, month: date) -> str:
+    name = partition_name(month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    # Built standalone and attached afterwards so rows already parked in the default
+    # partition for that month can be moved over; ATTACH refuses ranges the default overlaps
+    db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    # Writes to the default partition wait until the commit; one landing after the move
+    # would make ATTACH fail
+    db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+    db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE transaction_date >= CAST(:lower AS timestamptz) AND transaction_date < CAST(:upper AS timestamptz) "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    return name
+
+
+def ensure_partitions(db: Session, months_ahead: int | None = None, today: date | None = None) -> list[str]:
+    if not is_partitioned(db):
+        return []
+    months_ahead = settings.partition_months_ahead if months_ahead is None else months_ahead
+    current = _current_month(today)
+    created: list[str] = []
+    with cross_process_lock(db.get_bind(), "transaction-partitions"):
+        existing = set(attached_months(db))
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month not in existing:
+                created.append(_create_partition(db, month))
+        db.commit()
+    return created
+
+
+def detach_partition(db: Session, month: date, today: date | None = None) -> str:
+    # The detached table keeps its rows and name, ready to be dumped and dropped (or re-attached)
+    if not is_partitioned(db):
+        raise ValueError("La tabla de movimientos no está particionada")
+    month = month_start(month)
+    if month >= _current_month(today):
+        raise ValueError("Solo se pueden desacoplar meses ya cerrados")
+    if month not in attached_months(db):
+        raise ValueError("No existe una partición para ese mes")
+    name = partition_name(month)
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    db.commit()
+    return name
+
+
+def scanned_partitions(db: Session, statement) -> set[str]:
+    # Partitions the planner keeps after pruning, read off EXPLAIN (FORMAT JSON)
+    compiled = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    found: set[str] = set()
+
+    def walk(node: dict) -> None:
+        relation = node.get("Relation Name")
+        if relation and (relation == DEFAULT_PARTITION or _PARTITION_NAME.match(relation)):
+            found.add(relation)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return found
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict
+
+import jwt
+from fastapi import Request
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.crud import crud_request_profile
+from app.db.session import SessionLocal
+from app.models.request_profile import RequestProfile
+from app.utils.compression import compress_text, decompress_text
+from app.utils.profiling import RequestProfiler
+
+logger = logging.getLogger(__name__)
+
+# A request is profiled when an admin asks for it (``X-Profile: 1`` or ``?profile=1``) or when
+# its user was armed through /admin/profiling/targets. The token's subject is checked against
+# a cached list of admins and armed users before a profiler starts, so nobody else can take a
+# slot; the user resolved inside the request (deps.get_current_user) is checked again before
+# the profile is kept.
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# How long a worker trusts its copy of the armed targets
+TARGETS_TTL_SECONDS = 5.0
+
+_slots = threading.BoundedSemaphore(max(settings.profile_max_concurrent, 1))
+
+
+def requested(request: Request) -> bool:
+    return request.headers.get(PROFILE_HEADER) == "1" or request.query_params.get(PROFILE_QUERY_PARAM) == "1"
+
+
+def token_subject(request: Request) -> str | None:
+    # Same token lookup as deps.get_current_user, without the database round trip
+    token = request.cookies.get("access_token") or request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not token:
+        return None
+    try:
+        return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]).get("sub")
+    except jwt.PyJWTError:  # type: ignore[attr-defined]
+        return None
+
+
+class ArmedTargets:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._targets: dict[str, int] = {}
+        self.admins: frozenset[str] = frozenset()
+        self._loaded_at = float("-inf")
+
+    def current(self) -> dict[str, int] | None:
+        # None when stale; callers refresh() off the event loop
+        if time.monotonic() - self._loaded_at > self.ttl_seconds:
+            return None
+        return self._targets
+
+    def refresh(self) -> dict[str, int]:
+        try:
+            with SessionLocal() as db:
+                self._targets = crud_request_profile.active_targets(db)
+                self.admins = frozenset(crud_request_profile.active_admins(db))
+        except SQLAlchemyError:
+            logger.warning("Could not load profiling targets", exc_info=True)
+        self._loaded_at = time.monotonic()
+        return self._targets
+
+    def invalidate(self) -> None:
+        self._loaded_at = float("-inf")
+
+
+armed_targets = ArmedTargets(TARGETS_TTL_SECONDS)
+
+
+def begin() -> RequestProfiler | None:
+    # Bounded so a flood of X-Profile headers can't put a sampler thread on every request
+    if not _slots.acquire(blocking=False):
+        return None
+    profiler = RequestProfiler(interval=settings.profile_interval_ms / 1000)
+    profiler.start()
+    return profiler
+
+
+def end(profiler: RequestProfiler) -> None:
+    profiler.stop()
+    _slots.release()
+
+
+def encode_profile(profiler: RequestProfiler) -> tuple[str, bytes]:
+    return compress_text(
+        json.dumps(
+            {
+                "interval_ms": profiler.interval * 1000,
+                "stacks": dict(profiler.stacks.most_common()),
+                "statements": [asdict(statement) for statement in profiler.statements],
+                "dropped_statements": profiler.dropped_statements,
+            }
+        )
+    )
+
+
+def decode_profile(profile: RequestProfile) -> dict:
+    return json.loads(decompress_text(profile.encoding, profile.data))
+
+
+def collapsed_stacks(profile: RequestProfile) -> str:
+    # Input format of flamegraph.pl / speedscope
+    stacks = decode_profile(profile)["stacks"]
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+
+
+def save(profiler: RequestProfiler, request: Request, status_code: int, armed_user_id: int | None) -> int | None:
+    if profiler.user_id is None:
+        return None
+    if armed_user_id is None and not profiler.is_superuser:
+        return None
+    if armed_user_id is not None and profiler.user_id != armed_user_id:
+        return None
+
+    encoding, data = encode_profile(profiler)
+    profile = RequestProfile(
+        user_id=profiler.user_id,
+        method=request.method,
+        path=request.url.path[:500],
+        status_code=status_code,
+        duration_ms=profiler.duration_ms,
+        sql_ms=profiler.sql_ms,
+        statement_count=len(profiler.statements) + profiler.dropped_statements,
+        sample_count=profiler.sample_count,
+        encoding=encoding,
+        data=data,
+    )
+    with SessionLocal() as db:
+        if armed_user_id is not None and not crud_request_profile.consume_target(db, armed_user_id):
+            # Another worker used up the last request of the target
+            armed_targets.invalidate()
+            return None
+        crud_request_profile.create_profile(db, profile, keep=settings.profile_keep)
+        return profile.id
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Iterator
+
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import Session
+
+from app.crud import crud_transaction
+from app.models.account import Account
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.defaults import seed_defaults_for_user
+from app.services.reporting import ReportFilters, build_category_report, build_summary, build_timeseries
+
+# Query plans of the hot query shapes, captured from the real crud/reporting code paths
+# (every statement they send is re-run under EXPLAIN) and checked against expectations.
+_SQLITE_STEP = re.compile(
+    r"^(?P<operation>SCAN|SEARCH) (?P<relation>\w+)(?: AS \w+)?"
+    r"(?: USING (?:COVERING )?INDEX (?P<index>\w+)| USING (?P<pk>INTEGER PRIMARY KEY))?"
+    r"(?: \((?P<condition>.*)\))?"
+)
+_PARTITION = re.compile(r"^transactions_(p\d{4}_\d{2}|default)$")
+
+
+@dataclass(frozen=True)
+class PlanNode:
+    operation: str
+    relation: str | None = None
+    index: str | None = None
+    # Index (or bitmap recheck) condition; filters applied after reading rows don't count
+    condition: str | None = None
+
+    @property
+    def is_seq_scan(self) -> bool:
+        return self.relation is not None and self.index is None and self.operation in {"Seq Scan", "SCAN"}
+
+    def is_keyed_on(self, column: str) -> bool:
+        return not self.is_seq_scan and bool(self.condition) and column in self.condition
+
+
+@dataclass
+class StatementPlan:
+    sql: str
+    nodes: list[PlanNode]
+    raw: Any
+
+    def touches(self, relation: str) -> bool:
+        return any(node.relation == relation for node in self.nodes)
+
+
+@dataclass(frozen=True)
+class Expectation:
+    # Relations that must never be read with a full scan
+    no_seq_scan: tuple[str, ...] = ("transactions",)
+    # Every read of transactions must seek on user_id, not merely avoid a full scan: an index
+    # on another leading column (e.g. a skip scan over recurring_id) still reads every user
+    user_scoped: bool = True
+    # At least one of these indexes must show up in the plan
+    uses_index: tuple[str, ...] = ()
+
+
+@dataclass
+class QueryPlanReport:
+    name: str
+    dialect: str
+    statements: list[StatementPlan] = field(default_factory=list)
+    violations: list[str] = field(default_factory=list)
+
+
+def _relation(name: str | None) -> str | None:
+    # Postgres reports partitions (20261019_11); assertions are written against the parent
+    if name and _PARTITION.match(name):
+        return "transactions"
+    return name
+
+
+def _postgres_nodes(plan: dict) -> list[PlanNode]:
+    nodes = [
+        PlanNode(
+            plan["Node Type"],
+            _relation(plan.get("Relation Name")),
+            plan.get("Index Name"),
+            plan.get("Index Cond") or plan.get("Recheck Cond"),
+        )
+    ]
+    for child in plan.get("Plans", []):
+        nodes.extend(_postgres_nodes(child))
+    return nodes
+
+
+def _sqlite_nodes(rows) -> list[PlanNode]:
+    nodes = []
+    for row in rows:
+        detail = row[-1]
+        match = _SQLITE_STEP.match(detail)
+        if match is None:
+            nodes.append(PlanNode(detail))
+            continue
+        index = match.group("index") or ("PRIMARY KEY" if match.group("pk") else None)
+        nodes.append(PlanNode(match.group("operation"), match.group("relation"), index, match.group("condition")))
+    return nodes
+
+
+def _explain(connection, sql: str, parameters) -> StatementPlan:
+    if connection.dialect.name == "postgresql":
+        raw = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", parameters).scalar()
+        return StatementPlan(sql=sql, nodes=_postgres_nodes(raw[0]["Plan"]), raw=raw)
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters).all()
+    return StatementPlan(sql=sql, nodes=_sqlite_nodes(rows), raw=[row[-1] for row in rows])
+
+
+@contextmanager
+def _captured(db: Session) -> Iterator[list[tuple[str, Any]]]:
+    connection = db.connection()
+    statements: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+
+def _recent_range() -> tuple[datetime, datetime]:
+    end = datetime.now(tz=timezone.utc)
+    return end - timedelta(days=90), end
+
+
+def _list(db: Session, user_id: int) -> None:
+    start, end = _recent_range()
+    crud_transaction.list_transactions(db, user_id, start=start, end=end, limit=50)
+
+
+def _search(db: Session, user_id: int) -> None:
+    crud_transaction.list_transactions(db, user_id, search="super", limit=50)
+
+
+def _fingerprints(db: Session, user_id: int) -> None:
+    crud_transaction.find_existing_fingerprints(db, user_id, ["0" * 64])
+
+
+def _summary(db: Session, user_id: int) -> None:
+    start, end = _recent_range()
+    build_summary(db, currency="ARS", filters=ReportFilters(user_id=user_id, start=start, end=end))
+
+
+def _timeseries(db: Session, user_id: int) -> None:
+    start, end = _recent_range()
+    build_timeseries(db, currency="ARS", filters=ReportFilters(user_id=user_id, start=start - timedelta(days=275), end=end))
+
+
+def _categories(db: Session, user_id: int) -> None:
+    start, end = _recent_range()
+    build_category_report(db, currency="ARS", filters=ReportFilters(user_id=user_id, start=start, end=end))
+
+
+HOT_QUERIES: dict[str, tuple[Callable[[Session, int], None], Expectation]] = {
+    "transactions.list": (_list, Expectation()),
+    "transactions.search": (_search, Expectation()),
+    "transactions.fingerprints": (_fingerprints, Expectation(uses_index=("ix_transactions_user_fingerprint",))),
+    "reports.summary": (_summary, Expectation()),
+    "reports.timeseries": (_timeseries, Expectation()),
+    "reports.categories": (_categories, Expectation()),
+}
+
+
+def _violations(plans: list[StatementPlan], expectation: Expectation) -> list[str]:
+    violations = []
+    for plan in plans:
+        for node in plan.nodes:
+            if node.is_seq_scan and node.relation in expectation.no_seq_scan:
+                violations.append(f"seq scan on {node.relation}")
+            elif expectation.user_scoped and node.relation == "transactions" and not node.is_keyed_on("user_id"):
+                violations.append(f"transactions read without a user_id seek ({node.index or node.operation})")
+    if expectation.uses_index:
+        used = {node.index for plan in plans for node in plan.nodes if node.index}
+        if not used.intersection(expectation.uses_index):
+            violations.append(f"none of {', '.join(expectation.uses_index)} used")
+    return violations
+
+
+def explain_hot_query(db: Session, name: str, user_id: int) -> QueryPlanReport:
+    if name not in HOT_QUERIES:
+        raise ValueError("Consulta desconocida")
+    run, expectation = HOT_QUERIES[name]
+    with _captured(db) as statements:
+        run(db, user_id)
+    connection = db.connection()
+    plans = [_explain(connection, sql, parameters) for sql, parameters in statements]
+    # Only statements that read transactions are the hot path; the rest are lookups
+    plans = [plan for plan in plans if plan.touches("transactions")]
+    return QueryPlanReport(
+        name=name,
+        dialect=connection.dialect.name,
+        statements=plans,
+        violations=_violations(plans, expectation),
+    )
+
+
+def explain_hot_queries(db: Session, user_id: int) -> list[QueryPlanReport]:
+    return [explain_hot_query(db, name, user_id) for name in HOT_QUERIES]
+
+
+def seed_dataset(db: Session, users: int = 5, rows_per_user: int = 2000) -> int:
+    # Several users with a couple of years of movements each, so user-scoped plans are
+    # chosen over a table where the user's rows are a small fraction (ANALYZE afterwards)
+    target = None
+    for index in range(users):
+        user = User(email=f"plans-{index}-{datetime.now(tz=timezone.utc).timestamp()}@example.com", hashed_password="!")
+        db.add(user)
+        db.flush()
+        seed_defaults_for_user(db, user.id)
+        account_id = db.query(Account.id).filter(Account.user_id == user.id).first()[0]
+        category_ids = [row[0] for row in db.query(Category.id).filter(Category.user_id == user.id).all()]
+        now = datetime.now(tz=timezone.utc)
+        payload = []
+        for position in range(rows_per_user):
+            category_id = category_ids[position % len(category_ids)]
+            amount = Decimal(100 + position % 997)
+            payload.append(
+                {
+                    "user_id": user.id,
+                    "account_id": account_id,
+                    "category_id": category_id,
+                    "root_category_id": category_id,
+                    "effective_type": ("expense", "income")[position % 5 == 0],
+                    "transaction_date": now - timedelta(hours=position * 9),
+                    "currency_code": "ARS",
+                    "rate_type": "official",
+                    "amount_original": amount,
+                    "amount_ars": amount,
+                    "amount_usd": amount / 1000,
+                    "amount_btc": amount / 60000000,
+                    "notes": ("supermercado", "alquiler", "sueldo")[position % 3],
+                    "fingerprint": f"{user.id:08d}{position:056d}",
+                }
+            )
+        db.execute(insert(Transaction), payload)
+        target = target or user.id
+    db.commit()
+    db.execute(text("ANALYZE transactions" if db.get_bind().dialect.name == "postgresql" else "ANALYZE"))
+    return target
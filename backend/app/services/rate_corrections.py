@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Numeric, Table, case, func, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_rate_correction
+from app.db.session import SessionLocal
+from app.models.exchange_rate import ExchangeRate
+from app.models.rate_correction import RateCorrection
+from app.models.transaction import Transaction
+from app.models.transaction_archive import transactions_archive
+from app.schemas.exchange_rate import ExchangeRateCorrectionRequest, ExchangeRateValues
+from app.services import changelog, events
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[[], Session]
+
+# Corrections run one at a time; each one fans its batches out over its own pool
+_job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-correction")
+
+
+def create_correction(
+    db: Session,
+    rate: ExchangeRate,
+    correction: ExchangeRateCorrectionRequest,
+    requested_by_id: int | None = None,
+) -> RateCorrection:
+    if rate.superseded_by_id is not None:
+        raise ValueError("La cotización ya fue reemplazada")
+    if crud_rate_correction.get_active_for_rate(db, rate.id) is not None:
+        raise ValueError("Ya hay una corrección en curso para esa cotización")
+
+    values = ExchangeRateValues.model_validate(correction.model_dump(exclude={"mode"}))
+    replacement: ExchangeRate | None = None
+    if correction.mode == "supersede":
+        replacement = ExchangeRate(effective_date=rate.effective_date, is_manual=True, **values.model_dump())
+        db.add(replacement)
+        db.flush()
+        rate.superseded_by_id = replacement.id
+    else:
+        for field, value in values.model_dump().items():
+            setattr(rate, field, value)
+    db.add(rate)
+
+    job = RateCorrection(
+        exchange_rate_id=rate.id,
+        replacement_rate_id=replacement.id if replacement else None,
+        requested_by_id=requested_by_id,
+        mode=correction.mode,
+        status="pending",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _decimal(value):
+    return literal(value, Numeric(20, 8))
+
+
+def _converted_values(rates: ExchangeRateValues, target_rate_id: int, table: Table) -> dict:
+    # Same arithmetic as services.conversion.convert_amounts, as one set-based UPDATE
+    amount = table.c.amount_original
+    code = table.c.currency_code
+    oficial = _decimal(rates.usd_ars_oficial)
+    blue = _decimal(rates.usd_ars_blue or rates.usd_ars_oficial)
+    usd_rate = case((table.c.rate_type == "blue", blue), else_=oficial)
+    btc_usd = _decimal(rates.btc_usd)
+    btc_ars = _decimal(rates.btc_ars)
+
+    amount_ars = case((code == "ARS", amount), (code == "USD", amount * usd_rate), else_=amount * btc_ars)
+    amount_usd = case((code == "USD", amount), (code == "ARS", amount / usd_rate), else_=amount * btc_usd)
+    amount_btc = case((code == "BTC", amount), (code == "ARS", amount / btc_ars), else_=amount / btc_usd)
+    return {
+        "amount_ars": func.round(amount_ars, 8),
+        "amount_usd": func.round(amount_usd, 8),
+        "amount_btc": func.round(amount_btc, 8),
+        "exchange_rate_id": target_rate_id,
+    }
+
+
+def _batch_bounds(db: Session, rate_id: int, batch_size: int) -> list[tuple[int, int | None]]:
+    # Every batch_size-th id of the affected rows (read off the exchange_rate_id index)
+    numbered = (
+        select(
+            Transaction.id.label("id"),
+            func.row_number().over(order_by=Transaction.id).label("position"),
+        )
+        .where(Transaction.exchange_rate_id == rate_id)
+        .subquery()
+    )
+    starts = list(
+        db.execute(
+            select(numbered.c.id).where((numbered.c.position - 1) % batch_size == 0).order_by(numbered.c.id)
+        ).scalars()
+    )
+    return [(start, starts[index + 1] if index + 1 < len(starts) else None) for index, start in enumerate(starts)]
+
+
+def _run_batch(
+    session_factory: SessionFactory,
+    table: Table,
+    rate_id: int,
+    values: dict,
+    lower: int | None = None,
+    upper: int | None = None,
+) -> int:
+    session = session_factory()
+    try:
+        statement = (
+            update(table)
+            .where(table.c.exchange_rate_id == rate_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if lower is not None:
+            statement = statement.where(table.c.id >= lower)
+        if upper is not None:
+            statement = statement.where(table.c.id < upper)
+        updated = session.execute(statement).rowcount
+        session.commit()
+        return updated
+    finally:
+        session.close()
+
+
+def _affected_by_user(db: Session, rate_id: int) -> dict[int, int]:
+    rows = union_all(
+        *(
+            select(table.c.user_id).where(table.c.exchange_rate_id == rate_id)
+            for table in (Transaction.__table__, transactions_archive)
+        )
+    ).subquery()
+    counts = db.execute(select(rows.c.user_id, func.count()).group_by(rows.c.user_id)).all()
+    return {user_id: count for user_id, count in counts}
+
+
+def run_correction(
+    correction_id: int,
+    session_factory: SessionFactory = SessionLocal,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    stale_before: datetime | None = None,
+) -> None:
+    workers = workers or settings.rate_correction_workers
+    batch_size = batch_size or settings.rate_correction_batch_size
+
+    db = session_factory()
+    try:
+        if not crud_rate_correction.claim_correction(db, correction_id, stale_before):
+            # Gone, finished, or already taken by another worker
+            return
+        job = crud_rate_correction.get_correction(db, correction_id)
+        rate = db.get(ExchangeRate, job.replacement_rate_id or job.exchange_rate_id)
+        rates = ExchangeRateValues(
+            usd_ars_oficial=rate.usd_ars_oficial,
+            usd_ars_blue=rate.usd_ars_blue,
+            btc_usd=rate.btc_usd,
+            btc_ars=rate.btc_ars,
+        )
+
+        if job.report is None:
+            affected = _affected_by_user(db, job.exchange_rate_id)
+            job.total = sum(affected.values())
+            job.report = json.dumps(affected)
+        else:
+            # Resumed after its worker died. Batches only rewrite amounts, so whatever still
+            # points at the old rate is simply done again; "update" mode rewrites every row
+            affected = job.affected_by_user
+            if job.mode == "update":
+                job.updated = job.processed = 0
+        bounds = _batch_bounds(db, job.exchange_rate_id, batch_size)
+        db.commit()
+
+        def progress(updated: int) -> None:
+            job.updated += updated
+            job.processed = job.updated
+            job.heartbeat_at = datetime.now(tz=timezone.utc)
+            db.commit()
+
+        live = Transaction.__table__
+        values = _converted_values(rates, rate.id, live)
+        try:
+            if workers <= 1:
+                for lower, upper in bounds:
+                    progress(_run_batch(session_factory, live, job.exchange_rate_id, values, lower, upper))
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rate-correction-batch") as pool:
+                    futures = [
+                        pool.submit(_run_batch, session_factory, live, job.exchange_rate_id, values, lower, upper)
+                        for lower, upper in bounds
+                    ]
+                    for future in as_completed(futures):
+                        progress(future.result())
+            # Archived months are read back into reports, so they follow the corrected rate too.
+            # One pass: the archive has no exchange_rate_id index to batch on and nobody writes to it
+            archive_values = _converted_values(rates, rate.id, transactions_archive)
+            progress(_run_batch(session_factory, transactions_archive, job.exchange_rate_id, archive_values))
+        except Exception as exc:  # noqa: BLE001 - surface the failure on the job row
+            db.rollback()
+            logger.exception("Rate correction %s failed", correction_id)
+            job.status = "failed"
+            job.error = str(exc)[:500]
+        else:
+            job.status = "completed"
+            for user_id, count in sorted(affected.items()):
+                # Possibly millions of rows: tell sync clients to reload instead of listing them
+                changelog.record(db, user_id, changelog.TRANSACTION, changelog.RESET)
+                events.emit(db, user_id, events.TRANSACTIONS_CHANGED, count=count)
+        job.finished_at = datetime.now(tz=timezone.utc)
+        db.commit()
+    finally:
+        db.close()
+
+
+def submit_correction(correction_id: int, stale_before: datetime | None = None) -> None:
+    _job_executor.submit(run_correction, correction_id, stale_before=stale_before)
+
+
+def resume_stale_corrections(db: Session) -> list[int]:
+    # Jobs only live in the executor of the worker that accepted them; one left pending or
+    # running by a crash or deploy would otherwise block corrections of its rate forever
+    stale_before = datetime.now(tz=timezone.utc) - timedelta(minutes=settings.rate_correction_stale_minutes)
+    stale = crud_rate_correction.stale_corrections(db, stale_before)
+    for correction_id in stale:
+        submit_correction(correction_id, stale_before=stale_before)
+    return stale
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Coroutine, TypeVar
+
+import httpx
+
+from app.core.config import settings
+from app.schemas.exchange_rate import ExchangeRateValues
+
+T = TypeVar("T")
+
+DOLARAPI = "DolarAPI"
+COINGECKO = "Coingecko"
+
+
+@dataclass(frozen=True)
+class RateProvider:
+    # ``name`` matches ExchangeRateSource.name so results can be persisted per source
+    name: str
+    url: str
+    timeout: float
+    params: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class ProviderResult:
+    provider: str
+    status: str
+    latency_ms: int
+    attempts: int = 0
+    payload: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def summary(self) -> str:
+        text = f"{self.status} {self.latency_ms}ms"
+        if self.error:
+            text = f"{text} {self.error}"
+        return text
+
+
+class RateFetchError(Exception):
+    def __init__(self, message: str, results: list[ProviderResult]):
+        super().__init__(message)
+        self.results = results
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def default_providers() -> tuple[RateProvider, ...]:
+    return (
+        RateProvider(
+            name=DOLARAPI,
+            url=str(settings.dolar_api_url),
+            timeout=settings.dolar_api_timeout,
+        ),
+        RateProvider(
+            name=COINGECKO,
+            url=str(settings.coingecko_api_url),
+            timeout=settings.coingecko_api_timeout,
+            params={"ids": "bitcoin", "vs_currencies": "usd,ars"},
+        ),
+    )
+
+
+def _to_decimal(value: Any) -> Decimal:
+    return Decimal(str(value))
+
+
+def parse_dolarapi(payload: Any) -> tuple[Decimal, Decimal | None]:
+    oficial_rate = None
+    blue_rate = None
+    for entry in payload:
+        if entry.get("casa") == "oficial":
+            oficial_rate = _to_decimal(entry.get("venta"))
+        if entry.get("casa") == "blue":
+            blue_rate = _to_decimal(entry.get("venta"))
+
+    if oficial_rate is None:
+        raise ValueError("No se pudo obtener la cotización oficial USD/ARS")
+    return oficial_rate, blue_rate
+
+
+def parse_coingecko(payload: Any) -> tuple[Decimal, Decimal]:
+    bitcoin_data = payload.get("bitcoin")
+    if not bitcoin_data:
+        raise ValueError("No se pudo obtener la cotización de BTC")
+    return _to_decimal(bitcoin_data.get("usd")), _to_decimal(bitcoin_data.get("ars"))
+
+
+# Providers are queried concurrently over one pooled AsyncClient that lives on a private
+# event loop thread, so sync callers (scheduler, threadpool handlers) share the same pool.
+class RateFetcher:
+    def __init__(
+        self,
+        providers: tuple[RateProvider, ...] | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        retries: int | None = None,
+        backoff: float | None = None,
+        failure_threshold: int | None = None,
+        reset_timeout: float | None = None,
+    ):
+        self._providers = providers
+        self._transport = transport
+        self.retries = settings.rate_fetch_retries if retries is None else retries
+        self.backoff = settings.rate_fetch_backoff if backoff is None else backoff
+        self._failure_threshold = (
+            settings.rate_breaker_threshold if failure_threshold is None else failure_threshold
+        )
+        self._reset_timeout = settings.rate_breaker_reset_seconds if reset_timeout is None else reset_timeout
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.last_results: dict[str, ProviderResult] = {}
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def providers(self) -> tuple[RateProvider, ...]:
+        return self._providers or default_providers()
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(self._failure_threshold, self._reset_timeout)
+        return self.breakers[name]
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="rate-fetcher", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=4),
+            )
+        return self._client
+
+    async def _fetch_provider(self, provider: RateProvider) -> ProviderResult:
+        breaker = self.breaker(provider.name)
+        if not breaker.allow():
+            return ProviderResult(provider=provider.name, status="circuit_open", latency_ms=0)
+
+        client = self._get_client()
+        started = time.perf_counter()
+        error: str | None = None
+        attempts = 0
+        for attempt in range(self.retries + 1):
+            attempts = attempt + 1
+            try:
+                response = await client.get(provider.url, params=provider.params, timeout=provider.timeout)
+                response.raise_for_status()
+                payload = response.json()
+            except (httpx.HTTPError, ValueError) as exc:
+                error = type(exc).__name__
+                if attempt < self.retries:
+                    # Full jitter keeps retries from several workers from lining up
+                    await asyncio.sleep(random.uniform(0, self.backoff * (2**attempt)))
+                continue
+            breaker.record_success()
+            return ProviderResult(
+                provider=provider.name,
+                status="ok",
+                latency_ms=int((time.perf_counter() - started) * 1000),
+                attempts=attempts,
+                payload=payload,
+            )
+
+        breaker.record_failure()
+        return ProviderResult(
+            provider=provider.name,
+            status="error",
+            latency_ms=int((time.perf_counter() - started) * 1000),
+            attempts=attempts,
+            error=error,
+        )
+
+    async def _fetch_all(self) -> list[ProviderResult]:
+        results = await asyncio.gather(*(self._fetch_provider(provider) for provider in self.providers))
+        for result in results:
+            self.last_results[result.provider] = result
+        return list(results)
+
+    async def fetch_async(self) -> tuple[ExchangeRateValues, dict[str, Any], list[ProviderResult]]:
+        results = await asyncio.wrap_future(self._submit(self._fetch_all()))
+        return self._build_values(results)
+
+    def fetch(self) -> tuple[ExchangeRateValues, dict[str, Any], list[ProviderResult]]:
+        results = self._submit(self._fetch_all()).result()
+        return self._build_values(results)
+
+    def _build_values(
+        self, results: list[ProviderResult]
+    ) -> tuple[ExchangeRateValues, dict[str, Any], list[ProviderResult]]:
+        by_name = {result.provider: result for result in results}
+        failed = [result for result in results if not result.ok]
+        if failed:
+            names = ", ".join(f"{result.provider} ({result.status})" for result in failed)
+            raise RateFetchError(f"No se pudieron obtener cotizaciones: {names}", results)
+
+        try:
+            oficial_rate, blue_rate = parse_dolarapi(by_name[DOLARAPI].payload)
+            btc_usd, btc_ars = parse_coingecko(by_name[COINGECKO].payload)
+        except (AttributeError, KeyError, TypeError, ValueError) as exc:
+            raise RateFetchError(str(exc), results) from exc
+
+        values = ExchangeRateValues(
+            usd_ars_oficial=oficial_rate,
+            usd_ars_blue=blue_rate,
+            btc_usd=btc_usd,
+            btc_ars=btc_ars,
+        )
+        metadata = {
+            "dolarapi": by_name[DOLARAPI].payload,
+            "coingecko": by_name[COINGECKO].payload,
+        }
+        return values, metadata, results
+
+    def close(self) -> None:
+        with self._lock:
+            loop, client = self._loop, self._client
+            self._loop, self._thread, self._client = None, None, None
+        if loop is None:
+            return
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def _default_transport() -> httpx.AsyncBaseTransport | None:
+    if settings.rate_provider_transport == "fixture":
+        from app.services.rate_fixtures import recorded_transport
+
+        return recorded_transport()
+    return None
+
+
+rate_fetcher = RateFetcher(transport=_default_transport())
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from typing import Any
+
+import httpx
+
+# Responses recorded from DolarAPI and CoinGecko, trimmed to the fields we parse.
+RECORDED_RESPONSES: dict[str, Any] = {
+    "dolarapi.com": [
+        {
+            "moneda": "USD",
+            "casa": "oficial",
+            "nombre": "Oficial",
+            "compra": 955.5,
+            "venta": 995.5,
+            "fechaActualizacion": "2024-10-18T15:00:00.000Z",
+        },
+        {
+            "moneda": "USD",
+            "casa": "blue",
+            "nombre": "Blue",
+            "compra": 1175,
+            "venta": 1195,
+            "fechaActualizacion": "2024-10-18T15:00:00.000Z",
+        },
+        {
+            "moneda": "USD",
+            "casa": "bolsa",
+            "nombre": "Bolsa",
+            "compra": 1153.4,
+            "venta": 1157.1,
+            "fechaActualizacion": "2024-10-18T15:00:00.000Z",
+        },
+    ],
+    "api.coingecko.com": {"bitcoin": {"usd": 68320, "ars": 66412000}},
+}
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+# Offline stand-in for the rate providers, keyed by request host. ``overrides`` replaces the
+# recorded body for a host, or takes a callable that builds the response (errors, flapping).
+def recorded_transport(
+    overrides: Mapping[str, Handler | Any] | None = None,
+) -> httpx.MockTransport:
+    responses: dict[str, Handler | Any] = {**RECORDED_RESPONSES, **(overrides or {})}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        entry = responses.get(request.url.host)
+        if entry is None:
+            return httpx.Response(404, json={"error": f"sin fixture para {request.url.host}"})
+        if callable(entry):
+            return entry(request)
+        return httpx.Response(200, json=entry)
+
+    return httpx.MockTransport(handler)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator, Protocol, TextIO
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.exchange_rate import ExchangeRate, ExchangeRateSource
+
+BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class HistoricalRate:
+    effective_date: date
+    usd_ars_oficial: Decimal
+    usd_ars_blue: Decimal | None
+    btc_usd: Decimal
+    btc_ars: Decimal
+
+
+class HistoricalRateProvider(Protocol):
+    # ``name`` becomes the ExchangeRateSource the imported rows are attributed to
+    name: str
+
+    def fetch_range(self, start: date, end: date) -> Iterable[HistoricalRate]: ...
+
+
+def _decimal(value: str | None, field: str, line: int, required: bool = True) -> Decimal | None:
+    if value is None or not value.strip():
+        if required:
+            raise ValueError(f"Línea {line}: falta {field}")
+        return None
+    try:
+        parsed = Decimal(value.strip())
+    except InvalidOperation as exc:
+        raise ValueError(f"Línea {line}: {field} inválido") from exc
+    if parsed <= 0:
+        raise ValueError(f"Línea {line}: {field} debe ser positivo")
+    return parsed
+
+
+class CsvRateProvider:
+    # Expects a header with date,usd_ars_oficial,usd_ars_blue,btc_usd,btc_ars (blue optional)
+    def __init__(self, content: str | TextIO, name: str = "CSV import"):
+        self.name = name
+        self._content = content
+
+    def _rows(self) -> Iterator[HistoricalRate]:
+        handle = io.StringIO(self._content) if isinstance(self._content, str) else self._content
+        reader = csv.DictReader(handle)
+        required = {"date", "usd_ars_oficial", "btc_usd", "btc_ars"}
+        missing = required - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"Faltan columnas: {', '.join(sorted(missing))}")
+        for row in reader:
+            line = reader.line_num
+            try:
+                effective_date = date.fromisoformat(row["date"].strip())
+            except (AttributeError, ValueError) as exc:
+                raise ValueError(f"Línea {line}: fecha inválida") from exc
+            yield HistoricalRate(
+                effective_date=effective_date,
+                usd_ars_oficial=_decimal(row.get("usd_ars_oficial"), "usd_ars_oficial", line),
+                usd_ars_blue=_decimal(row.get("usd_ars_blue"), "usd_ars_blue", line, required=False),
+                btc_usd=_decimal(row.get("btc_usd"), "btc_usd", line),
+                btc_ars=_decimal(row.get("btc_ars"), "btc_ars", line),
+            )
+
+    def fetch_range(self, start: date, end: date) -> Iterable[HistoricalRate]:
+        return [rate for rate in self._rows() if start <= rate.effective_date <= end]
+
+
+def _date_range(start: date, end: date) -> Iterator[date]:
+    current = start
+    while current <= end:
+        yield current
+        current += timedelta(days=1)
+
+
+def _covered_dates(db: Session, start: date, end: date) -> set[date]:
+    rows = (
+        db.query(ExchangeRate.effective_date)
+        .filter(ExchangeRate.effective_date >= start, ExchangeRate.effective_date <= end)
+        .distinct()
+        .all()
+    )
+    return {row.effective_date for row in rows}
+
+
+def find_missing_dates(db: Session, start: date, end: date) -> list[date]:
+    if end < start:
+        raise ValueError("El rango es inválido")
+    covered = _covered_dates(db, start, end)
+    return [day for day in _date_range(start, end) if day not in covered]
+
+
+def _get_or_create_source(db: Session, name: str) -> ExchangeRateSource:
+    source = db.query(ExchangeRateSource).filter(ExchangeRateSource.name == name).first()
+    if source is None:
+        source = ExchangeRateSource(name=name)
+        db.add(source)
+        db.flush()
+    return source
+
+
+def _fill_forward(rates: list[HistoricalRate], start: date, end: date) -> list[HistoricalRate]:
+    # Weekends and holidays carry the previous business day's quote
+    by_date = {rate.effective_date: rate for rate in rates}
+    filled: list[HistoricalRate] = []
+    previous: HistoricalRate | None = None
+    for day in _date_range(start, end):
+        current = by_date.get(day)
+        if current is not None:
+            previous = current
+        elif previous is not None:
+            current = HistoricalRate(
+                effective_date=day,
+                usd_ars_oficial=previous.usd_ars_oficial,
+                usd_ars_blue=previous.usd_ars_blue,
+                btc_usd=previous.btc_usd,
+                btc_ars=previous.btc_ars,
+            )
+        if current is not None:
+            filled.append(current)
+    return filled
+
+
+def _insert_ignoring_conflicts(db: Session):
+    # Concurrent imports for the same source/date lose quietly instead of aborting the batch
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(ExchangeRate).on_conflict_do_nothing(constraint="uq_rate_date_source")
+    if dialect == "sqlite":
+        return sqlite.insert(ExchangeRate).on_conflict_do_nothing(index_elements=["effective_date", "source_id"])
+    return insert(ExchangeRate)
+
+
+def backfill_rates(
+    db: Session,
+    provider: HistoricalRateProvider,
+    start: date,
+    end: date,
+    fill_forward: bool = False,
+) -> tuple[int, int]:
+    if end < start:
+        raise ValueError("El rango es inválido")
+
+    rates = sorted(provider.fetch_range(start, end), key=lambda rate: rate.effective_date)
+    if fill_forward:
+        rates = _fill_forward(rates, start, end)
+
+    covered = _covered_dates(db, start, end)
+    pending: dict[date, HistoricalRate] = {}
+    skipped = 0
+    for rate in rates:
+        if rate.effective_date in covered or rate.effective_date in pending:
+            skipped += 1
+            continue
+        pending[rate.effective_date] = rate
+
+    if not pending:
+        return 0, skipped
+
+    source = _get_or_create_source(db, provider.name)
+    rows = [
+        {
+            "effective_date": rate.effective_date,
+            "source_id": source.id,
+            "usd_ars_oficial": rate.usd_ars_oficial,
+            "usd_ars_blue": rate.usd_ars_blue,
+            "btc_usd": rate.btc_usd,
+            "btc_ars": rate.btc_ars,
+            "is_manual": False,
+        }
+        for rate in pending.values()
+    ]
+    statement = _insert_ignoring_conflicts(db)
+    for offset in range(0, len(rows), BATCH_SIZE):
+        db.execute(statement, rows[offset : offset + BATCH_SIZE])
+    db.commit()
+    return len(rows), skipped
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timezone
+
+from dateutil.rrule import rrule, rrulestr
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.crud import crud_exchange_rate, crud_transaction
+from app.models.exchange_rate import ExchangeRate
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.transaction import Transaction
+from app.schemas.exchange_rate import ExchangeRateValues
+from app.services import changelog, events
+from app.services.conversion import convert_amounts
+from app.services.fingerprint import transaction_fingerprint
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# Cap per template per run so a template created years in the past can't flood one batch
+MAX_CATCH_UP = 120
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def parse_rule(rule: str, start_at: datetime) -> rrule:
+    try:
+        parsed = rrulestr(rule, dtstart=_aware(start_at))
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Regla de recurrencia inválida") from exc
+    if not isinstance(parsed, rrule):
+        raise ValueError("Regla de recurrencia inválida")
+    return parsed
+
+
+def first_occurrence(rule: str, start_at: datetime, not_before: datetime | None = None) -> datetime | None:
+    boundary = _aware(not_before or start_at)
+    return parse_rule(rule, start_at).after(boundary, inc=True)
+
+
+def _due_occurrences(template: RecurringTransaction, now: datetime) -> tuple[list[datetime], datetime | None]:
+    rule = parse_rule(template.rrule, template.start_at)
+    occurrences: list[datetime] = []
+    current = _aware(template.next_run_at)
+    while current is not None and current <= now and len(occurrences) < MAX_CATCH_UP:
+        occurrences.append(current)
+        current = rule.after(current)
+    return occurrences, current
+
+
+def _rate_values(rate: ExchangeRate) -> ExchangeRateValues:
+    return ExchangeRateValues(
+        usd_ars_oficial=rate.usd_ars_oficial,
+        usd_ars_blue=rate.usd_ars_blue,
+        btc_usd=rate.btc_usd,
+        btc_ars=rate.btc_ars,
+    )
+
+
+def _resolve_rates(db: Session, days: set[date]) -> dict[date, ExchangeRate]:
+    # One lookup per distinct date in the batch, shared by every template due that day
+    resolved: dict[date, ExchangeRate] = {}
+    latest = None
+    for day in sorted(days):
+        rate = crud_exchange_rate.get_rate_as_of(db, day)
+        if rate is None:
+            latest = latest or crud_exchange_rate.get_latest_rate(db)
+            rate = latest
+        if rate is not None:
+            resolved[day] = rate
+    return resolved
+
+
+def _insert_ignoring_duplicates(db: Session):
+    # An occurrence already materialized (concurrent run, manual catch-up) is skipped instead
+    # of aborting the whole batch on uq_transactions_recurring_date
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql.insert(Transaction)
+    elif dialect == "sqlite":
+        statement = sqlite.insert(Transaction)
+    else:
+        return insert(Transaction)
+    return statement.on_conflict_do_nothing(index_elements=["recurring_id", "transaction_date"])
+
+
+def _materialize_batch(db: Session, templates: list[RecurringTransaction], now: datetime) -> int:
+    due = {template.id: _due_occurrences(template, now) for template in templates}
+    days = {occurrence.date() for occurrences, _ in due.values() for occurrence in occurrences}
+    rates = _resolve_rates(db, days)
+
+    category_cache: dict[tuple[int | None, int | None], dict] = {}
+    rows: list[dict] = []
+    schedule: list[dict] = []
+    for template in templates:
+        occurrences, next_run_at = due[template.id]
+        if any(occurrence.date() not in rates for occurrence in occurrences):
+            logger.warning("No exchange rate for recurring transaction %s; retrying next run", template.id)
+            continue
+
+        key = (template.category_id, template.subcategory_id)
+        if key not in category_cache:
+            category_cache[key] = crud_transaction.category_values(db, *key)
+        for occurrence in occurrences:
+            rate = rates[occurrence.date()]
+            amount_ars, amount_usd, amount_btc = convert_amounts(
+                template.amount_original, template.currency_code, _rate_values(rate), template.rate_type
+            )
+            rows.append(
+                {
+                    **category_cache[key],
+                    "user_id": template.user_id,
+                    "account_id": template.account_id,
+                    "recurring_id": template.id,
+                    "exchange_rate_id": rate.id,
+                    "transaction_date": occurrence,
+                    "currency_code": template.currency_code,
+                    "rate_type": template.rate_type,
+                    "amount_original": template.amount_original,
+                    "amount_ars": amount_ars,
+                    "amount_usd": amount_usd,
+                    "amount_btc": amount_btc,
+                    "notes": template.notes,
+                    "fingerprint": transaction_fingerprint(
+                        template.account_id,
+                        occurrence,
+                        template.amount_original,
+                        template.currency_code,
+                        template.notes,
+                    ),
+                }
+            )
+        schedule.append(
+            {
+                "id": template.id,
+                "next_run_at": next_run_at,
+                "last_run_at": occurrences[-1] if occurrences else template.last_run_at,
+            }
+        )
+
+    inserted = []
+    if rows:
+        inserted = db.execute(
+            _insert_ignoring_duplicates(db).returning(Transaction.id, Transaction.user_id), rows
+        ).all()
+        ids_by_user: dict[int, list[int]] = defaultdict(list)
+        for transaction_id, user_id in inserted:
+            ids_by_user[user_id].append(transaction_id)
+        changelog.record_for_users(db, changelog.TRANSACTION, changelog.UPSERT, ids_by_user)
+        for user_id, ids in ids_by_user.items():
+            events.emit(db, user_id, events.TRANSACTIONS_CHANGED, count=len(ids))
+    if schedule:
+        db.execute(update(RecurringTransaction), schedule)
+    db.commit()
+    return len(inserted)
+
+
+def materialize_due(db: Session, now: datetime | None = None, batch_size: int = BATCH_SIZE) -> int:
+    now = _aware(now or datetime.now(tz=timezone.utc))
+    created = 0
+    last_id = 0
+    while True:
+        # Walks ix_recurring_transactions_due; work scales with due templates, not users
+        templates = list(
+            db.execute(
+                select(RecurringTransaction)
+                .where(
+                    RecurringTransaction.is_active.is_(True),
+                    RecurringTransaction.next_run_at <= now,
+                    RecurringTransaction.id > last_id,
+                )
+                .order_by(RecurringTransaction.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars()
+        )
+        if not templates:
+            return created
+        last_id = templates[-1].id
+        created += _materialize_batch(db, templates, now)
+
@@ -3,13 +3,14 @@ from __future__ import annotations
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Iterable
+from typing import Any, Iterable
 
-from sqlalchemy import and_, case, func, literal
+from sqlalchemy import Date, case, cast, func, literal, select
 from sqlalchemy.orm import Session, aliased
 
 from app.models.budget import Budget, BudgetItem
 from app.models.category import Category, CategoryType
+from app.models.exchange_rate import ExchangeRate
 from app.models.transaction import Transaction
 from app.schemas.report import (
     ReportCategoryEntry,
@@ -21,6 +22,7 @@ from app.schemas.report import (
     ReportTimeseriesResponse,
     ReportTotals,
 )
+from app.services import analytics, archive
 
 CURRENCY_COLUMNS = {
     "ARS": Transaction.amount_ars,
@@ -38,31 +40,92 @@ class ReportFilters:
     category_ids: Iterable[int] | None = None
 
 
-def _currency_column(currency: str):
+def _currency_column(currency: str, tx=Transaction):
     column = CURRENCY_COLUMNS.get(currency.upper())
     if column is None:
         raise ValueError("Moneda no soportada")
-    return column
+    return getattr(tx, column.key)
 
 
-def _apply_filters(query, filters: ReportFilters):
-    query = query.filter(Transaction.user_id == filters.user_id)
+@dataclass
+class _AmountSource:
+    column: Any
+    rate: Any = None
+    rate_id: Any = None
+
+    def join(self, query):
+        if self.rate is None:
+            return query
+        return query.outerjoin(self.rate, self.rate.id == self.rate_id)
+
+
+def _dialect_name(db: Session) -> str:
+    return db.bind.dialect.name if db.bind else "default"
+
+
+def _as_of_rate_id(db: Session, tx=Transaction):
+    # Latest rate effective on or before each transaction's date; served by the
+    # (effective_date, id) index with a backward scan limited to one row
+    if _dialect_name(db) == "sqlite":
+        tx_day = func.date(tx.transaction_date)
+    else:
+        tx_day = cast(tx.transaction_date, Date)
+    return (
+        select(ExchangeRate.id)
+        .where(ExchangeRate.effective_date <= tx_day, ExchangeRate.superseded_by_id.is_(None))
+        .order_by(ExchangeRate.effective_date.desc(), ExchangeRate.id.desc())
+        .limit(1)
+        .correlate(tx)
+        .scalar_subquery()
+    )
+
+
+def _as_of_amount(currency: str, rate, rate_type: str, tx=Transaction):
+    # Mirrors services.conversion.convert_amounts in SQL
+    amount = tx.amount_original
+    code = tx.currency_code
+    usd_ars = rate.usd_ars_oficial
+    if rate_type == "blue":
+        usd_ars = func.coalesce(rate.usd_ars_blue, rate.usd_ars_oficial)
+
+    if currency == "ARS":
+        return case((code == "ARS", amount), (code == "USD", amount * usd_ars), else_=amount * rate.btc_ars)
+    if currency == "USD":
+        return case((code == "USD", amount), (code == "ARS", amount / usd_ars), else_=amount * rate.btc_usd)
+    return case((code == "BTC", amount), (code == "ARS", amount / rate.btc_ars), else_=amount / rate.btc_usd)
+
+
+def _amount_source(db: Session, currency: str, rate_type: str | None, tx=Transaction) -> _AmountSource:
+    stored = _currency_column(currency, tx)
+    if rate_type is None:
+        return _AmountSource(column=stored)
+    if rate_type not in {"official", "blue"}:
+        raise ValueError("Tipo de cotización no soportado")
+
+    rate = aliased(ExchangeRate)
+    column = case((rate.id.is_(None), stored), else_=_as_of_amount(currency.upper(), rate, rate_type, tx))
+    return _AmountSource(column=column, rate=rate, rate_id=_as_of_rate_id(db, tx))
+
+
+def _source(*filters: ReportFilters | None):
+    # Live transactions, or live + archive when the earliest requested range reaches it
+    starts = [item.start for item in filters if item is not None]
+    return archive.transactions_source(None if None in starts else min(starts))
+
+
+def _apply_filters(query, filters: ReportFilters, tx=Transaction):
+    query = query.filter(tx.user_id == filters.user_id)
     if filters.start:
-        query = query.filter(Transaction.transaction_date >= filters.start)
+        query = query.filter(tx.transaction_date >= filters.start)
     if filters.end:
-        query = query.filter(Transaction.transaction_date <= filters.end)
+        query = query.filter(tx.transaction_date <= filters.end)
     if filters.account_ids:
-        query = query.filter(Transaction.account_id.in_(filters.account_ids))
+        query = query.filter(tx.account_id.in_(filters.account_ids))
     if filters.category_ids:
-        query = query.filter(Transaction.category_id.in_(filters.category_ids))
+        query = query.filter(tx.category_id.in_(filters.category_ids))
     return query
 
 
-def _type_expression(cat: Category, subcat: Category):
-    type_case = case((subcat.id.isnot(None), subcat.type), else_=cat.type)
-    return func.coalesce(type_case, literal(CategoryType.EXPENSE.value))
-
-
 def _normalize_month(value: date | datetime) -> date:
     return date(value.year, value.month, 1)
 
@@ -110,56 +173,58 @@ def _budget_totals(
     )
 
 
-def build_summary(
-    db: Session,
-    *,
-    currency: str,
-    filters: ReportFilters,
-    previous_filters: ReportFilters | None = None,
-) -> ReportSummaryResponse:
-    column = _currency_column(currency)
-    cat_alias = aliased(Category)
-    sub_alias = aliased(Category)
-    type_expression = _type_expression(cat_alias, sub_alias)
-
-    base_query = (
-        db.query(
-            type_expression.label("category_type"),
-            func.coalesce(func.sum(column), 0).label("total"),
-        )
-        .outerjoin(cat_alias, Transaction.category_id == cat_alias.id)
-        .outerjoin(sub_alias, Transaction.subcategory_id == sub_alias.id)
-    )
+def _type_totals(
+    db: Session, amount: _AmountSource, filters: ReportFilters, snapshot, currency: str, tx=Transaction
+) -> dict:
     totals = {CategoryType.INCOME.value: 0, CategoryType.EXPENSE.value: 0, CategoryType.TRANSFER.value: 0}
-    for row in _apply_filters(base_query, filters).group_by(type_expression).all():
-        totals[row.category_type] = row.total
+    if snapshot is not None:
+        rows = snapshot.type_totals(filters, currency)
+    else:
+        type_expression = tx.effective_type
+        query = amount.join(
+            db.query(
+                type_expression.label("category_type"),
+                func.coalesce(func.sum(amount.column), 0).label("total"),
+            )
+        )
+        rows = _apply_filters(query, filters, tx).group_by(type_expression).all()
+    for category_type, total in rows:
+        totals[category_type] = total
+    return totals
+
 
-    totals_model = ReportTotals(
+def _totals_model(totals: dict) -> ReportTotals:
+    return ReportTotals(
         income=totals.get(CategoryType.INCOME.value, 0),
         expense=totals.get(CategoryType.EXPENSE.value, 0),
         transfers=totals.get(CategoryType.TRANSFER.value, 0),
         balance=totals.get(CategoryType.INCOME.value, 0) - totals.get(CategoryType.EXPENSE.value, 0),
     )
 
+
+def _snapshot(db: Session, filters: ReportFilters, rate_type: str | None):
+    # As-of conversions need the exchange rates, which the columnar snapshot does not carry
+    if rate_type is not None:
+        return None
+    return analytics.snapshot_for(db, filters.user_id)
+
+
+def build_summary(
+    db: Session,
+    *,
+    currency: str,
+    filters: ReportFilters,
+    previous_filters: ReportFilters | None = None,
+    rate_type: str | None = None,
+) -> ReportSummaryResponse:
+    tx = _source(filters, previous_filters)
+    amount = _amount_source(db, currency, rate_type, tx)
+    snapshot = _snapshot(db, filters, rate_type)
+
+    totals_model = _totals_model(_type_totals(db, amount, filters, snapshot, currency, tx))
     previous_totals_model = None
     if previous_filters:
-        previous_totals = {CategoryType.INCOME.value: 0, CategoryType.EXPENSE.value: 0, CategoryType.TRANSFER.value: 0}
-        previous_query = (
-            db.query(
-                type_expression.label("category_type"),
-                func.coalesce(func.sum(column), 0).label("total"),
-            )
-            .outerjoin(cat_alias, Transaction.category_id == cat_alias.id)
-            .outerjoin(sub_alias, Transaction.subcategory_id == sub_alias.id)
-        )
-        for row in _apply_filters(previous_query, previous_filters).group_by(type_expression).all():
-            previous_totals[row.category_type] = row.total
-        previous_totals_model = ReportTotals(
-            income=previous_totals.get(CategoryType.INCOME.value, 0),
-            expense=previous_totals.get(CategoryType.EXPENSE.value, 0),
-            transfers=previous_totals.get(CategoryType.TRANSFER.value, 0),
-            balance=previous_totals.get(CategoryType.INCOME.value, 0) - previous_totals.get(CategoryType.EXPENSE.value, 0),
-        )
+        previous_totals_model = _totals_model(_type_totals(db, amount, previous_filters, snapshot, currency, tx))
 
     budget_totals = _budget_totals(
         db,
@@ -175,68 +240,81 @@ def build_summary(
         totals=totals_model,
         previous_totals=previous_totals_model,
         budget_totals=budget_totals,
+        rate_type=rate_type,
     )
 
 
-def build_timeseries(
+def timeseries_rows(
     db: Session,
     *,
     currency: str,
     filters: ReportFilters,
     interval: str = "month",
-) -> ReportTimeseriesResponse:
-    column = _currency_column(currency)
-    cat_alias = aliased(Category)
-    sub_alias = aliased(Category)
-    type_expression = _type_expression(cat_alias, sub_alias)
+    rate_type: str | None = None,
+) -> list[tuple[str, Any, Any]]:
+    # (period, income, expense) sorted by period; the binary formats encode these directly
+    tx = _source(filters)
+    amount = _amount_source(db, currency, rate_type, tx)
+    column = amount.column
+    type_expression = tx.effective_type
 
     if interval not in {"month", "day"}:
         raise ValueError("Intervalo no soportado")
 
-    dialect_name = db.bind.dialect.name if db.bind else "default"
-    if interval == "day":
-        if dialect_name == "sqlite":
-            bucket = func.date(Transaction.transaction_date)
-        else:
-            bucket = func.date_trunc("day", Transaction.transaction_date)
+    snapshot = _snapshot(db, filters, rate_type)
+    if snapshot is not None:
+        rows = snapshot.timeseries(filters, currency, interval)
     else:
-        if dialect_name == "sqlite":
-            bucket = func.strftime("%Y-%m-01", Transaction.transaction_date)
+        dialect_name = _dialect_name(db)
+        if interval == "day":
+            if dialect_name == "sqlite":
+                bucket = func.date(tx.transaction_date)
+            else:
+                bucket = func.date_trunc("day", tx.transaction_date)
         else:
-            bucket = func.date_trunc("month", Transaction.transaction_date)
+            if dialect_name == "sqlite":
+                bucket = func.strftime("%Y-%m-01", tx.transaction_date)
+            else:
+                bucket = func.date_trunc("month", tx.transaction_date)
 
-    query = (
-        db.query(
-            bucket.label("bucket"),
-            type_expression.label("category_type"),
-            func.coalesce(func.sum(column), 0).label("total"),
+        query = amount.join(
+            db.query(
+                bucket.label("bucket"),
+                type_expression.label("category_type"),
+                func.coalesce(func.sum(column), 0).label("total"),
+            )
+        )
+        rows = (
+            _apply_filters(query, filters, tx)
+            .group_by(bucket, type_expression)
+            .order_by(bucket.asc())
+            .all()
         )
-        .outerjoin(cat_alias, Transaction.category_id == cat_alias.id)
-        .outerjoin(sub_alias, Transaction.subcategory_id == sub_alias.id)
-    )
-    rows = (
-        _apply_filters(query, filters)
-        .group_by(bucket, type_expression)
-        .order_by(bucket.asc())
-        .all()
-    )
     grouped: dict[str, dict[str, float]] = defaultdict(lambda: {"income": 0, "expense": 0})
-    for row in rows:
-        if isinstance(row.bucket, str):
-            bucket_key = row.bucket
+    for bucket_value, category_type, total in rows:
+        if isinstance(bucket_value, str):
+            bucket_key = bucket_value
         else:
-            bucket_key = row.bucket.date().isoformat()
-        if row.category_type == CategoryType.INCOME.value:
-            grouped[bucket_key]["income"] = row.total
-        elif row.category_type == CategoryType.EXPENSE.value:
-            grouped[bucket_key]["expense"] = row.total
-
-    points = [
-        ReportTimeseriesPoint(period=period, income=values["income"], expense=values["expense"])
-        for period, values in sorted(grouped.items())
-    ]
+            bucket_key = bucket_value.date().isoformat()
+        if category_type == CategoryType.INCOME.value:
+            grouped[bucket_key]["income"] = total
+        elif category_type == CategoryType.EXPENSE.value:
+            grouped[bucket_key]["expense"] = total
+
+    return [(period, values["income"], values["expense"]) for period, values in sorted(grouped.items())]
+
 
-    return ReportTimeseriesResponse(currency=currency, interval=interval, points=points)
+def build_timeseries(
+    db: Session,
+    *,
+    currency: str,
+    filters: ReportFilters,
+    interval: str = "month",
+    rate_type: str | None = None,
+) -> ReportTimeseriesResponse:
+    rows = timeseries_rows(db, currency=currency, filters=filters, interval=interval, rate_type=rate_type)
+    points = [ReportTimeseriesPoint(period=period, income=income, expense=expense) for period, income, expense in rows]
+    return ReportTimeseriesResponse(currency=currency, interval=interval, points=points, rate_type=rate_type)
 
 
 def build_category_report(
@@ -245,21 +323,42 @@ def build_category_report(
     currency: str,
     filters: ReportFilters,
     category_type: CategoryType | None = None,
+    rate_type: str | None = None,
 ) -> ReportCategoryResponse:
-    column = _currency_column(currency)
-    cat_alias = aliased(Category)
-    sub_alias = aliased(Category)
-    parent_alias = aliased(Category)
-
-    type_expression = _type_expression(cat_alias, sub_alias)
-    root_category_id = case(
-        (sub_alias.parent_id.isnot(None), sub_alias.parent_id),
-        else_=cat_alias.id,
-    )
-    root_category_name = case(
-        (sub_alias.parent_id.isnot(None), parent_alias.name),
-        else_=cat_alias.name,
-    )
+    tx = _source(filters)
+    amount = _amount_source(db, currency, rate_type, tx)
+    snapshot = _snapshot(db, filters, rate_type)
+    if snapshot is not None:
+        totals = snapshot.categories(filters, currency, category_type.value if category_type else None)
+        root_ids = {root_id for root_id, _, _ in totals if root_id is not None}
+        names = dict(db.query(Category.id, Category.name).filter(Category.id.in_(root_ids)).all()) if root_ids else {}
+        rows = [
+            (root_id, names.get(root_id, "Sin categoría"), row_type, total)
+            for root_id, row_type, total in totals
+        ]
+    else:
+        rows = _category_rows(db, amount, filters, category_type, tx)
+
+    entries = [
+        ReportCategoryEntry(category_id=category_id, name=name, total=total, type=row_type)
+        for category_id, name, row_type, total in rows
+    ]
+    return ReportCategoryResponse(currency=currency, entries=entries, rate_type=rate_type)
+
+
+def _category_rows(
+    db: Session,
+    amount: _AmountSource,
+    filters: ReportFilters,
+    category_type: CategoryType | None,
+    tx=Transaction,
+):
+    column = amount.column
+    root_alias = aliased(Category)
+
+    type_expression = tx.effective_type
+    root_category_id = tx.root_category_id
+    root_category_name = root_alias.name
 
     query = (
         db.query(
@@ -268,26 +367,16 @@ def build_category_report(
             type_expression.label("category_type"),
             func.coalesce(func.sum(column), 0).label("total"),
         )
-        .outerjoin(cat_alias, Transaction.category_id == cat_alias.id)
-        .outerjoin(sub_alias, Transaction.subcategory_id == sub_alias.id)
-        .outerjoin(parent_alias, sub_alias.parent_id == parent_alias.id)
+        .outerjoin(root_alias, tx.root_category_id == root_alias.id)
     )
+    query = amount.join(query)
     if category_type:
         query = query.filter(type_expression == category_type.value)
 
-    rows = (
-        _apply_filters(query, filters)
+    # Ties broken by id so both report engines list entries in the same order
+    return (
+        _apply_filters(query, filters, tx)
         .group_by(root_category_id, root_category_name, type_expression)
-        .order_by(func.sum(column).desc())
+        .order_by(func.sum(column).desc(), root_category_id)
         .all()
     )
-    entries = [
-        ReportCategoryEntry(
-            category_id=row.category_id,
-            name=row.name,
-            total=row.total,
-            type=row.category_type,
-        )
-        for row in rows
-    ]
-    return ReportCategoryResponse(currency=currency, entries=entries)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import zlib
+
+ZLIB = "zlib"
+
+
+def compress_text(value: str, level: int = 6) -> tuple[str, bytes]:
+    return ZLIB, zlib.compress(value.encode("utf-8"), level)
+
+
+def decompress_text(encoding: str, data: bytes) -> str:
+    if encoding != ZLIB:
+        raise ValueError(f"Codificación no soportada: {encoding}")
+    return zlib.decompress(data).decode("utf-8")
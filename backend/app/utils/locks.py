@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import tempfile
+import threading
+import zlib
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+try:  # pragma: no cover - depends on platform
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call:
+    event: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException | None = None
+
+
+class SingleFlight:
+    # Coalesces concurrent calls with the same key: the first caller runs ``fn`` and every
+    # caller that arrives while it is in flight waits for, and shares, its result or error.
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+def lock_key(name: str) -> int:
+    return zlib.crc32(name.encode("utf-8"))
+
+
+def _engine(bind: Engine | Connection) -> Engine:
+    return bind.engine if isinstance(bind, Connection) else bind
+
+
+# Blocks until no other worker holds ``name``: a session-level advisory lock on its own
+# connection for Postgres, an ``flock`` on a temp-dir file for SQLite and other dialects.
+# The file outlives the lock, so ``name`` must not embed values that keep changing, like dates.
+@contextmanager
+def cross_process_lock(bind: Engine | Connection, name: str) -> Iterator[None]:
+    engine = _engine(bind)
+    if engine.dialect.name == "postgresql":
+        key = lock_key(name)
+        with engine.connect() as connection:
+            connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": key})
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+        return
+
+    if fcntl is None:
+        yield
+        return
+
+    path = Path(tempfile.gettempdir()) / f"fintrack-{name}.lock"
+    with open(path, "a+") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Sampling profiler for a single request: a background thread walks the stacks of the threads
+# doing the request's work every ``interval`` seconds and counts them in collapsed form
+# ("outer;inner;leaf"), which flamegraph.pl and speedscope read as is. SQL statements are
+# timed through engine events. Both only react when a profiler is active in the current
+# context, so unprofiled requests pay a ContextVar lookup per statement.
+MAX_STATEMENTS = 500
+_MAX_PARAMETERS_REPR = 200
+
+_current: ContextVar["RequestProfiler | None"] = ContextVar("request_profiler", default=None)
+
+
+@dataclass
+class ProfiledStatement:
+    sql: str
+    parameters: str
+    duration_ms: float
+
+
+def _frame_label(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_qualname}"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+@dataclass
+class RequestProfiler:
+    interval: float = 0.005
+    stacks: Counter = field(default_factory=Counter)
+    statements: list[ProfiledStatement] = field(default_factory=list)
+    dropped_statements: int = 0
+    # Filled in by deps.get_current_user once the request is authenticated
+    user_id: int | None = None
+    is_superuser: bool = False
+    started_at: float = 0.0
+    duration_ms: float = 0.0
+
+    def __post_init__(self) -> None:
+        self._threads: set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.duration_ms = (time.perf_counter() - self.started_at) * 1000
+
+    def register_current_thread(self) -> None:
+        # Starlette runs sync dependencies and endpoints on pool threads; each one joins the
+        # sample set the first time it touches the profiler. A pool thread keeps being sampled
+        # until the request ends, even if it has moved on to another request by then.
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            with self._lock:
+                self._threads.add(ident)
+
+    def note_user(self, user_id: int, is_superuser: bool) -> None:
+        self.user_id = user_id
+        self.is_superuser = is_superuser
+        self.register_current_thread()
+
+    def record_statement(self, sql: str, parameters, duration: float) -> None:
+        if len(self.statements) >= MAX_STATEMENTS:
+            self.dropped_statements += 1
+            return
+        self.statements.append(
+            ProfiledStatement(sql=sql, parameters=repr(parameters)[:_MAX_PARAMETERS_REPR], duration_ms=duration * 1000)
+        )
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.stacks.values())
+
+    @property
+    def sql_ms(self) -> float:
+        return sum(statement.duration_ms for statement in self.statements)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = tuple(self._threads)
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[_collapse(frame)] += 1
+
+
+def current_profiler() -> RequestProfiler | None:
+    return _current.get()
+
+
+def activate(profiler: RequestProfiler):
+    return _current.set(profiler)
+
+
+def deactivate(token) -> None:
+    _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profiler = _current.get()
+    if profiler is not None:
+        profiler.register_current_thread()
+        if context is not None:
+            context._profile_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profiler = _current.get()
+    started = getattr(context, "_profile_started", None)
+    if profiler is not None and started is not None:
+        profiler.record_statement(statement, parameters, time.perf_counter() - started)
@@ -0,0 +1,9 @@
+import logging
+
+from app.core.config import settings
+from app.db import base  # noqa: F401 - ensure models are registered
+from app.worker.scheduler import run_worker
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.log_level)
+    run_worker()
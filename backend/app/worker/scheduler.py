@@ -1,14 +1,57 @@
-from datetime import time
+from __future__ import annotations
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import logging
+import os
+import signal
+import socket
+import threading
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timezone
+from functools import wraps
+
+from apscheduler.schedulers.background import BackgroundScheduler
 
 from app.core.config import settings
+from app.crud import crud_idempotency_key, crud_scheduler_lease
 from app.db.session import SessionLocal
+from app.services.archive import archive_due
 from app.services.exchange_rates import ensure_daily_exchange_rate
+from app.services.partitions import ensure_partitions
+from app.services.rate_corrections import resume_stale_corrections
+from app.services.recurring import materialize_due
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "scheduler"
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Jobs run on the scheduler's own thread pool, never on the web server's event loop
+scheduler = BackgroundScheduler(
+    timezone=settings.scheduler_timezone,
+    job_defaults={"coalesce": True, "max_instances": 1},
+)
+_leader = threading.Event()
+
+
+def is_leader() -> bool:
+    return _leader.is_set()
 
-scheduler = AsyncIOScheduler(timezone=settings.scheduler_timezone)
 
+def leader_only(job: Callable[[], None]) -> Callable[[], None]:
+    @wraps(job)
+    def wrapper() -> None:
+        if not _leader.is_set():
+            return
+        try:
+            job()
+        except Exception:  # noqa: BLE001 - keep the scheduler alive
+            logger.exception("Scheduled job %s failed", job.__name__)
 
+    return wrapper
+
+
+@leader_only
 def _rate_job() -> None:
     session = SessionLocal()
     try:
@@ -17,9 +60,107 @@ def _rate_job() -> None:
         session.close()
 
 
-def start_scheduler() -> None:
-    if scheduler.running:
+@leader_only
+def _recurring_job() -> None:
+    session = SessionLocal()
+    try:
+        created = materialize_due(session)
+        if created:
+            logger.info("Materialized %s recurring transactions", created)
+    finally:
+        session.close()
+
+
+@leader_only
+def _partition_job() -> None:
+    session = SessionLocal()
+    try:
+        created = ensure_partitions(session)
+        if created:
+            logger.info("Created transaction partitions %s", ", ".join(created))
+    finally:
+        session.close()
+
+
+@leader_only
+def _archive_job() -> None:
+    session = SessionLocal()
+    try:
+        for month, moved in archive_due(session).items():
+            logger.info("Archived %s transactions of %s", moved, f"{month:%Y-%m}")
+    finally:
+        session.close()
+
+
+@leader_only
+def _idempotency_job() -> None:
+    session = SessionLocal()
+    try:
+        crud_idempotency_key.purge_expired(session)
+    finally:
+        session.close()
+
+
+@leader_only
+def _rate_correction_job() -> None:
+    session = SessionLocal()
+    try:
+        resumed = resume_stale_corrections(session)
+        if resumed:
+            logger.warning("Resuming stalled rate corrections %s", resumed)
+    finally:
+        session.close()
+
+
+def _heartbeat() -> None:
+    session = SessionLocal()
+    try:
+        acquired = crud_scheduler_lease.try_acquire(
+            session, LEASE_NAME, WORKER_ID, settings.scheduler_lease_seconds
+        )
+    except Exception:  # noqa: BLE001 - a DB hiccup demotes us until the next beat
+        logger.exception("Could not renew scheduler lease")
+        acquired = False
+    finally:
+        session.close()
+
+    was_leader = _leader.is_set()
+    if acquired:
+        _leader.set()
+    else:
+        _leader.clear()
+
+    if acquired and not was_leader:
+        logger.info("Scheduler leadership acquired by %s", WORKER_ID)
+        # Catch up on anything missed while no leader was running
+        scheduler.add_job(_rate_job, id="startup_exchange_rate", replace_existing=True)
+        scheduler.add_job(_partition_job, id="startup_partitions", replace_existing=True)
+    elif was_leader and not acquired:
+        logger.warning("Scheduler leadership lost by %s", WORKER_ID)
+
+
+def _release_lease() -> None:
+    if not _leader.is_set():
         return
+    _leader.clear()
+    session = SessionLocal()
+    try:
+        crud_scheduler_lease.release(session, LEASE_NAME, WORKER_ID)
+    except Exception:  # noqa: BLE001
+        logger.exception("Could not release scheduler lease")
+    finally:
+        session.close()
+
+
+def _register_jobs() -> None:
+    scheduler.add_job(
+        _heartbeat,
+        trigger="interval",
+        seconds=max(settings.scheduler_lease_seconds // 3, 1),
+        next_run_time=datetime.now(tz=timezone.utc),
+        id="scheduler_heartbeat",
+        replace_existing=True,
+    )
     scheduler.add_job(
         _rate_job,
         trigger="cron",
@@ -28,11 +169,72 @@ def start_scheduler() -> None:
         id="daily_exchange_rate",
         replace_existing=True,
     )
+    # After the daily rate so today's occurrences convert with today's quote
+    scheduler.add_job(
+        _recurring_job,
+        trigger="cron",
+        hour=settings.recurring_run_hour,
+        minute=settings.recurring_run_minute,
+        id="recurring_transactions",
+        replace_existing=True,
+    )
+    # Idempotent; daily so a missed run never leaves next month without a partition
+    scheduler.add_job(
+        _partition_job,
+        trigger="interval",
+        hours=24,
+        id="transaction_partitions",
+        replace_existing=True,
+    )
+    # A no-op until the first of the month pushes another month past ARCHIVE_AFTER_MONTHS
+    scheduler.add_job(
+        _archive_job,
+        trigger="interval",
+        hours=24,
+        id="transaction_archive",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        _rate_correction_job,
+        trigger="interval",
+        minutes=max(settings.rate_correction_stale_minutes, 1),
+        id="rate_corrections_resume",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        _idempotency_job,
+        trigger="interval",
+        hours=1,
+        id="idempotency_keys_cleanup",
+        replace_existing=True,
+    )
+
+
+def start_scheduler(standalone: bool = False) -> None:
+    if scheduler.running:
+        return
+    mode = settings.scheduler_mode
+    if mode == "disabled" or (mode == "standalone" and not standalone):
+        return
+    _register_jobs()
+    # Returns immediately; the first heartbeat (and any catch-up fetch) runs in the background
     scheduler.start()
-    # Run immediately on startup to ensure data exists
-    _rate_job()
 
 
 def shutdown_scheduler() -> None:
     if scheduler.running:
-        scheduler.shutdown()
+        scheduler.shutdown(wait=False)
+    _release_lease()
+
+
+def run_worker() -> None:
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    start_scheduler(standalone=True)
+    logger.info("Scheduler worker %s started", WORKER_ID)
+    try:
+        stop.wait()
+    finally:
+        shutdown_scheduler()
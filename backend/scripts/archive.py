@@ -0,0 +1,52 @@
+"""Cold storage for old transactions.
+
+The scheduler archives every month older than ARCHIVE_AFTER_MONTHS once a day; this is for
+inspecting the archive, forcing a run and bringing months back into the live table (needed
+before lengthening ARCHIVE_AFTER_MONTHS or setting it to 0).
+
+    python -m scripts.archive list
+    python -m scripts.archive run
+    python -m scripts.archive restore 2023-05
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+
+from app.db import base  # noqa: F401 - ensure models are registered
+from app.db.session import SessionLocal
+from app.services import archive
+
+
+def parse_month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    commands.add_parser("run")
+    restore = commands.add_parser("restore")
+    restore.add_argument("month", type=parse_month, help="YYYY-MM")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.command == "list":
+            for month, count in archive.archived_months(session):
+                print(f"{month:%Y-%m}", count)
+        elif args.command == "run":
+            if archive.archive_cutoff() is None:
+                parser.exit(1, "ARCHIVE_AFTER_MONTHS is 0; archiving is disabled\n")
+            for month, moved in archive.archive_due(session).items():
+                print("archived", f"{month:%Y-%m}", moved)
+        else:
+            print("restored", archive.restore_month(session, args.month))
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
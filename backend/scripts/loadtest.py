@@ -0,0 +1,333 @@
+"""API load test.
+
+Virtual users (one thread and one cookie session each) register, import a history of
+movements and then loop over a weighted mix of scenarios until ``--duration`` runs out:
+
+    dashboard  summary + timeseries + categories reports, like the home screen
+    list       GET /transactions paging, a third of them with a search term
+    create     POST /transactions
+
+On top of that, every ``--burst-every`` seconds ``--burst-size`` logins fire at once
+(``login_burst``). Throughput, latency percentiles and error rate are printed per scenario.
+
+Against a running server:
+
+    python -m scripts.loadtest --base-url http://localhost:8000 --users 16 --duration 60
+
+Or let the harness start one uvicorn worker on a scratch database (SQLite tables are created
+on the fly; a Postgres database must already be migrated with ``alembic upgrade head``):
+
+    python -m scripts.loadtest --serve sqlite:///./loadtest.db
+
+``--save-baseline FILE`` stores the results; ``--baseline FILE`` compares against a stored run
+and exits with status 1 when a scenario's p95 or throughput regresses beyond ``--tolerance``.
+Baselines are only comparable on the same machine, database and options.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+from scripts.login_benchmark import percentile
+
+DEFAULT_MIX = "dashboard=40,list=40,create=20"
+SEARCH_TERMS = ("super", "alquiler", "sueldo", "luz", "uber", "cafe")
+PASSWORD = "loadtest-password"
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    client: httpx.Client
+    account_ids: list[int] = field(default_factory=list)
+    category_ids: list[int] = field(default_factory=list)
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.recording = False
+
+    def add(self, scenario: str, started: float, ok: bool) -> None:
+        elapsed = (time.perf_counter() - started) * 1000
+        if not self.recording:
+            return
+        with self._lock:
+            self.samples[scenario].append(elapsed)
+            if not ok:
+                self.errors[scenario] += 1
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def _random_date(rng: random.Random, days: int = 730) -> str:
+    moment = datetime.now(tz=timezone.utc) - timedelta(days=rng.randrange(days), minutes=rng.randrange(1440))
+    return moment.isoformat()
+
+
+def _transaction(user: VirtualUser, rng: random.Random) -> dict:
+    return {
+        "transaction_date": _random_date(rng),
+        "account_id": rng.choice(user.account_ids),
+        "currency_code": "ARS",
+        "amount_original": f"{rng.uniform(100, 250000):.2f}",
+        "category_id": rng.choice(user.category_ids),
+        "notes": f"{rng.choice(SEARCH_TERMS)} {uuid.uuid4().hex[:6]}",
+    }
+
+
+def setup_user(base_url: str, index: int, run_id: str, seed_rows: int) -> VirtualUser:
+    rng = random.Random(index)
+    client = httpx.Client(base_url=base_url, timeout=60)
+    user = VirtualUser(email=f"loadtest-{run_id}-{index}@example.com", client=client)
+    client.post("/auth/register", json={"email": user.email, "password": PASSWORD, "timezone": "UTC"}).raise_for_status()
+    user.account_ids = [account["id"] for account in client.get("/accounts/").json() if account["currency_code"] == "ARS"]
+    user.category_ids = [category["id"] for category in client.get("/categories/").json() if category["parent_id"] is None]
+    for offset in range(0, seed_rows, 1000):
+        items = [_transaction(user, rng) for _ in range(min(1000, seed_rows - offset))]
+        client.post("/transactions/import", json={"items": items, "on_duplicate": "flag"}).raise_for_status()
+    return user
+
+
+def dashboard(user: VirtualUser, rng: random.Random) -> bool:
+    end = datetime.now(tz=timezone.utc)
+    params = {"start": (end - timedelta(days=30)).isoformat(), "end": end.isoformat(), "currency": "ARS"}
+    yearly = {**params, "start": (end - timedelta(days=365)).isoformat(), "interval": "month"}
+    responses = [
+        user.client.get("/reports/summary", params=params),
+        user.client.get("/reports/timeseries", params=yearly),
+        user.client.get("/reports/categories", params={**params, "type": "expense"}),
+    ]
+    return all(response.status_code < 400 for response in responses)
+
+
+def list_page(user: VirtualUser, rng: random.Random) -> bool:
+    params: dict = {"limit": 50, "offset": 50 * rng.randrange(4)}
+    if rng.random() < 1 / 3:
+        params["search"] = rng.choice(SEARCH_TERMS)
+    return user.client.get("/transactions/", params=params).status_code < 400
+
+
+def create(user: VirtualUser, rng: random.Random) -> bool:
+    return user.client.post("/transactions/", json=_transaction(user, rng)).status_code < 400
+
+
+SCENARIOS = {"dashboard": dashboard, "list": list_page, "create": create}
+
+
+def run_user(user: VirtualUser, index: int, mix: dict[str, int], stop: threading.Event, recorder: Recorder) -> None:
+    rng = random.Random(1000 + index)
+    names, weights = list(mix), list(mix.values())
+    while not stop.is_set():
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            ok = SCENARIOS[name](user, rng)
+        except httpx.HTTPError:
+            ok = False
+        recorder.add(name, started, ok)
+
+
+def login_bursts(
+    base_url: str, users: list[VirtualUser], size: int, every: float, stop: threading.Event, recorder: Recorder
+) -> None:
+    def login(email: str) -> None:
+        started = time.perf_counter()
+        try:
+            with httpx.Client(base_url=base_url, timeout=60) as client:
+                ok = client.post("/auth/login", json={"email": email, "password": PASSWORD}).status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        recorder.add("login_burst", started, ok)
+
+    while not stop.wait(every):
+        threads = [threading.Thread(target=login, args=(users[i % len(users)].email,)) for i in range(size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def summarize(recorder: Recorder, seconds: float) -> dict[str, dict]:
+    results = {}
+    for name, samples in sorted(recorder.samples.items()):
+        results[name] = {
+            "count": len(samples),
+            "rps": round(len(samples) / seconds, 2),
+            "error_rate": round(recorder.errors[name] / len(samples), 4),
+            "p50_ms": round(percentile(samples, 50), 1),
+            "p95_ms": round(percentile(samples, 95), 1),
+            "p99_ms": round(percentile(samples, 99), 1),
+            "max_ms": round(max(samples), 1),
+        }
+    return results
+
+
+def print_results(results: dict[str, dict]) -> None:
+    print(f"{'scenario':<12} {'count':>7} {'rps':>8} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, stats in results.items():
+        print(
+            f"{name:<12} {stats['count']:>7} {stats['rps']:>8.2f} {stats['error_rate']:>7.2%} "
+            f"{stats['p50_ms']:>6.1f}ms {stats['p95_ms']:>6.1f}ms {stats['p99_ms']:>6.1f}ms {stats['max_ms']:>6.1f}ms"
+        )
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    regressions = []
+    print(f"\n{'scenario':<12} {'p95 base':>10} {'p95 now':>10} {'rps base':>10} {'rps now':>10}")
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from this run")
+            continue
+        print(f"{name:<12} {base['p95_ms']:>8.1f}ms {current['p95_ms']:>8.1f}ms {base['rps']:>10.2f} {current['rps']:>10.2f}")
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['rps']} -> {current['rps']} rps")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {base['error_rate']:.2%} -> {current['error_rate']:.2%}")
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(database_url: str) -> tuple[subprocess.Popen, str]:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "DATABASE_REPLICA_URLS": "[]",
+        "JWT_SECRET": os.environ.get("JWT_SECRET", "loadtest-secret-key-with-enough-length"),
+        "SCHEDULER_MODE": "disabled",
+        "RATE_PROVIDER_TRANSPORT": "fixture",
+    }
+    bootstrap = (
+        "from app.db.base import Base; from app.db.session import engine; from app.initial_data import init_default_data; "
+        "engine.dialect.name == 'sqlite' and Base.metadata.create_all(engine); init_default_data()"
+    )
+    subprocess.run([sys.executable, "-c", bootstrap], env=env, check=True)
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("server did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://localhost:8000")
+    target.add_argument("--serve", metavar="DATABASE_URL", help="start a local uvicorn worker on this database")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--seed-rows", type=int, default=500, help="movements imported per virtual user")
+    parser.add_argument("--burst-size", type=int, default=8)
+    parser.add_argument("--burst-every", type=float, default=10.0)
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.base_url
+    if args.serve:
+        process, base_url = serve(args.serve)
+    try:
+        run_id = uuid.uuid4().hex[:8]
+        users = [setup_user(base_url, index, run_id, args.seed_rows) for index in range(args.users)]
+
+        recorder = Recorder()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=run_user, args=(user, index, args.mix, stop, recorder))
+            for index, user in enumerate(users)
+        ]
+        if args.burst_size:
+            threads.append(
+                threading.Thread(
+                    target=login_bursts, args=(base_url, users, args.burst_size, args.burst_every, stop, recorder)
+                )
+            )
+        for thread in threads:
+            thread.start()
+        time.sleep(args.warmup)
+        recorder.recording = True
+        started = time.monotonic()
+        time.sleep(args.duration)
+        stop.set()
+        elapsed = time.monotonic() - started
+        for thread in threads:
+            thread.join()
+        for user in users:
+            user.client.close()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    results = summarize(recorder, elapsed)
+    print_results(results)
+
+    if args.save_baseline:
+        meta = {
+            "created_at": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+            "machine": f"{platform.system()} {platform.machine()} {os.cpu_count()} cpus",
+            "database": (args.serve or base_url).split(":", 1)[0],
+            "options": {key: getattr(args, key) for key in ("users", "duration", "seed_rows", "burst_size", "burst_every")},
+            "mix": args.mix,
+        }
+        args.save_baseline.write_text(json.dumps({"meta": meta, "scenarios": results}, indent=2) + "\n")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text())["scenarios"], args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Login storm benchmark.
+
+Measures the latency of a cheap route (``/health`` by default) on its own and then while
+``--concurrency`` clients hammer ``/auth/login``. With bcrypt on the process pool the probe
+p99 should stay close to the baseline; with inline hashing it degrades with the storm.
+
+    python scripts/login_benchmark.py --base-url http://localhost:8000 --duration 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def probe(base_url: str, path: str, stop: threading.Event, samples: list[float]) -> None:
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get(path)
+            samples.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+
+
+def storm(base_url: str, credentials: dict[str, str], stop: threading.Event, counts: dict[int, int]) -> None:
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        while not stop.is_set():
+            status = client.post("/auth/login", json=credentials).status_code
+            counts[status] = counts.get(status, 0) + 1
+
+
+def measure(base_url: str, path: str, duration: float, storm_clients: int, credentials: dict[str, str]):
+    stop = threading.Event()
+    samples: list[float] = []
+    counts: dict[int, int] = {}
+    threads = [threading.Thread(target=probe, args=(base_url, path, stop, samples))]
+    threads += [
+        threading.Thread(target=storm, args=(base_url, credentials, stop, counts)) for _ in range(storm_clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return samples, counts
+
+
+def report(label: str, samples: list[float], counts: dict[int, int]) -> None:
+    print(
+        f"{label:<10} probes={len(samples):<5} "
+        f"p50={percentile(samples, 50):7.1f}ms p99={percentile(samples, 99):7.1f}ms "
+        f"mean={statistics.fmean(samples) if samples else 0:7.1f}ms logins={counts}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--probe-path", default="/health")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    credentials = {"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "benchmark-password"}
+    with httpx.Client(base_url=args.base_url, timeout=30) as client:
+        client.post("/auth/register", json={**credentials, "timezone": "UTC"}).raise_for_status()
+
+    report("baseline", *measure(args.base_url, args.probe_path, args.duration, 0, credentials))
+    report("storm", *measure(args.base_url, args.probe_path, args.duration, args.concurrency, credentials))
+    with httpx.Client(base_url=args.base_url, timeout=30) as client:
+        print("hasher", client.get("/health/password-hasher").json())
+
+
+if __name__ == "__main__":
+    main()
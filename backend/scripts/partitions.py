@@ -0,0 +1,55 @@
+"""Transaction partition maintenance.
+
+The scheduler already keeps PARTITION_MONTHS_AHEAD months created; this is for inspecting
+them and for detaching closed months before archiving them (pg_dump the table, then drop it).
+
+    python -m scripts.partitions list
+    python -m scripts.partitions ensure --months-ahead 6
+    python -m scripts.partitions detach 2024-01
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+
+from app.db import base  # noqa: F401 - ensure models are registered
+from app.db.session import SessionLocal
+from app.services import partitions
+
+
+def parse_month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    ensure = commands.add_parser("ensure")
+    ensure.add_argument("--months-ahead", type=int, default=None)
+    detach = commands.add_parser("detach")
+    detach.add_argument("month", type=parse_month, help="YYYY-MM")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if not partitions.is_partitioned(session):
+            parser.exit(1, "transactions is not partitioned (Postgres with migration 20261019_11 only)\n")
+        if args.command == "list":
+            for month in partitions.attached_months(session):
+                print(partitions.partition_name(month))
+        elif args.command == "ensure":
+            for name in partitions.ensure_partitions(session, args.months_ahead):
+                print("created", name)
+        else:
+            try:
+                print("detached", partitions.detach_partition(session, args.month))
+            except ValueError as exc:
+                parser.exit(1, f"{exc}\n")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Query-plan regression check.
+
+Runs every hot query shape (services.query_plans.HOT_QUERIES) under EXPLAIN and checks it
+against its expectations: no sequential scan on transactions, every read seeking on
+user_id, required indexes used. Exits with status 1 on any violation.
+
+    python -m scripts.query_plans --seed            # scratch database: seed, ANALYZE, check
+    python -m scripts.query_plans --user-id 42 -v   # an existing user's data, print plans
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+from app.db import base  # noqa: F401 - ensure models are registered
+from app.db.session import SessionLocal
+from app.services import query_plans
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--seed", action="store_true", help="seed the plan dataset first")
+    target.add_argument("--user-id", type=int)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=2000, help="movements per seeded user")
+    parser.add_argument("--name", choices=sorted(query_plans.HOT_QUERIES))
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the raw plans")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        user_id = query_plans.seed_dataset(session, args.users, args.rows) if args.seed else args.user_id
+        names = [args.name] if args.name else list(query_plans.HOT_QUERIES)
+        failed = False
+        for name in names:
+            report = query_plans.explain_hot_query(session, name, user_id)
+            print(f"{'FAIL' if report.violations else 'ok':<5} {name}")
+            for violation in report.violations:
+                print(f"      {violation}")
+            if args.verbose:
+                for statement in report.statements:
+                    print(json.dumps(statement.raw, indent=2, default=str))
+            failed = failed or bool(report.violations)
+    finally:
+        session.rollback()
+        session.close()
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,11 @@ from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.main import app
 from app.models.currency import Currency
 from app.models.exchange_rate import ExchangeRateSource
+from app.services import exchange_rates as exchange_rates_service
 from app.worker import scheduler as scheduler_module
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -73,8 +74,10 @@ def client(db_session: Session, monkeypatch: pytest.MonkeyPatch) -> TestClient:
             pass
 
     app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_read_db] = _get_test_db
     monkeypatch.setattr(scheduler_module, "start_scheduler", lambda: None)
     monkeypatch.setattr(scheduler_module, "shutdown_scheduler", lambda: None)
+    monkeypatch.setattr(exchange_rates_service, "request_rate_refresh", lambda: False)
 
     with TestClient(app) as test_client:
         yield test_client
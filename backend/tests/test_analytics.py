@@ -0,0 +1,99 @@
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+
+from app.core.config import settings
+from app.services import analytics
+
+pytestmark = pytest.mark.skipif(not analytics.is_available(), reason="duckdb/pyarrow not installed")
+
+REPORTS = [
+    ("/reports/summary", {"start": "2024-02-01T00:00:00+00:00", "end": "2024-03-01T00:00:00+00:00"}),
+    ("/reports/timeseries", {"start": "2024-01-01T00:00:00+00:00", "end": "2024-04-01T00:00:00+00:00"}),
+    ("/reports/timeseries", {"interval": "day", "currency": "USD"}),
+    ("/reports/categories", {"currency": "BTC"}),
+    ("/reports/categories", {"type": "expense", "start": "2024-02-01T00:00:00+00:00"}),
+]
+
+
+def register_user(client, email="columnar@example.com"):
+    payload = {"email": email, "password": "supersecret", "timezone": "UTC"}
+    response = client.post("/auth/register", json=payload)
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def create_rate(client):
+    response = client.post(
+        "/exchange-rates/override",
+        json={
+            "effective_date": "2024-01-01",
+            "usd_ars_oficial": "1000",
+            "usd_ars_blue": "1200",
+            "btc_usd": "50000",
+            "btc_ars": "60000000",
+        },
+    )
+    if response.status_code == HTTPStatus.CREATED:
+        return response.json()["id"]
+    return client.get("/exchange-rates/latest").json()["id"]
+
+
+def _normalize(value):
+    # Both engines return exact decimals but with different trailing zeros
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, str):
+        try:
+            return Decimal(value).normalize()
+        except ArithmeticError:
+            return value
+    return value
+
+
+def _reports(client):
+    return [_normalize(client.get(path, params=params).json()) for path, params in REPORTS]
+
+
+def test_columnar_engine_matches_sql_reports(client, monkeypatch, tmp_path):
+    register_user(client)
+    account_id = client.get("/accounts/").json()[0]["id"]
+    categories = [cat for cat in client.get("/categories/").json() if cat["parent_id"] is None]
+    rate_id = create_rate(client)
+
+    for index in range(24):
+        category = categories[index % len(categories)]
+        response = client.post(
+            "/transactions/",
+            json={
+                "transaction_date": f"2024-{index % 3 + 1:02d}-{index % 27 + 1:02d}T1{index % 10}:00:00+00:00",
+                "account_id": account_id,
+                "currency_code": ("USD", "ARS", "BTC")[index % 3],
+                "amount_original": str(Decimal("12.5") * (index + 1)),
+                "exchange_rate_id": rate_id,
+                "category_id": category["id"],
+            },
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+    expected = _reports(client)
+
+    monkeypatch.setattr(settings, "report_engine", "columnar")
+    monkeypatch.setattr(settings, "analytics_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "analytics_min_rows", 1)
+    assert _reports(client) == expected
+    snapshot = next(tmp_path.glob("user_*/transactions.parquet"))
+
+    # Incremental refresh picks up edits and deletions
+    transactions = client.get("/transactions/").json()
+    assert client.delete(f"/transactions/{transactions[0]['id']}").status_code == HTTPStatus.NO_CONTENT
+    assert client.patch(
+        f"/transactions/{transactions[1]['id']}", json={"amount_original": "999"}
+    ).status_code == HTTPStatus.OK
+    columnar = _reports(client)
+    assert snapshot.exists() and columnar != expected
+
+    monkeypatch.setattr(settings, "report_engine", "sql")
+    assert columnar == _reports(client)
@@ -0,0 +1,151 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from http import HTTPStatus
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models.transaction import Transaction
+from app.models.transaction_archive import transactions_archive
+from app.services import archive
+
+
+def register_user(client, email: str) -> None:
+    response = client.post("/auth/register", json={"email": email, "password": "verysecure", "timezone": "UTC"})
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def create_rate(client) -> int:
+    response = client.post(
+        "/exchange-rates/override",
+        json={
+            "effective_date": "2023-01-01",
+            "usd_ars_oficial": "1000",
+            "usd_ars_blue": "1300",
+            "btc_usd": "50000",
+            "btc_ars": "65000000",
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()["id"]
+
+
+def create_transaction(client, account_id: int, rate_id: int, when: str, amount: str, category_id: int) -> int:
+    response = client.post(
+        "/transactions/",
+        json={
+            "transaction_date": when,
+            "account_id": account_id,
+            "currency_code": "ARS",
+            "amount_original": amount,
+            "exchange_rate_id": rate_id,
+            "category_id": category_id,
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()["id"]
+
+
+def reports(client) -> tuple:
+    params = {"start": "2023-01-01T00:00:00+00:00", "end": "2026-12-31T00:00:00+00:00", "currency": "ARS"}
+    summary = client.get("/reports/summary", params={**params, "compare_previous": False}).json()
+    timeseries = client.get("/reports/timeseries", params={**params, "interval": "month"}).json()
+    categories = client.get("/reports/categories", params=params).json()
+    return summary["totals"], timeseries["points"], categories["entries"]
+
+
+def live_count(db_session) -> int:
+    return db_session.execute(select(func.count()).select_from(Transaction)).scalar_one()
+
+
+def test_archived_months_stay_visible_to_listings_and_reports(client, db_session, monkeypatch):
+    register_user(client, "archive@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    expense = next(cat["id"] for cat in client.get("/categories/").json() if cat["type"] == "expense")
+    rate_id = create_rate(client)
+    old = create_transaction(client, account_id, rate_id, "2023-05-10T12:00:00+00:00", "300", expense)
+    create_transaction(client, account_id, rate_id, "2023-05-20T12:00:00+00:00", "200", expense)
+    recent = create_transaction(client, account_id, rate_id, "2026-10-01T12:00:00+00:00", "50", expense)
+
+    listing = client.get("/transactions/").json()
+    before = reports(client)
+
+    monkeypatch.setattr(settings, "archive_after_months", 12)
+    assert archive.archive_due(db_session, today=date(2026, 10, 19)) == {date(2023, 5, 1): 2}
+    assert live_count(db_session) == 1
+    assert archive.archived_months(db_session) == [(date(2023, 5, 1), 2)]
+
+    assert client.get("/transactions/").json() == listing
+    assert reports(client) == before
+    recent_only = client.get("/transactions/", params={"start": "2026-10-01T00:00:00+00:00"}).json()
+    assert [item["id"] for item in recent_only] == [recent]
+
+    # Archived rows read fine but can't be edited until restored
+    assert Decimal(client.get(f"/transactions/{old}").json()["amount_ars"]) == Decimal("300")
+    assert client.patch(f"/transactions/{old}", json={"notes": "x"}).status_code == HTTPStatus.CONFLICT
+    assert client.delete(f"/transactions/{old}").status_code == HTTPStatus.CONFLICT
+
+    assert archive.restore_month(db_session, date(2023, 5, 1)) == 2
+    assert live_count(db_session) == 3
+    assert client.get("/transactions/").json() == listing
+    assert client.patch(f"/transactions/{old}", json={"notes": "x"}).status_code == HTTPStatus.OK
+
+
+def test_only_ranges_past_the_horizon_read_the_archive(monkeypatch):
+    today = date(2026, 10, 19)
+    assert archive.transactions_source(None, today) is Transaction
+
+    monkeypatch.setattr(settings, "archive_after_months", 12)
+    assert archive.archive_cutoff(today) == date(2025, 10, 1)
+    assert archive.transactions_source(datetime(2026, 1, 1, tzinfo=timezone.utc), today) is Transaction
+    # The first live month still unions, in case the archiver's clock is ahead
+    assert archive.transactions_source(datetime(2025, 10, 15, tzinfo=timezone.utc), today) is not Transaction
+    assert archive.transactions_source(datetime(2024, 1, 1), today) is not Transaction
+    assert archive.transactions_source(None, today) is not Transaction
+
+
+def test_category_changes_reach_archived_rows(client, db_session, monkeypatch):
+    register_user(client, "archive-retype@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    category = client.post("/categories/", json={"name": "Viejos", "type": "expense"}).json()
+    rate_id = create_rate(client)
+    create_transaction(client, account_id, rate_id, "2023-05-10T12:00:00+00:00", "300", category["id"])
+
+    monkeypatch.setattr(settings, "archive_after_months", 12)
+    archive.archive_due(db_session, today=date(2026, 10, 19))
+    assert client.patch(f"/categories/{category['id']}", json={"type": "income"}).status_code == HTTPStatus.OK
+
+    archived_type = db_session.execute(select(transactions_archive.c.effective_type)).scalar_one()
+    assert archived_type == "income"
+    totals, _, _ = reports(client)
+    assert Decimal(totals["income"]) == Decimal("300")
+
+
+def test_new_rows_and_duplicate_checks_see_the_archive(client, db_session, monkeypatch):
+    register_user(client, "archive-ids@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    expense = next(cat["id"] for cat in client.get("/categories/").json() if cat["type"] == "expense")
+    rate_id = create_rate(client)
+    old = create_transaction(client, account_id, rate_id, "2023-05-10T12:00:00+00:00", "300", expense)
+
+    monkeypatch.setattr(settings, "archive_after_months", 12)
+    archive.archive_due(db_session, today=date(2026, 10, 19))
+
+    # A new row never takes the id of an archived one
+    recent = create_transaction(client, account_id, rate_id, "2026-10-01T12:00:00+00:00", "50", expense)
+    assert recent != old
+    assert {item["id"] for item in client.get("/transactions/").json()} == {old, recent}
+
+    duplicate = {
+        "transaction_date": "2023-05-10T12:00:00+00:00",
+        "account_id": account_id,
+        "currency_code": "ARS",
+        "amount_original": "300",
+        "exchange_rate_id": rate_id,
+        "category_id": expense,
+    }
+    rejected = client.post("/transactions/", params={"on_duplicate": "reject"}, json=duplicate)
+    assert rejected.status_code == HTTPStatus.CONFLICT
+    imported = client.post("/transactions/import", json={"items": [duplicate], "on_duplicate": "skip"})
+    assert imported.status_code == HTTPStatus.CREATED
+    assert imported.json()["skipped"] == 1
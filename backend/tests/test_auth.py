@@ -1,6 +1,14 @@
 from http import HTTPStatus
 
+from sqlalchemy import event
+
+from app.core.security import password_hasher
+from app.crud import crud_user
+from app.models.account import Account
+from app.models.category import Category
+from app.models.user import User
 from app.schemas.user import UserCreate
+from app.services.defaults import DEFAULT_ACCOUNTS, DEFAULT_CATEGORIES, seed_defaults_for_user
 
 
 def test_register_and_me(client):
@@ -38,3 +46,64 @@ def test_login_sets_cookie(client):
     )
     assert response.status_code == HTTPStatus.OK
     assert "access_token" in client.cookies
+
+
+def test_login_rehashes_password_when_cost_changes(client, db_session, monkeypatch):
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    client.post(
+        "/auth/register",
+        json={"email": "rehash@example.com", "password": "verysecure", "timezone": "UTC"},
+    )
+    user = db_session.query(User).filter(User.email == "rehash@example.com").one()
+    assert user.hashed_password.startswith("$2b$04$")
+
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    client.cookies.clear()
+    response = client.post("/auth/login", json={"email": "rehash@example.com", "password": "verysecure"})
+    assert response.status_code == HTTPStatus.OK
+
+    db_session.refresh(user)
+    assert user.hashed_password.startswith("$2b$05$")
+    assert password_hasher.stats()["completed"] >= 2
+
+
+def test_login_is_rejected_when_hasher_is_saturated(client, monkeypatch):
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    client.post(
+        "/auth/register",
+        json={"email": "busy@example.com", "password": "verysecure", "timezone": "UTC"},
+    )
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post("/auth/login", json={"email": "busy@example.com", "password": "verysecure"})
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+    assert password_hasher.stats()["rejected"] >= 1
+
+
+def test_seed_defaults_uses_a_handful_of_statements(db_session):
+    user = crud_user.create_user(
+        db_session, UserCreate(email="seed@example.com", password="verysecure", timezone="UTC")
+    )
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind().engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        seed_defaults_for_user(db_session, user.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len([sql for sql in statements if sql.lstrip().upper().startswith("INSERT")]) <= 3
+    assert len(statements) <= 6
+
+    categories = db_session.query(Category).filter(Category.user_id == user.id).all()
+    expected = len(DEFAULT_CATEGORIES) + sum(len(item.children) for item in DEFAULT_CATEGORIES)
+    assert len(categories) == expected
+    by_id = {category.id: category for category in categories}
+    servicios = next(cat for cat in categories if cat.name == "Servicios" and cat.parent_id is None)
+    assert {cat.name for cat in categories if cat.parent_id == servicios.id} >= {"Luz", "Gas"}
+    assert all(by_id[cat.parent_id].parent_id is None for cat in categories if cat.parent_id)
+    assert db_session.query(Account).filter(Account.user_id == user.id).count() == len(DEFAULT_ACCOUNTS)
@@ -0,0 +1,51 @@
+import time
+from http import HTTPStatus
+
+from starlette.requests import Request
+
+from app.db import session as session_module
+from app.db.session import PRIMARY_PIN_COOKIE, ReplicaRouter, pinned_to_primary
+
+HEALTHY_URL = "sqlite:///./test.db"
+BROKEN_URL = "sqlite:////nonexistent-dir/replica.db"
+
+
+def _request(cookie: str | None = None) -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_router_skips_unhealthy_replicas_and_falls_back():
+    router = ReplicaRouter([BROKEN_URL, HEALTHY_URL], check_seconds=60, max_lag_seconds=5)
+    picked = {router.pick().url.database for _ in range(4)}
+    assert picked == {"./test.db"}
+    assert router.is_healthy(0) is False
+
+    down = ReplicaRouter([BROKEN_URL], check_seconds=60, max_lag_seconds=5)
+    assert down.pick() is None
+    assert ReplicaRouter([], check_seconds=60, max_lag_seconds=5).enabled is False
+
+
+def test_writes_pin_client_to_primary(client, monkeypatch):
+    monkeypatch.setattr(
+        session_module,
+        "replica_router",
+        ReplicaRouter([HEALTHY_URL], check_seconds=60, max_lag_seconds=5),
+    )
+    monkeypatch.setattr("app.main.replica_router", session_module.replica_router)
+
+    response = client.post(
+        "/auth/register",
+        json={"email": "replica@example.com", "password": "verysecure", "timezone": "UTC"},
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    pinned_until = int(response.cookies[PRIMARY_PIN_COOKIE])
+    assert pinned_until > time.time()
+
+    assert pinned_to_primary(_request(f"{PRIMARY_PIN_COOKIE}={pinned_until}")) is True
+    assert pinned_to_primary(_request(f"{PRIMARY_PIN_COOKIE}={int(time.time()) - 1}")) is False
+    assert pinned_to_primary(_request()) is False
+
+    listing = client.get("/transactions/")
+    assert listing.status_code == HTTPStatus.OK
+    assert PRIMARY_PIN_COOKIE not in listing.cookies
@@ -0,0 +1,106 @@
+import asyncio
+from http import HTTPStatus
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.services import events
+
+
+def register_user(client, email: str) -> int:
+    response = client.post("/auth/register", json={"email": email, "password": "verysecure", "timezone": "UTC"})
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()["id"]
+
+
+def create_rate(client) -> int:
+    response = client.post(
+        "/exchange-rates/override",
+        json={
+            "effective_date": "2024-03-01",
+            "usd_ars_oficial": "1000",
+            "usd_ars_blue": "1300",
+            "btc_usd": "50000",
+            "btc_ars": "65000000",
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()["id"]
+
+
+async def _drain(subscription: events.Subscription) -> list[events.Event]:
+    # Deliveries hop through call_soon_threadsafe; give them a turn of the loop
+    await asyncio.sleep(0.05)
+    received = []
+    while not subscription.queue.empty():
+        received.append(subscription.queue.get_nowait())
+    return received
+
+
+def test_write_paths_publish_to_the_owner_after_commit(client):
+    other_id = register_user(client, "events-other@example.com")
+    user_id = register_user(client, "events@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+
+    async def scenario():
+        mine = events.broker.subscribe(user_id)
+        theirs = events.broker.subscribe(other_id)
+        try:
+            rate_id = (await run_in_threadpool(create_rate, client))
+            created = await run_in_threadpool(
+                client.post,
+                "/transactions/",
+                json={
+                    "transaction_date": "2024-03-01T12:00:00+00:00",
+                    "account_id": account_id,
+                    "currency_code": "ARS",
+                    "amount_original": "100",
+                    "exchange_rate_id": rate_id,
+                },
+            )
+            assert created.status_code == HTTPStatus.CREATED
+            transaction_id = created.json()["id"]
+            deleted = await run_in_threadpool(client.delete, f"/transactions/{transaction_id}")
+            assert deleted.status_code == HTTPStatus.NO_CONTENT
+            return transaction_id, await _drain(mine), await _drain(theirs)
+        finally:
+            events.broker.unsubscribe(mine)
+            events.broker.unsubscribe(theirs)
+
+    transaction_id, mine, theirs = asyncio.run(scenario())
+    assert [(item.type, item.data) for item in mine] == [
+        (events.RATES_UPDATED, {"effective_date": "2024-03-01"}),
+        (events.TRANSACTIONS_CHANGED, {"ids": [transaction_id]}),
+        (events.TRANSACTIONS_CHANGED, {"ids": [transaction_id]}),
+    ]
+    # Rates are broadcast; transactions only reach their owner
+    assert [item.type for item in theirs] == [events.RATES_UPDATED]
+
+
+def test_rolled_back_events_are_dropped_and_slow_subscribers_resync():
+    async def scenario():
+        subscription = events.broker.subscribe(4242)
+        try:
+            with Session(create_engine("sqlite://")) as session:
+                session.execute(text("SELECT 1"))
+                events.emit(session, 4242, events.BUDGETS_CHANGED, ids=[1])
+                session.rollback()
+                session.execute(text("SELECT 1"))
+                session.commit()
+            assert await _drain(subscription) == []
+
+            for position in range(events.QUEUE_SIZE + 5):
+                events.broker.dispatch(events.Event(events.BUDGETS_CHANGED, 4242, {"ids": [position]}))
+            return await _drain(subscription)
+        finally:
+            events.broker.unsubscribe(subscription)
+
+    received = asyncio.run(scenario())
+    assert received[0].type == events.RESYNC
+    assert len(received) < events.QUEUE_SIZE
+    assert events.format_sse(received[-1]) == f"event: budgets.changed\ndata: {{\"ids\": [{events.QUEUE_SIZE + 4}]}}\n\n"
+
+
+def test_event_stream_requires_authentication(client):
+    assert client.get("/events/").status_code == HTTPStatus.UNAUTHORIZED
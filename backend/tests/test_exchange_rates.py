@@ -1,10 +1,21 @@
-from datetime import date
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from http import HTTPStatus
 
-from app.models.exchange_rate import ExchangeRate
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_exchange_rate, crud_rate_correction
+from app.models.exchange_rate import ExchangeRate, ExchangeRatePayload
+from app.models.user import User
 from app.schemas.exchange_rate import ExchangeRateValues
-from app.services import exchange_rates
+from app.services import archive, exchange_rates, rate_corrections
+from app.utils import locks
 
 
 def test_ensure_daily_exchange_rate_uses_cached_value(db_session, monkeypatch):
@@ -21,13 +32,16 @@ def test_ensure_daily_exchange_rate_uses_cached_value(db_session, monkeypatch):
             btc_usd=Decimal("40000"),
             btc_ars=Decimal("36000000"),
         )
-        return values, {"mock": True}
+        return values, {"mock": True}, []
 
     monkeypatch.setattr(exchange_rates, "fetch_remote_rates", fake_fetch)
 
     rate = exchange_rates.ensure_daily_exchange_rate(db_session)
     assert rate.usd_ars_oficial == Decimal("900")
     assert call_count["count"] == 1
+    # Provider payloads are stored compressed next to the rate, not on it
+    assert "payload" not in rate.__dict__
+    assert crud_exchange_rate.get_metadata_payload(db_session, rate.id) == '{"mock": true}'
 
     # Running again on the same day should not trigger an API call
     rate_again = exchange_rates.ensure_daily_exchange_rate(db_session)
@@ -99,3 +113,294 @@ def test_reprocess_endpoint_updates_transactions(client):
 
     txs = client.get("/transactions/").json()
     assert Decimal(txs[0]["amount_ars"]) == Decimal("1500")
+
+
+def _delete_today_rates(session: Session) -> None:
+    # Bulk deletes skip ON DELETE CASCADE on SQLite, so drop the payload rows explicitly
+    today_ids = session.query(ExchangeRate.id).filter(ExchangeRate.effective_date == date.today())
+    session.query(ExchangeRatePayload).filter(ExchangeRatePayload.exchange_rate_id.in_(today_ids)).delete(
+        synchronize_session=False
+    )
+    session.query(ExchangeRate).filter(ExchangeRate.effective_date == date.today()).delete()
+    session.commit()
+
+
+def test_ensure_daily_exchange_rate_single_flight(db_session, monkeypatch):
+    engine = db_session.get_bind().engine
+    cleanup = Session(bind=engine)
+    _delete_today_rates(cleanup)
+
+    call_count = {"count": 0}
+    release = threading.Event()
+
+    def slow_fetch():
+        call_count["count"] += 1
+        release.wait(timeout=5)
+        values = ExchangeRateValues(
+            usd_ars_oficial=Decimal("900"),
+            usd_ars_blue=Decimal("950"),
+            btc_usd=Decimal("40000"),
+            btc_ars=Decimal("36000000"),
+        )
+        return values, {"mock": True}, []
+
+    monkeypatch.setattr(exchange_rates, "fetch_remote_rates", slow_fetch)
+
+    # Count followers parked inside SingleFlight.do waiting on the leader's call
+    blocked = {"count": 0}
+    blocked_lock = threading.Lock()
+
+    class CountingEvent(threading.Event):
+        def wait(self, timeout=None):
+            with blocked_lock:
+                blocked["count"] += 1
+            return super().wait(timeout)
+
+    @dataclass
+    class CountingCall(locks._Call):
+        event: threading.Event = field(default_factory=CountingEvent)
+
+    monkeypatch.setattr(locks, "_Call", CountingCall)
+
+    def worker() -> int:
+        session = Session(bind=engine)
+        try:
+            return exchange_rates.ensure_daily_exchange_rate(session).id
+        finally:
+            session.close()
+
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            futures = [pool.submit(worker) for _ in range(6)]
+            deadline = time.monotonic() + 5
+            while blocked["count"] < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            # Every follower is waiting on the leader, which is still inside the only fetch
+            assert blocked["count"] == 5
+            assert call_count["count"] == 1
+            release.set()
+            rate_ids = {future.result(timeout=10) for future in futures}
+
+        assert call_count["count"] == 1
+        assert len(rate_ids) == 1
+        assert cleanup.query(ExchangeRate).filter(ExchangeRate.effective_date == date.today()).count() == 1
+    finally:
+        _delete_today_rates(cleanup)
+        cleanup.close()
+
+
+def test_stalled_correction_is_resumed_and_reaches_the_archive(client, db_session, monkeypatch):
+    register_user(client, email="resume@example.com")
+    user = db_session.query(User).filter(User.email == "resume@example.com").one()
+    user.is_superuser = True
+    db_session.commit()
+    rate_id = create_manual_rate(client, effective_date="2023-05-01", usd_ars="1000")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    for when in ("2023-05-02T10:00:00+00:00", "2026-10-01T10:00:00+00:00"):
+        response = client.post(
+            "/transactions/",
+            json={
+                "transaction_date": when,
+                "account_id": account_id,
+                "currency_code": "USD",
+                "amount_original": "10",
+                "exchange_rate_id": rate_id,
+            },
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+    monkeypatch.setattr(settings, "archive_after_months", 12)
+    assert archive.archive_due(db_session, today=date(2026, 10, 19)) == {date(2023, 5, 1): 1}
+
+    submitted: list[tuple[int, object]] = []
+    monkeypatch.setattr(rate_corrections, "submit_correction", lambda *args, **kwargs: submitted.append((args, kwargs)))
+    correction = {
+        "usd_ars_oficial": "1200",
+        "usd_ars_blue": "1200",
+        "btc_usd": "50000",
+        "btc_ars": "60000000",
+        "mode": "update",
+    }
+    job_id = client.post(f"/exchange-rates/{rate_id}/corrections", json=correction).json()["id"]
+
+    # The worker running it died halfway: nothing resumes it until its heartbeat goes stale
+    job = crud_rate_correction.get_correction(db_session, job_id)
+    job.status, job.total, job.updated = "running", 2, 1
+    job.report = json.dumps({user.id: 2})
+    job.heartbeat_at = datetime.now(tz=timezone.utc)
+    db_session.commit()
+    assert rate_corrections.resume_stale_corrections(db_session) == []
+    job.heartbeat_at = datetime.now(tz=timezone.utc) - timedelta(hours=1)
+    db_session.commit()
+    submitted.clear()
+    assert rate_corrections.resume_stale_corrections(db_session) == [job_id]
+    (resumed_id,), options = submitted[0]
+
+    session_factory = lambda: Session(bind=db_session.connection())  # noqa: E731
+    rate_corrections.run_correction(resumed_id, session_factory=session_factory, workers=1, **options)
+    # Claimed once: a second, late run of the same job is a no-op
+    rate_corrections.run_correction(resumed_id, session_factory=session_factory, workers=1, **options)
+    db_session.expire_all()
+
+    report = client.get(f"/exchange-rates/corrections/{job_id}").json()
+    assert report["status"] == "completed"
+    assert report["updated"] == report["total"] == 2
+    amounts = {Decimal(tx["amount_ars"]) for tx in client.get("/transactions/").json()}
+    assert amounts == {Decimal("12000")}
+
+
+def test_latest_serves_stored_rate_and_schedules_refresh(client, monkeypatch):
+    register_user(client, email="stale@example.com")
+    create_manual_rate(client, effective_date="2024-01-05", usd_ars="1100")
+
+    def fail_fetch():
+        raise AssertionError("request path must not fetch remote rates")
+
+    refreshes = {"count": 0}
+
+    def fake_refresh() -> bool:
+        refreshes["count"] += 1
+        return True
+
+    monkeypatch.setattr(exchange_rates, "fetch_remote_rates", fail_fetch)
+    monkeypatch.setattr(exchange_rates, "request_rate_refresh", fake_refresh)
+
+    response = client.get("/exchange-rates/latest")
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert data["is_stale"] is True
+    assert data["refreshing"] is True
+    assert data["source"] == "manual"
+    assert data["age_seconds"] >= 0
+    assert refreshes["count"] == 1
+
+
+def test_backfill_csv_fills_gaps_and_reprocess_matches_by_date(client):
+    register_user(client, email="backfill@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    create_manual_rate(client, effective_date="2023-06-02", usd_ars="250")
+
+    gaps = client.get("/exchange-rates/gaps", params={"start": "2023-06-01", "end": "2023-06-05"}).json()
+    assert gaps["missing"] == ["2023-06-01", "2023-06-03", "2023-06-04", "2023-06-05"]
+
+    tx_response = client.post(
+        "/transactions/",
+        json={
+            "transaction_date": "2023-06-05T12:00:00+00:00",
+            "account_id": account_id,
+            "currency_code": "USD",
+            "amount_original": "2",
+        },
+    )
+    assert tx_response.status_code == HTTPStatus.CREATED
+
+    csv_content = (
+        "date,usd_ars_oficial,usd_ars_blue,btc_usd,btc_ars\n"
+        "2023-06-01,240,480,27000,6480000\n"
+        "2023-06-02,241,481,27100,6500000\n"
+        "2023-06-05,245,490,26800,6566000\n"
+    )
+    response = client.post(
+        "/exchange-rates/backfill",
+        data={"start": "2023-06-01", "end": "2023-06-05", "fill_forward": "true"},
+        files={"file": ("rates.csv", csv_content, "text/csv")},
+    )
+    assert response.status_code == HTTPStatus.OK
+    result = response.json()
+    # 06-02 already had a manual rate; 06-03/04 are carried forward from 06-02
+    assert result == {"inserted": 4, "skipped": 1, "missing": []}
+
+    reprocess = client.post(
+        "/exchange-rates/reprocess",
+        json={"start": "2023-06-01T00:00:00+00:00", "end": "2023-06-06T00:00:00+00:00", "match_by_date": True},
+    )
+    assert reprocess.status_code == HTTPStatus.OK
+    assert reprocess.json()["updated"] == 1
+
+    tx = client.get("/transactions/", params={"start": "2023-06-01T00:00:00+00:00"}).json()[0]
+    assert Decimal(tx["amount_ars"]) == Decimal("490")
+
+
+def test_backfill_rejects_malformed_csv(client):
+    register_user(client, email="badcsv@example.com")
+    response = client.post(
+        "/exchange-rates/backfill",
+        data={"start": "2023-06-01", "end": "2023-06-05"},
+        files={"file": ("rates.csv", "date,usd_ars_oficial\n2023-06-01,240\n", "text/csv")},
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_rate_correction_recomputes_transactions_across_users(client, db_session, monkeypatch):
+    register_user(client, email="first@example.com")
+    rate_id = create_manual_rate(client, effective_date="2024-07-01", usd_ars="1000")
+
+    def create_tx(currency: str, amount: str) -> None:
+        account_id = client.get("/accounts/").json()[0]["id"]
+        response = client.post(
+            "/transactions/",
+            json={
+                "transaction_date": "2024-07-02T10:00:00+00:00",
+                "account_id": account_id,
+                "currency_code": currency,
+                "amount_original": amount,
+                "exchange_rate_id": rate_id,
+            },
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+    create_tx("USD", "10")
+    register_user(client, email="second@example.com")
+    create_tx("USD", "5")
+    create_tx("ARS", "2200")
+
+    correction = {
+        "usd_ars_oficial": "1100",
+        "usd_ars_blue": "1100",
+        "btc_usd": "50000",
+        "btc_ars": "60000000",
+        "mode": "supersede",
+    }
+    forbidden = client.post(f"/exchange-rates/{rate_id}/corrections", json=correction)
+    assert forbidden.status_code == HTTPStatus.FORBIDDEN
+
+    users = {user.email: user for user in db_session.query(User).all()}
+    users["second@example.com"].is_superuser = True
+    db_session.commit()
+
+    submitted: list[int] = []
+    monkeypatch.setattr(rate_corrections, "submit_correction", submitted.append)
+    response = client.post(f"/exchange-rates/{rate_id}/corrections", json=correction)
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job = response.json()
+    assert job["status"] == "pending"
+    replacement_id = job["replacement_rate_id"]
+    assert submitted == [job["id"]]
+
+    duplicate = client.post(f"/exchange-rates/{rate_id}/corrections", json=correction)
+    assert duplicate.status_code == HTTPStatus.BAD_REQUEST
+
+    rate_corrections.run_correction(
+        job["id"],
+        session_factory=lambda: Session(bind=db_session.connection()),
+        workers=1,
+        batch_size=1,
+    )
+    db_session.expire_all()
+
+    report = client.get(f"/exchange-rates/corrections/{job['id']}").json()
+    assert report["status"] == "completed"
+    assert report["total"] == 3
+    assert report["updated"] == 3
+    assert report["affected_by_user"] == {
+        str(users["first@example.com"].id): 1,
+        str(users["second@example.com"].id): 2,
+    }
+
+    transactions = {tx["currency_code"]: tx for tx in client.get("/transactions/").json()}
+    assert Decimal(transactions["USD"]["amount_ars"]) == Decimal("5500")
+    assert Decimal(transactions["ARS"]["amount_usd"]) == Decimal("2")
+    assert {tx["exchange_rate_id"] for tx in transactions.values()} == {replacement_id}
+
+    latest = client.get("/exchange-rates/latest").json()
+    assert latest["id"] == replacement_id
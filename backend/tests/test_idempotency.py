@@ -0,0 +1,235 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+import pytest
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_idempotency_key
+from app.models.idempotency_key import IdempotencyKey
+from app.services import idempotency
+
+
+@pytest.fixture
+def idempotency_db(db_session, monkeypatch):
+    # Keys are claimed outside the request's session; keep them inside the test transaction
+    monkeypatch.setattr(
+        idempotency,
+        "SessionLocal",
+        lambda: Session(bind=db_session.connection(), join_transaction_mode="create_savepoint"),
+    )
+
+
+def register_user(client, email: str) -> None:
+    response = client.post("/auth/register", json={"email": email, "password": "verysecure", "timezone": "UTC"})
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def create_rate(client) -> int:
+    response = client.post(
+        "/exchange-rates/override",
+        json={
+            "effective_date": "2024-04-01",
+            "usd_ars_oficial": "1000",
+            "usd_ars_blue": "1300",
+            "btc_usd": "50000",
+            "btc_ars": "65000000",
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()["id"]
+
+
+def transaction_payload(account_id: int, rate_id: int, amount: str = "100") -> dict:
+    return {
+        "transaction_date": "2024-04-01T12:00:00+00:00",
+        "account_id": account_id,
+        "currency_code": "ARS",
+        "amount_original": amount,
+        "exchange_rate_id": rate_id,
+    }
+
+
+def test_retried_create_replays_the_stored_response(client, db_session, idempotency_db):
+    register_user(client, "idempotency@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    rate_id = create_rate(client)
+    payload = transaction_payload(account_id, rate_id)
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = client.post("/transactions/", json=payload, headers=headers)
+    assert first.status_code == HTTPStatus.CREATED
+    assert idempotency.REPLAYED_HEADER not in first.headers
+
+    retry = client.post("/transactions/", json=payload, headers=headers)
+    assert retry.status_code == HTTPStatus.CREATED
+    assert retry.headers[idempotency.REPLAYED_HEADER] == "true"
+    assert retry.json() == first.json()
+    assert len(client.get("/transactions/").json()) == 1
+
+    # Same key, different request: refused rather than silently replayed
+    changed = client.post("/transactions/", json=transaction_payload(account_id, rate_id, "999"), headers=headers)
+    assert changed.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    # Without a key every request runs
+    assert client.post("/transactions/", json=payload).status_code == HTTPStatus.CREATED
+    assert client.post("/transactions/", json=payload).status_code == HTTPStatus.CREATED
+    assert len(client.get("/transactions/").json()) == 3
+
+
+def test_abandoned_and_expired_keys_can_be_reused(client, db_session, idempotency_db):
+    register_user(client, "idempotency-stale@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    rate_id = create_rate(client)
+    payload = transaction_payload(account_id, rate_id)
+
+    past = datetime.now(tz=timezone.utc) - timedelta(minutes=1)
+    db_session.add(
+        IdempotencyKey(
+            subject="idempotency-stale@example.com",
+            key="stale",
+            method="POST",
+            path="/transactions/",
+            request_hash="0" * 64,
+            locked_until=past,
+            expires_at=past + timedelta(hours=1),
+        )
+    )
+    db_session.commit()
+
+    response = client.post("/transactions/", json=payload, headers={"Idempotency-Key": "stale"})
+    assert response.status_code == HTTPStatus.CREATED
+    assert len(client.get("/transactions/").json()) == 1
+
+    record = crud_idempotency_key.get_key(db_session, "idempotency-stale@example.com", "stale")
+    record.expires_at = past
+    db_session.commit()
+    assert crud_idempotency_key.purge_expired(db_session) == 1
+
+
+def test_concurrent_duplicates_run_the_endpoint_once(monkeypatch):
+    records: dict[tuple[str, str], IdempotencyKey] = {}
+
+    def claim(subject, key, request, fingerprint):
+        existing = records.get((subject, key))
+        if existing is not None:
+            return existing, False
+        record = IdempotencyKey(id=len(records) + 1, request_hash=fingerprint, status_code=None)
+        records[(subject, key)] = record
+        return record, True
+
+    def complete(record_id, status_code, content_type, body):
+        record = next(item for item in records.values() if item.id == record_id)
+        record.status_code, record.content_type, record.body = status_code, content_type, body
+
+    monkeypatch.setattr(idempotency, "token_subject", lambda request: "coalesce@example.com")
+    monkeypatch.setattr(idempotency, "_claim", claim)
+    monkeypatch.setattr(idempotency, "_complete", complete)
+    monkeypatch.setattr(idempotency, "_load", lambda subject, key: records.get((subject, key)))
+
+    calls = 0
+
+    async def call_next(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        # call_next hands back the body as a stream
+        return StreamingResponse(iter([b'{"id":7}']), status_code=HTTPStatus.CREATED, media_type="application/json")
+
+    def make_request() -> Request:
+        async def receive():
+            return {"type": "http.request", "body": b'{"amount": 1}', "more_body": False}
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/transactions/",
+            "query_string": b"",
+            "headers": [(b"idempotency-key", b"same")],
+        }
+        return Request(scope, receive)
+
+    async def run():
+        return await asyncio.gather(*(idempotency.handle(make_request(), call_next) for _ in range(3)))
+
+    responses = asyncio.run(run())
+    assert calls == 1
+    assert {response.status_code for response in responses} == {HTTPStatus.CREATED}
+    assert {response.body for response in responses} == {b'{"id":7}'}
+    assert sum(idempotency.REPLAYED_HEADER in response.headers for response in responses) == 2
+
+
+def test_slow_owner_keeps_its_claim(monkeypatch):
+    records: dict[tuple[str, str], IdempotencyKey] = {}
+    lock = timedelta(seconds=0.1)
+
+    def claim(subject, key, request, fingerprint):
+        now = datetime.now(tz=timezone.utc)
+        existing = records.get((subject, key))
+        if existing is not None and (existing.status_code is not None or existing.locked_until > now):
+            return existing, False
+        # Missing or abandoned: take it over
+        record = IdempotencyKey(id=len(records) + 1, request_hash=fingerprint, status_code=None, locked_until=now + lock)
+        records[(subject, key)] = record
+        return record, True
+
+    def find(record_id):
+        return next((item for item in records.values() if item.id == record_id), None)
+
+    def extend(record_id):
+        record = find(record_id)
+        if record is None:
+            return False
+        record.locked_until = datetime.now(tz=timezone.utc) + lock
+        return True
+
+    def complete(record_id, status_code, content_type, body):
+        record = find(record_id)
+        if record is not None:
+            record.status_code, record.content_type, record.body = status_code, content_type, body
+
+    monkeypatch.setattr(settings, "idempotency_lock_seconds", lock.total_seconds())
+    monkeypatch.setattr(idempotency, "token_subject", lambda request: "slow@example.com")
+    monkeypatch.setattr(idempotency, "_claim", claim)
+    monkeypatch.setattr(idempotency, "_extend", extend)
+    monkeypatch.setattr(idempotency, "_complete", complete)
+    monkeypatch.setattr(idempotency, "_load", lambda subject, key: records.get((subject, key)))
+
+    calls = 0
+
+    async def call_next(request):
+        nonlocal calls
+        calls += 1
+        # Several lock periods long
+        await asyncio.sleep(0.35)
+        response = StreamingResponse(iter([b"{}"]), status_code=HTTPStatus.CREATED, media_type="application/json")
+        response.raw_headers.extend([(b"set-cookie", b"a=1"), (b"set-cookie", b"b=2")])
+        return response
+
+    def make_request() -> Request:
+        async def receive():
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/budgets/",
+            "query_string": b"",
+            "headers": [(b"idempotency-key", b"slow")],
+        }
+        return Request(scope, receive)
+
+    async def retry_later():
+        await asyncio.sleep(0.2)
+        return await idempotency.handle(make_request(), call_next)
+
+    async def run():
+        return await asyncio.gather(idempotency.handle(make_request(), call_next), retry_later())
+
+    first, retry = asyncio.run(run())
+    assert calls == 1
+    assert first.headers.getlist("set-cookie") == ["a=1", "b=2"]
+    assert retry.headers[idempotency.REPLAYED_HEADER] == "true"
@@ -0,0 +1,50 @@
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.crud.crud_transaction import _apply_list_filters
+from app.models.transaction import Transaction
+from app.services import partitions
+from app.services.reporting import ReportFilters, _apply_filters
+
+# Postgres database migrated to head; pruning can only be checked against the real planner
+PARTITIONED_DATABASE_URL = os.getenv("PARTITIONED_DATABASE_URL")
+
+
+def test_month_arithmetic_and_names():
+    assert partitions.month_start(date(2026, 10, 19)) == date(2026, 10, 1)
+    assert partitions.add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert partitions.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partitions.partition_name(date(2026, 3, 1)) == "transactions_p2026_03"
+
+
+def test_maintenance_is_noop_without_partitioning(db_session):
+    assert partitions.is_partitioned(db_session) is False
+    assert partitions.ensure_partitions(db_session) == []
+    with pytest.raises(ValueError):
+        partitions.detach_partition(db_session, date(2024, 1, 1))
+
+
+@pytest.mark.skipif(not PARTITIONED_DATABASE_URL, reason="needs PARTITIONED_DATABASE_URL")
+def test_report_and_list_queries_prune_to_requested_month():
+    engine = create_engine(PARTITIONED_DATABASE_URL)
+    with Session(engine) as session:
+        today = date(2026, 10, 19)
+        partitions.ensure_partitions(session, months_ahead=1, today=today)
+        start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+        end = datetime(2026, 10, 31, 23, 59, tzinfo=timezone.utc)
+
+        report = _apply_filters(
+            session.query(func.sum(Transaction.amount_ars)), ReportFilters(user_id=1, start=start, end=end)
+        )
+        listing = _apply_list_filters(select(Transaction.id), user_id=1, start=start, end=end)
+
+        assert partitions.scanned_partitions(session, report.statement) == {"transactions_p2026_10"}
+        assert partitions.scanned_partitions(session, listing) == {"transactions_p2026_10"}
+
+        with pytest.raises(ValueError):
+            partitions.detach_partition(session, date(2026, 10, 1), today=today)
+    engine.dispose()
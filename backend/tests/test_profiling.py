@@ -0,0 +1,114 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+from app.services import profiling
+from app.utils.profiling import RequestProfiler, activate, deactivate
+
+
+@pytest.fixture
+def profiling_db(db_session, monkeypatch):
+    # Profiles are saved outside the request's session; keep them inside the test transaction
+    monkeypatch.setattr(
+        profiling, "SessionLocal", lambda: Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    )
+    profiling.armed_targets.invalidate()
+    yield
+    profiling.armed_targets.invalidate()
+
+
+def register_user(client, email: str) -> None:
+    response = client.post("/auth/register", json={"email": email, "password": "verysecure", "timezone": "UTC"})
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def login(client, email: str) -> None:
+    response = client.post("/auth/login", json={"email": email, "password": "verysecure"})
+    assert response.status_code == HTTPStatus.OK
+
+
+def make_superuser(db_session, email: str) -> User:
+    user = db_session.query(User).filter(User.email == email).one()
+    user.is_superuser = True
+    db_session.commit()
+    return user
+
+
+def test_profiler_samples_registered_threads_and_times_sql(db_session):
+    profiler = RequestProfiler(interval=0.001)
+    token = activate(profiler)
+    profiler.start()
+    try:
+        profiler.register_current_thread()
+        db_session.query(User).count()
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+    finally:
+        profiler.stop()
+        deactivate(token)
+
+    assert profiler.sample_count > 0
+    assert any("test_profiler_samples_registered_threads_and_times_sql" in stack for stack in profiler.stacks)
+    assert len(profiler.statements) == 1
+    assert "FROM users" in profiler.statements[0].sql
+
+
+def test_admin_can_profile_own_request(client, db_session, profiling_db, monkeypatch):
+    started = []
+    begin = profiling.begin
+    monkeypatch.setattr(profiling, "begin", lambda: started.append(1) or begin())
+
+    # Anonymous and non-admin callers can ask, but never get a profiler
+    assert client.get("/health", headers={profiling.PROFILE_HEADER: "1"}).status_code == HTTPStatus.OK
+    register_user(client, "profiler@example.com")
+    response = client.get("/transactions/", headers={profiling.PROFILE_HEADER: "1"})
+    assert response.status_code == HTTPStatus.OK
+    assert profiling.PROFILE_ID_HEADER not in response.headers
+    assert started == []
+
+    make_superuser(db_session, "profiler@example.com")
+    profiling.armed_targets.invalidate()
+    response = client.get("/transactions/?profile=1")
+    assert response.status_code == HTTPStatus.OK
+    profile_id = response.headers[profiling.PROFILE_ID_HEADER]
+
+    profile = client.get(f"/admin/profiles/{profile_id}").json()
+    assert profile["path"] == "/transactions/"
+    assert profile["statement_count"] == len(profile["statements"]) > 0
+    assert any("transactions" in statement["sql"] for statement in profile["statements"])
+    assert [item["id"] for item in client.get("/admin/profiles").json()] == [int(profile_id)]
+
+    collapsed = client.get(f"/admin/profiles/{profile_id}/collapsed")
+    assert collapsed.status_code == HTTPStatus.OK
+    assert collapsed.text == "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+
+
+def test_armed_user_is_profiled_for_the_next_requests(client, db_session, profiling_db):
+    register_user(client, "slow-dashboard@example.com")
+    target = db_session.query(User).filter(User.email == "slow-dashboard@example.com").one()
+    register_user(client, "oncall@example.com")
+    make_superuser(db_session, "oncall@example.com")
+
+    assert client.post("/admin/profiling/targets", json={"user_id": 999999}).status_code == HTTPStatus.NOT_FOUND
+    response = client.post("/admin/profiling/targets", json={"user_id": target.id, "requests": 1})
+    assert response.status_code == HTTPStatus.CREATED
+    # The admin's own requests are not profiled without asking
+    assert profiling.PROFILE_ID_HEADER not in client.get("/admin/profiling/targets").headers
+
+    login(client, "slow-dashboard@example.com")
+    first = client.get("/reports/summary")
+    assert first.status_code == HTTPStatus.OK
+    assert profiling.PROFILE_ID_HEADER in first.headers
+    second = client.get("/reports/summary")
+    assert profiling.PROFILE_ID_HEADER not in second.headers
+    assert client.get("/admin/profiles").status_code == HTTPStatus.FORBIDDEN
+
+    login(client, "oncall@example.com")
+    profiles = client.get("/admin/profiles", params={"user_id": target.id}).json()
+    assert [(item["path"], item["user_id"]) for item in profiles] == [("/reports/summary", target.id)]
+    assert client.delete(f"/admin/profiling/targets/{target.id}").status_code == HTTPStatus.NO_CONTENT
+    assert client.get("/admin/profiling/targets").json() == []
@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+import pytest
+
+from app.models.user import User
+from app.services import query_plans
+
+
+@pytest.fixture
+def plan_user_id(db_session):
+    return query_plans.seed_dataset(db_session, users=3, rows_per_user=300)
+
+
+@pytest.mark.parametrize("name", sorted(query_plans.HOT_QUERIES))
+def test_hot_queries_keep_user_scoped_index_plans(db_session, plan_user_id, name):
+    report = query_plans.explain_hot_query(db_session, name, plan_user_id)
+    assert report.statements, "no statement on transactions was captured"
+    assert report.violations == []
+
+
+def test_expectations_flag_full_scans():
+    scan = query_plans.StatementPlan(sql="", nodes=query_plans._sqlite_nodes([(2, 0, 0, "SCAN transactions")]), raw=[])
+    violations = query_plans._violations([scan], query_plans.Expectation(uses_index=("ix_transactions_user_date",)))
+    assert violations == ["seq scan on transactions", "none of ix_transactions_user_date used"]
+
+    skip_scan = query_plans._sqlite_nodes(
+        [(2, 0, 0, "SEARCH transactions USING INDEX uq_transactions_recurring_date (ANY(recurring_id) AND transaction_date>?)")]
+    )
+    assert query_plans._violations([query_plans.StatementPlan(sql="", nodes=skip_scan, raw=[])], query_plans.Expectation())
+
+
+def test_query_plan_endpoint_is_admin_only(client, db_session, plan_user_id):
+    response = client.post(
+        "/auth/register", json={"email": "plans@example.com", "password": "verysecure", "timezone": "UTC"}
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert client.get("/admin/query-plans").status_code == HTTPStatus.FORBIDDEN
+
+    db_session.query(User).filter(User.email == "plans@example.com").one().is_superuser = True
+    db_session.commit()
+    response = client.get("/admin/query-plans", params={"name": "reports.summary", "user_id": plan_user_id})
+    assert response.status_code == HTTPStatus.OK
+    [plan] = response.json()
+    assert plan["dialect"] == "sqlite" and plan["violations"] == []
+    assert plan["statements"][0]["nodes"][0]["index"] == "ix_transactions_user_date"
+    assert client.get("/admin/query-plans", params={"name": "nope"}).status_code == HTTPStatus.NOT_FOUND
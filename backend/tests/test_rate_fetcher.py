@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app.models.exchange_rate import ExchangeRate, ExchangeRateSource
+from app.services import exchange_rates
+from app.services.rate_fetcher import ProviderResult, RateFetcher, RateFetchError
+from app.services.rate_fixtures import recorded_transport
+
+
+def make_fetcher(overrides=None, **kwargs) -> RateFetcher:
+    kwargs.setdefault("retries", 2)
+    kwargs.setdefault("backoff", 0)
+    kwargs.setdefault("failure_threshold", 2)
+    kwargs.setdefault("reset_timeout", 60)
+    return RateFetcher(transport=recorded_transport(overrides), **kwargs)
+
+
+def test_fetch_uses_recorded_providers():
+    fetcher = make_fetcher()
+    try:
+        values, metadata, results = fetcher.fetch()
+    finally:
+        fetcher.close()
+
+    assert values.usd_ars_oficial == Decimal("995.5")
+    assert values.usd_ars_blue == Decimal("1195")
+    assert values.btc_usd == Decimal("68320")
+    assert set(metadata) == {"dolarapi", "coingecko"}
+    assert all(result.ok and result.attempts == 1 for result in results)
+
+
+def test_fetch_retries_transient_errors():
+    calls = {"count": 0}
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        if calls["count"] < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"bitcoin": {"usd": 1, "ars": 1000}})
+
+    fetcher = make_fetcher({"api.coingecko.com": flaky})
+    try:
+        values, _, results = fetcher.fetch()
+    finally:
+        fetcher.close()
+
+    assert values.btc_ars == Decimal("1000")
+    coingecko = next(result for result in results if result.provider == "Coingecko")
+    assert coingecko.attempts == 3
+
+
+def test_circuit_breaker_short_circuits_failing_provider():
+    calls = {"count": 0}
+
+    def down(request: httpx.Request) -> httpx.Response:
+        calls["count"] += 1
+        return httpx.Response(500)
+
+    fetcher = make_fetcher({"dolarapi.com": down}, retries=0)
+    try:
+        for _ in range(2):
+            with pytest.raises(RateFetchError):
+                fetcher.fetch()
+        assert fetcher.breaker("DolarAPI").state == "open"
+
+        with pytest.raises(RateFetchError) as exc_info:
+            fetcher.fetch()
+    finally:
+        fetcher.close()
+
+    assert calls["count"] == 2
+    statuses = {result.provider: result.status for result in exc_info.value.results}
+    assert statuses == {"DolarAPI": "circuit_open", "Coingecko": "ok"}
+
+
+def test_ensure_daily_rate_records_source_status(db_session, monkeypatch):
+    db_session.query(ExchangeRate).delete()
+    db_session.commit()
+
+    fetcher = make_fetcher()
+    stale = ProviderResult("DolarAPI", "timeout", 4000, error="x" * 200)
+    fetch = fetcher.fetch
+
+    def overlapped_fetch():
+        # Another fetch finishes right after this one and overwrites the shared last_results
+        result = fetch()
+        fetcher.last_results["DolarAPI"] = stale
+        return result
+
+    monkeypatch.setattr(fetcher, "fetch", overlapped_fetch)
+    monkeypatch.setattr(exchange_rates, "rate_fetcher", fetcher)
+    try:
+        rate = exchange_rates.ensure_daily_exchange_rate(db_session)
+    finally:
+        fetcher.close()
+
+    assert rate.usd_ars_oficial == Decimal("995.5")
+    statuses = {source.name: source.last_status for source in db_session.query(ExchangeRateSource).all()}
+    assert statuses["DolarAPI"].startswith("ok ")
+    assert statuses["Coingecko"].startswith("ok ")
+
+    # Long errors are cut to the column's width
+    exchange_rates.record_source_status(db_session, [stale])
+    db_session.expire_all()
+    status = db_session.query(ExchangeRateSource).filter(ExchangeRateSource.name == "DolarAPI").one().last_status
+    assert status.startswith("timeout 4000ms x") and len(status) == 50
@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from http import HTTPStatus
+
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.transaction import Transaction
+from app.services.recurring import materialize_due
+
+
+def register_user(client, email="recurring@example.com"):
+    response = client.post(
+        "/auth/register",
+        json={"email": email, "password": "verysecure", "timezone": "UTC"},
+    )
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def create_rate(client, effective_date: str, usd_ars: str) -> int:
+    response = client.post(
+        "/exchange-rates/override",
+        json={
+            "effective_date": effective_date,
+            "usd_ars_oficial": usd_ars,
+            "usd_ars_blue": usd_ars,
+            "btc_usd": "50000",
+            "btc_ars": "60000000",
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()["id"]
+
+
+def test_materialize_due_occurrences_in_batches(client, db_session):
+    register_user(client)
+    account_id = client.get("/accounts/").json()[0]["id"]
+    categories = client.get("/categories/").json()
+    salary = next(cat for cat in categories if cat["name"] == "Salario")
+    create_rate(client, "2024-01-01", "800")
+    february = create_rate(client, "2024-02-01", "850")
+
+    invalid = client.post(
+        "/recurring-transactions/",
+        json={
+            "account_id": account_id,
+            "currency_code": "USD",
+            "amount_original": "1000",
+            "rrule": "FREQ=SOMETIMES",
+            "start_at": "2024-01-01T10:00:00+00:00",
+        },
+    )
+    assert invalid.status_code == HTTPStatus.BAD_REQUEST
+
+    response = client.post(
+        "/recurring-transactions/",
+        json={
+            "account_id": account_id,
+            "category_id": salary["id"],
+            "currency_code": "USD",
+            "amount_original": "1000",
+            "notes": "Sueldo",
+            "rrule": "FREQ=MONTHLY;BYMONTHDAY=1",
+            "start_at": "2024-01-01T10:00:00+00:00",
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    template = response.json()
+    assert template["next_run_at"].startswith("2024-01-01T10:00:00")
+
+    limited = client.post(
+        "/recurring-transactions/",
+        json={
+            "account_id": account_id,
+            "currency_code": "ARS",
+            "amount_original": "5000",
+            "rrule": "FREQ=WEEKLY;COUNT=2",
+            "start_at": "2024-01-10T12:00:00+00:00",
+        },
+    ).json()
+
+    now = datetime(2024, 3, 15, tzinfo=timezone.utc)
+    assert materialize_due(db_session, now=now, batch_size=1) == 5
+    assert materialize_due(db_session, now=now) == 0
+
+    salaries = (
+        db_session.query(Transaction)
+        .filter(Transaction.recurring_id == template["id"])
+        .order_by(Transaction.transaction_date)
+        .all()
+    )
+    assert [tx.transaction_date.day for tx in salaries] == [1, 1, 1]
+    assert [tx.amount_ars for tx in salaries] == [Decimal("800000"), Decimal("850000"), Decimal("850000")]
+    assert salaries[1].exchange_rate_id == february
+    assert {tx.effective_type for tx in salaries} == {"income"}
+
+    refreshed = db_session.get(RecurringTransaction, template["id"])
+    assert refreshed.next_run_at.replace(tzinfo=timezone.utc) == datetime(2024, 4, 1, 10, tzinfo=timezone.utc)
+    assert db_session.get(RecurringTransaction, limited["id"]).next_run_at is None
+
+    paused = client.patch(f"/recurring-transactions/{template['id']}", json={"is_active": False})
+    assert paused.json()["is_active"] is False
+    assert materialize_due(db_session, now=datetime(2024, 5, 2, tzinfo=timezone.utc)) == 0
+
+
+def test_already_materialized_occurrences_dont_block_the_batch(client, db_session):
+    register_user(client, email="recurring-rerun@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    create_rate(client, "2024-01-01", "800")
+
+    def create_template(amount: str) -> int:
+        response = client.post(
+            "/recurring-transactions/",
+            json={
+                "account_id": account_id,
+                "currency_code": "ARS",
+                "amount_original": amount,
+                "rrule": "FREQ=MONTHLY;BYMONTHDAY=1",
+                "start_at": "2024-01-01T10:00:00+00:00",
+            },
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        return response.json()["id"]
+
+    first = create_template("100")
+    now = datetime(2024, 1, 15, tzinfo=timezone.utc)
+    assert materialize_due(db_session, now=now) == 1
+
+    # A catch-up re-emits January for the first template while the second one is due too
+    second = create_template("200")
+    db_session.get(RecurringTransaction, first).next_run_at = datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+    db_session.commit()
+    assert materialize_due(db_session, now=now) == 1
+    counts = {
+        template_id: db_session.query(Transaction).filter(Transaction.recurring_id == template_id).count()
+        for template_id in (first, second)
+    }
+    assert counts == {first: 1, second: 1}
+
+    cleared = client.patch(f"/recurring-transactions/{first}", json={"account_id": None})
+    assert cleared.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert client.patch(f"/recurring-transactions/{first}", json={"notes": None}).status_code == HTTPStatus.OK
@@ -136,3 +136,95 @@ def test_reports_endpoints(client):
     )
     entries = category_resp.json()["entries"]
     assert any(entry["category_id"] == expense_cat and Decimal(entry["total"]) == Decimal("50000") for entry in entries)
+
+
+def test_category_retype_cascades_to_reports(client):
+    register_user(client, email="retype@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    categories = client.get("/categories/").json()
+    parent = next(cat for cat in categories if cat["type"] == "expense" and cat["children"])
+    subcategory = parent["children"][0]
+
+    rate_id = create_rate(client, effective_date="2024-03-01")
+    resp = client.post(
+        "/transactions/",
+        json={
+            "transaction_date": "2024-03-05T10:00:00+00:00",
+            "account_id": account_id,
+            "currency_code": "USD",
+            "amount_original": "10",
+            "exchange_rate_id": rate_id,
+            "category_id": parent["id"],
+            "subcategory_id": subcategory["id"],
+        },
+    )
+    assert resp.status_code == HTTPStatus.CREATED
+
+    params = {
+        "start": "2024-03-01T00:00:00+00:00",
+        "end": "2024-04-01T00:00:00+00:00",
+        "currency": "ARS",
+    }
+    entries = client.get("/reports/categories", params=params).json()["entries"]
+    assert [entry["category_id"] for entry in entries] == [parent["id"]]
+
+    patch = client.patch(f"/categories/{subcategory['id']}", json={"type": "income"})
+    assert patch.status_code == HTTPStatus.OK
+
+    summary = client.get("/reports/summary", params={**params, "compare_previous": False}).json()
+    assert Decimal(summary["totals"]["income"]) == Decimal("10000")
+    assert Decimal(summary["totals"]["expense"]) == Decimal("0")
+
+
+def test_reports_convert_with_rate_effective_on_transaction_date(client):
+    register_user(client, email="asof@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    categories = client.get("/categories/").json()
+    expense_cat = next(cat["id"] for cat in categories if cat["type"] == "expense" and cat["parent_id"] is None)
+
+    rate_id = create_rate(client, effective_date="2024-05-01")
+    later = client.post(
+        "/exchange-rates/override",
+        json={
+            "effective_date": "2024-05-08",
+            "usd_ars_oficial": "1100",
+            "usd_ars_blue": "1300",
+            "btc_usd": "50000",
+            "btc_ars": "65000000",
+        },
+    )
+    assert later.status_code == HTTPStatus.CREATED
+
+    for day in ("05", "10"):
+        resp = client.post(
+            "/transactions/",
+            json={
+                "transaction_date": f"2024-05-{day}T10:00:00+00:00",
+                "account_id": account_id,
+                "currency_code": "USD",
+                "amount_original": "10",
+                "exchange_rate_id": rate_id,
+                "category_id": expense_cat,
+            },
+        )
+        assert resp.status_code == HTTPStatus.CREATED
+
+    params = {
+        "start": "2024-05-01T00:00:00+00:00",
+        "end": "2024-06-01T00:00:00+00:00",
+        "currency": "ARS",
+        "compare_previous": False,
+    }
+    stored = client.get("/reports/summary", params=params).json()
+    assert Decimal(stored["totals"]["expense"]) == Decimal("20000")
+    assert stored["rate_type"] is None
+
+    official = client.get("/reports/summary", params={**params, "rate_type": "official"}).json()
+    assert Decimal(official["totals"]["expense"]) == Decimal("21000")
+    assert official["rate_type"] == "official"
+
+    blue = client.get("/reports/categories", params={**params, "rate_type": "blue"}).json()
+    assert Decimal(blue["entries"][0]["total"]) == Decimal("25000")
+
+    invalid = client.get("/reports/summary", params={**params, "rate_type": "mep"})
+    assert invalid.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.crud import crud_scheduler_lease
+from app.models.scheduler_lease import SchedulerLease
+from app.worker import scheduler as scheduler_module
+
+
+@pytest.fixture
+def lease_db(db_session):
+    # try_acquire rolls back on a lost race; keep that inside a savepoint of the test transaction
+    with Session(bind=db_session.connection(), join_transaction_mode="create_savepoint") as session:
+        yield session
+
+
+def test_lease_has_single_holder_until_expiry(lease_db):
+    assert crud_scheduler_lease.try_acquire(lease_db, "test-lease", "worker-a", 60) is True
+    assert crud_scheduler_lease.try_acquire(lease_db, "test-lease", "worker-b", 60) is False
+    # Renewal by the current holder keeps the lease
+    assert crud_scheduler_lease.try_acquire(lease_db, "test-lease", "worker-a", 60) is True
+
+    lease = lease_db.get(SchedulerLease, "test-lease")
+    lease.expires_at = datetime.now(tz=timezone.utc) - timedelta(seconds=1)
+    lease_db.commit()
+
+    assert crud_scheduler_lease.try_acquire(lease_db, "test-lease", "worker-b", 60) is True
+    assert lease_db.get(SchedulerLease, "test-lease").holder == "worker-b"
+
+    crud_scheduler_lease.release(lease_db, "test-lease", "worker-b")
+    assert crud_scheduler_lease.get_lease(lease_db, "test-lease") is None
+
+
+def test_leader_only_jobs_skip_followers(monkeypatch):
+    calls = []
+
+    @scheduler_module.leader_only
+    def job() -> None:
+        calls.append(1)
+
+    scheduler_module._leader.clear()
+    job()
+    assert calls == []
+
+    scheduler_module._leader.set()
+    try:
+        job()
+    finally:
+        scheduler_module._leader.clear()
+    assert calls == [1]
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+from app.models.user import User
+from app.services import changelog
+
+
+def register_user(client, email: str) -> None:
+    response = client.post("/auth/register", json={"email": email, "password": "verysecure", "timezone": "UTC"})
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def login(client, email: str) -> None:
+    assert client.post("/auth/login", json={"email": email, "password": "verysecure"}).status_code == HTTPStatus.OK
+
+
+def create_rate(client) -> int:
+    response = client.post(
+        "/exchange-rates/override",
+        json={
+            "effective_date": "2024-04-01",
+            "usd_ars_oficial": "1000",
+            "usd_ars_blue": "1300",
+            "btc_usd": "50000",
+            "btc_ars": "65000000",
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()["id"]
+
+
+def create_transaction(client, account_id: int, rate_id: int, amount: str = "100") -> int:
+    response = client.post(
+        "/transactions/",
+        json={
+            "transaction_date": "2024-04-01T12:00:00+00:00",
+            "account_id": account_id,
+            "currency_code": "ARS",
+            "amount_original": amount,
+            "exchange_rate_id": rate_id,
+        },
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()["id"]
+
+
+def test_sync_returns_only_changes_after_the_cursor(client):
+    register_user(client, "sync-other@example.com")
+    register_user(client, "sync@example.com")
+
+    initial = client.get("/sync/").json()
+    assert all(initial[entity]["reset"] for entity in ("accounts", "categories", "transactions", "budgets"))
+    cursor = initial["version"]
+
+    account = client.post("/accounts/", json={"name": "Billetera", "currency_code": "ARS"}).json()
+    rate_id = create_rate(client)
+    kept = create_transaction(client, account["id"], rate_id)
+    removed = create_transaction(client, account["id"], rate_id)
+    assert client.patch(f"/transactions/{kept}", json={"notes": "almuerzo"}).status_code == HTTPStatus.OK
+    assert client.delete(f"/transactions/{removed}").status_code == HTTPStatus.NO_CONTENT
+
+    delta = client.get("/sync/", params={"since": cursor}).json()
+    assert delta["version"] == cursor + 5
+    assert delta["has_more"] is False
+    assert [item["id"] for item in delta["accounts"]["upserted"]] == [account["id"]]
+    assert [(item["id"], item["notes"]) for item in delta["transactions"]["upserted"]] == [(kept, "almuerzo")]
+    assert delta["transactions"]["deleted"] == [removed]
+    assert delta["categories"] == {"reset": False, "upserted": [], "deleted": []}
+
+    bulk = client.post("/transactions/bulk/delete", json={"ids": [kept]})
+    assert bulk.status_code == HTTPStatus.OK
+    latest = client.get("/sync/", params={"since": delta["version"]}).json()
+    assert latest["transactions"] == {"reset": False, "upserted": [], "deleted": [kept]}
+    assert client.get("/sync/", params={"since": latest["version"]}).json()["transactions"]["deleted"] == []
+
+    # Another user's log is untouched by all of the above
+    login(client, "sync-other@example.com")
+    assert client.get("/sync/").json()["version"] == 0
+
+
+def test_sync_pages_by_version_and_honours_resets(client, db_session):
+    register_user(client, "sync-pages@example.com")
+    user = db_session.query(User).filter(User.email == "sync-pages@example.com").one()
+    rate_id = create_rate(client)
+    account_id = client.get("/accounts/").json()[0]["id"]
+    created = [create_transaction(client, account_id, rate_id, amount) for amount in ("1", "2", "3")]
+
+    page = changelog.changes_since(db_session, user.id, since=1, max_versions=1)
+    assert (page.version, page.has_more) == (2, True)
+    assert [record.id for record in page.changes[changelog.TRANSACTION].upserted] == [created[1]]
+    page = changelog.changes_since(db_session, user.id, since=page.version, max_versions=1)
+    assert (page.version, page.has_more) == (3, False)
+
+    changelog.record(db_session, user.id, changelog.TRANSACTION, changelog.RESET)
+    db_session.commit()
+    page = changelog.changes_since(db_session, user.id, since=0)
+    assert page.changes[changelog.TRANSACTION].reset is True
+    assert page.changes[changelog.TRANSACTION].upserted == []
+    assert page.changes[changelog.ACCOUNT].reset is False
@@ -3,6 +3,8 @@ from decimal import Decimal
 
 from http import HTTPStatus
 
+import pytest
+
 
 def register_user(client, email="tx@example.com"):
     payload = {
@@ -84,3 +86,163 @@ def test_update_transaction_switch_to_blue_rate(client):
     updated = update_resp.json()
     assert Decimal(updated["amount_ars"]) == Decimal("65000")
     assert updated["rate_type"] == "blue"
+
+
+def test_bulk_recategorize_and_delete(client):
+    register_user(client, email="bulk@example.com")
+    accounts = client.get("/accounts/").json()
+    categories = client.get("/categories/").json()
+    parent = next(cat for cat in categories if cat["type"] == "expense" and cat["children"])
+    subcategory = parent["children"][0]
+    income = next(cat for cat in categories if cat["type"] == "income" and cat["parent_id"] is None)
+    rate_id = create_rate(client, "2024-01-04")
+
+    ids = []
+    for index in range(4):
+        response = client.post(
+            "/transactions/",
+            json={
+                "transaction_date": f"2024-01-0{index + 4}T10:00:00+00:00",
+                "account_id": accounts[0]["id"],
+                "currency_code": "USD",
+                "amount_original": "10",
+                "exchange_rate_id": rate_id,
+                "category_id": income["id"],
+                "notes": "cafe" if index < 2 else "otro",
+            },
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        ids.append(response.json()["id"])
+    before = client.get(f"/transactions/{ids[0]}").json()
+
+    response = client.post(
+        "/transactions/bulk/update",
+        json={"ids": ids[:3], "changes": {"subcategory_id": subcategory["id"], "account_id": accounts[1]["id"]}},
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {"affected": 3}
+
+    moved = client.get(f"/transactions/{ids[0]}").json()
+    assert moved["category_id"] == parent["id"]
+    assert moved["subcategory_id"] == subcategory["id"]
+    assert moved["account_id"] == accounts[1]["id"]
+    assert moved["amount_ars"] == before["amount_ars"]
+    summary = client.get(
+        "/reports/summary",
+        params={"start": "2024-01-01T00:00:00+00:00", "end": "2024-02-01T00:00:00+00:00", "currency": "USD"},
+    ).json()
+    assert Decimal(summary["totals"]["expense"]) == Decimal("30")
+
+    by_filter = client.post(
+        "/transactions/bulk/update",
+        json={"filters": {"search": "cafe"}, "changes": {"notes": None}},
+    )
+    assert by_filter.json() == {"affected": 2}
+    assert client.get(f"/transactions/{ids[1]}").json()["notes"] is None
+
+    invalid = client.post("/transactions/bulk/update", json={"ids": ids, "changes": {}})
+    assert invalid.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    missing = client.post("/transactions/bulk/update", json={"ids": ids, "changes": {"category_id": 999999}})
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+
+    # An empty filter set would match everything: refused instead of wiping the history
+    for empty in ({}, {"search": None, "account_ids": []}):
+        refused = client.post("/transactions/bulk/delete", json={"filters": empty})
+        assert refused.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        refused = client.post("/transactions/bulk/update", json={"filters": empty, "changes": {"notes": "x"}})
+        assert refused.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert len(client.get("/transactions/").json()) == 4
+
+    deleted = client.post(
+        "/transactions/bulk/delete",
+        json={"filters": {"account_ids": [accounts[1]["id"]]}},
+    )
+    assert deleted.json() == {"affected": 3}
+    assert [tx["id"] for tx in client.get("/transactions/").json()] == [ids[3]]
+
+
+def test_duplicate_fingerprints_on_create_and_import(client):
+    register_user(client, email="dedup@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    rate_id = create_rate(client, "2024-01-08")
+    base = {
+        "transaction_date": "2024-01-08T09:00:00+00:00",
+        "account_id": account_id,
+        "currency_code": "ARS",
+        "amount_original": "1500",
+        "exchange_rate_id": rate_id,
+        "notes": "Supermercado Día",
+    }
+    first = client.post("/transactions/", json=base)
+    assert first.json()["is_possible_duplicate"] is False
+
+    same = {**base, "transaction_date": "2024-01-08T18:30:00+00:00", "notes": "  supermercado   DÍA "}
+    rejected = client.post("/transactions/", params={"on_duplicate": "reject"}, json=same)
+    assert rejected.status_code == HTTPStatus.CONFLICT
+
+    other = {**base, "amount_original": "1499.99"}
+    imported = client.post("/transactions/import", json={"items": [same, other, other]})
+    assert imported.status_code == HTTPStatus.CREATED
+    result = imported.json()
+    assert (result["created"], result["skipped"], result["flagged"]) == (1, 2, 0)
+
+    flagged = client.post("/transactions/import", json={"items": [same], "on_duplicate": "flag"}).json()
+    assert flagged["flagged"] == 1
+    assert client.get(f"/transactions/{flagged['ids'][0]}").json()["is_possible_duplicate"] is True
+
+    # Editing the notes moves the row out of its duplicate group
+    client.patch(f"/transactions/{first.json()['id']}", json={"notes": "otra cosa"})
+    retry = client.post("/transactions/", params={"on_duplicate": "reject"}, json={**base, "notes": "otra cosa"})
+    assert retry.status_code == HTTPStatus.CONFLICT
+
+
+def test_list_and_timeseries_in_binary_formats(client):
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+    register_user(client, email="binary@example.com")
+    account_id = client.get("/accounts/").json()[0]["id"]
+    rate_id = create_rate(client, "2024-01-05")
+    for day, amount in (("05", "10.5"), ("06", "20")):
+        response = client.post(
+            "/transactions/",
+            json={
+                "transaction_date": f"2024-01-{day}T12:00:00+00:00",
+                "account_id": account_id,
+                "currency_code": "USD",
+                "amount_original": amount,
+                "exchange_rate_id": rate_id,
+                "notes": f"dia {day}",
+            },
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+    as_json = client.get("/transactions/")
+    assert as_json.headers["content-type"] == "application/json"
+    assert "Accept" in as_json.headers["vary"]
+    expected = as_json.json()
+
+    packed = client.get("/transactions/", headers={"Accept": "application/msgpack"})
+    assert packed.headers["content-type"] == "application/msgpack"
+    columns = msgpack.unpackb(packed.content, timestamp=3)["columns"]
+    assert columns["id"] == [item["id"] for item in expected]
+    assert [Decimal(value) for value in columns["amount_ars"]] == [Decimal(item["amount_ars"]) for item in expected]
+    assert columns["transaction_date"][0] == datetime(2024, 1, 6, 12, tzinfo=timezone.utc)
+
+    arrow = client.get("/transactions/", headers={"Accept": "application/vnd.apache.arrow.stream, */*;q=0.1"})
+    assert arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.column("notes").to_pylist() == [item["notes"] for item in expected]
+    assert table.column("amount_original").to_pylist() == [Decimal(item["amount_original"]) for item in expected]
+
+    # A q=0 binary type falls back to JSON
+    refused = client.get("/transactions/", headers={"Accept": "application/msgpack;q=0, application/json"})
+    assert refused.headers["content-type"] == "application/json"
+
+    params = {"interval": "day", "currency": "USD"}
+    series = client.get("/reports/timeseries", params=params).json()
+    table = pa.ipc.open_stream(
+        client.get("/reports/timeseries", params=params, headers={"Accept": "application/vnd.apache.arrow.stream"}).content
+    ).read_all()
+    assert table.schema.metadata[b"interval"] == b"day"
+    assert table.column("period").to_pylist() == [point["period"] for point in series["points"]]
+    assert table.column("expense").to_pylist() == [Decimal(point["expense"]) for point in series["points"]]